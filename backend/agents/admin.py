@@ -16,7 +16,14 @@ class AgentAdmin(admin.ModelAdmin):
         ),
         (
             "Configuration LLM",
-            {"fields": ("llm_model", "temperature", "max_tokens")},
+            {
+                "fields": (
+                    "llm_model",
+                    "temperature",
+                    "max_tokens",
+                    "enable_response_cache",
+                )
+            },
         ),
         (
             "Agent Settings",
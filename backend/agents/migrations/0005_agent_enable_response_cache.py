@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0004_alter_agent_llm_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='enable_response_cache',
+            field=models.BooleanField(default=False, help_text='Réutilise la réponse pour un historique identique (agents déterministes, température 0)', verbose_name='Cache des réponses'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0005_agent_enable_response_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agent',
+            name='llm_model',
+            field=models.CharField(choices=[('gpt-4o', 'GPT-4o'), ('gpt-4o-mini', 'GPT-4o Mini'), ('gpt-4-turbo', 'GPT-4 Turbo'), ('gpt-4', 'GPT-4'), ('gpt-3.5-turbo', 'GPT-3.5 Turbo'), ('azure.gpt-4o', 'litellm Azure GPT-4o'), ('azure.gpt-4o-mini', 'litellm Azure GPT-4o Mini'), ('fake', 'Fake LLM (tests)')], help_text="Modèle de langage utilisé par l'agent", max_length=50, verbose_name='Modèle LLM'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0006_alter_agent_llm_model'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agent',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['categories'], name='agent_categories_gin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='agent_active_created_idx'),
+        ),
+    ]
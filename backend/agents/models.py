@@ -4,6 +4,7 @@ Modèles pour la gestion des agents IA.
 
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from chatagentb.llm_config import get_llm_choices
 
 
@@ -69,6 +70,12 @@ class Agent(models.Model):
         help_text="Nombre maximum de tokens dans la réponse",
     )
 
+    enable_response_cache = models.BooleanField(
+        default=False,
+        verbose_name="Cache des réponses",
+        help_text="Réutilise la réponse pour un historique identique (agents déterministes, température 0)",
+    )
+
     is_active = models.BooleanField(
         default=True,
         verbose_name="Actif",
@@ -80,6 +87,16 @@ class Agent(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Filtre par catégorie (categories__contains, categories__overlap)
+            GinIndex(fields=["categories"], name="agent_categories_gin_idx"),
+            # Agents actifs, plus récents d'abord
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True),
+                name="agent_active_created_idx",
+            ),
+        ]
         verbose_name = "Agent"
         verbose_name_plural = "Agents"
 
@@ -96,6 +113,7 @@ class Agent(models.Model):
             system_prompt=self.system_prompt,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
+            enable_response_cache=self.enable_response_cache,
             is_active=False,
         )
         return new_agent
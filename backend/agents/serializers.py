@@ -34,6 +34,7 @@ class AgentSerializer(serializers.ModelSerializer):
             "llm_model",
             "temperature",
             "max_tokens",
+            "enable_response_cache",
             "created_at",
             "updated_at",
         ]
@@ -81,5 +82,6 @@ class AgentListSerializer(serializers.ModelSerializer):
             "llm_model",
             "temperature",
             "max_tokens",
+            "enable_response_cache",
             "is_active",
         ]
@@ -9,6 +9,7 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from .models import Agent
 from .serializers import AgentSerializer, AgentListSerializer
 from chatagentb.llm_config import LLM_MODELS
+from chatagentb.pagination import EstimatedCountCursorPagination
 
 
 class AgentViewSet(viewsets.ModelViewSet):
@@ -20,6 +21,25 @@ class AgentViewSet(viewsets.ModelViewSet):
     queryset = Agent.objects.all()
     serializer_class = AgentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountCursorPagination
+    ordering = ("-created_at", "-id")
+
+    def get_queryset(self):
+        """
+        Filtres optionnels de la liste : ?is_active=true|false et
+        ?category=<catégorie> (index GIN sur categories).
+        """
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        is_active = self.request.query_params.get("is_active")
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() in ("1", "true"))
+        category = self.request.query_params.get("category")
+        if category:
+            queryset = queryset.filter(categories__contains=[category])
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Conversation, Message, Folder
+from django.db.models import Q
+from .models import AutoChatRun, Conversation, Message, Folder
+from .search import parse_query
 
 
 @admin.register(Folder)
@@ -25,12 +27,21 @@ class ConversationAdmin(admin.ModelAdmin):
         "conversation_type",
         "user",
         "folder",
+        "message_count",
+        "last_message_at",
         "created_at",
         "updated_at",
     ]
     list_filter = ["conversation_type", "folder", "created_at"]
     search_fields = ["title", "user__username"]
-    readonly_fields = ["created_at", "updated_at"]
+    readonly_fields = [
+        "message_count",
+        "last_message_at",
+        "last_message_preview",
+        "last_message_role",
+        "created_at",
+        "updated_at",
+    ]
     inlines = [MessageInline]
 
     filter_horizontal = ["agents"]
@@ -41,4 +52,49 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ["conversation", "role", "agent", "is_auto_chat", "created_at"]
     list_filter = ["role", "is_auto_chat", "created_at"]
     search_fields = ["content", "conversation__title"]
+    search_help_text = (
+        "Recherche plein texte dans le contenu et le titre de la conversation "
+        '("expression exacte", OR, -mot)'
+    )
     readonly_fields = ["created_at"]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Index GIN des vecteurs de recherche plutôt qu'un ILIKE sur tout le
+        # contenu. Les conversations dont le titre correspond sont lues
+        # d'abord : une liste d'ids (et non une sous-requête) laisse Postgres
+        # combiner les deux index
+        if not search_term.strip():
+            return queryset, False
+        query = parse_query(search_term)
+        conversation_ids = list(
+            Conversation.objects.filter(search_vector=query).values_list(
+                "id", flat=True
+            )
+        )
+        return (
+            queryset.filter(
+                Q(search_vector=query) | Q(conversation_id__in=conversation_ids)
+            ),
+            False,
+        )
+
+
+@admin.register(AutoChatRun)
+class AutoChatRunAdmin(admin.ModelAdmin):
+    list_display = [
+        "task_id",
+        "agent_a",
+        "agent_b",
+        "status",
+        "completed_turns",
+        "iterations",
+        "total_tokens",
+        "attempts",
+        "error_retries",
+        "stalled_retries",
+        "created_at",
+    ]
+    list_filter = ["status", "created_at"]
+    search_fields = ["task_id", "initial_message"]
+    readonly_fields = ["created_at", "updated_at", "finished_at"]
+    raw_id_fields = ["conversation"]
@@ -0,0 +1,323 @@
+"""
+Vues asynchrones natives pour l'API de chat.
+
+Servies par l'application ASGI (uvicorn), elles utilisent l'ORM asynchrone et
+`ainvoke` sur le client LangChain : un appel LLM en cours ne monopolise pas de
+thread, un seul worker peut donc traiter des centaines d'appels simultanés.
+"""
+
+import json
+import logging
+import math
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from agents.models import Agent
+from chatagentb.pagination import EstimatedCountCursorPagination
+from .models import Conversation, Message
+from .serializers import (
+    ConversationSerializer,
+    ConversationListSerializer,
+    MessageSerializer,
+    ChatMessageInputSerializer,
+)
+from .history_cache import ConversationHistoryCache
+from .pagination import CONVERSATION_ORDERING
+from .llm_service import LLMService
+from .rate_limiter import RateLimitExceeded
+from .resilience import LLMUnavailableError
+from .renderers import format_sse_event
+from .title_queue import TitleQueue
+
+logger = logging.getLogger(__name__)
+
+
+@sync_to_async
+def _release_db_connection():
+    """
+    Ferme la connexion DB du thread ORM de la requête avant d'attendre le LLM.
+    Sans cela chaque appel en cours garde une connexion Postgres ouverte et la
+    concurrence est plafonnée par `max_connections` plutôt que par la boucle.
+    """
+    connection.close()
+
+
+@sync_to_async
+def _serialize(serializer):
+    """Sérialise dans le thread ORM (les champs relationnels peuvent requêter)."""
+    return serializer.data
+
+
+@sync_to_async
+def _paginate_conversations(request, queryset):
+    """Page de conversations sérialisée, dans le thread ORM."""
+    paginator = EstimatedCountCursorPagination()
+    paginator.ordering = CONVERSATION_ORDERING
+    page = paginator.paginate_queryset(queryset, Request(request))
+    data = ConversationListSerializer(page, many=True).data
+    return paginator.get_paginated_response(data).data
+
+
+async def _get_request_user(request):
+    """Retourne l'utilisateur authentifié ou, en dev, le superutilisateur par défaut."""
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+
+    User = get_user_model()
+    return await User.objects.filter(is_superuser=True).afirst()
+
+
+def _conversation_queryset(user):
+    """
+    Conversations de l'utilisateur (toutes si non authentifié, dev only).
+    Les messages ne sont pas préchargés : le serializer n'embarque que la
+    page la plus récente.
+    """
+    queryset = Conversation.objects.all()
+    if user.is_authenticated:
+        queryset = queryset.filter(user=user)
+    return queryset
+
+
+async def _aprepare_turn(request):
+    """
+    Équivalent asynchrone de ConversationViewSet._prepare_turn.
+
+    Retourne un tuple (turn, error_response).
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None, JsonResponse({"error": "JSON invalide"}, status=400)
+
+    serializer = ChatMessageInputSerializer(data=data)
+    if not serializer.is_valid():
+        return None, JsonResponse(serializer.errors, status=400)
+
+    message_content = serializer.validated_data["message"]
+    agent_id = serializer.validated_data["agent_id"]
+    conversation_id = serializer.validated_data.get("conversation_id")
+
+    try:
+        agent = await Agent.objects.aget(id=agent_id, is_active=True)
+    except Agent.DoesNotExist:
+        logger.error(f"Agent not found: {agent_id}")
+        return None, JsonResponse({"error": "Agent introuvable ou inactif"}, status=404)
+
+    user = await _get_request_user(request)
+    if not user:
+        logger.error("No default superuser found")
+        return None, JsonResponse(
+            {"error": "Aucun utilisateur par défaut trouvé"}, status=500
+        )
+
+    if conversation_id:
+        try:
+            conversation = await Conversation.objects.aget(id=conversation_id, user=user)
+        except Conversation.DoesNotExist:
+            logger.error(f"Conversation not found: {conversation_id}")
+            return None, JsonResponse({"error": "Conversation introuvable"}, status=404)
+    else:
+        conversation = await Conversation.objects.acreate(user=user)
+        await conversation.agents.aadd(agent)
+        logger.info(f"New conversation created: {conversation.id}")
+
+    user_message = await Message.objects.acreate(
+        conversation=conversation, role="human", content=message_content
+    )
+
+    history = await sync_to_async(ConversationHistoryCache.get)(conversation.id)
+
+    # Mettre la conversation en file de titrage à partir du cinquième message
+    if len(history) >= 5 and not conversation.title:
+        await sync_to_async(TitleQueue.enqueue, thread_sensitive=False)(conversation.id)
+
+    turn = {
+        "agent": agent,
+        "conversation": conversation,
+        "user_message": user_message,
+        "history": history,
+    }
+    return turn, None
+
+
+async def stream_turn_events(turn):
+    """
+    Générateur asynchrone des événements SSE d'un tour de conversation.
+    Servi nativement par l'application ASGI (uvicorn) sans bloquer de thread.
+    """
+    agent = turn["agent"]
+    conversation = turn["conversation"]
+
+    yield format_sse_event(
+        "start",
+        {
+            "conversation_id": conversation.id,
+            "user_message": MessageSerializer(turn["user_message"]).data,
+        },
+    )
+
+    await _release_db_connection()
+
+    chunks = []
+    metadata = {}
+    try:
+        async for chunk in LLMService.astream_response(
+            agent, turn["history"], metadata
+        ):
+            chunks.append(chunk)
+            yield format_sse_event("token", {"content": chunk})
+    except (RateLimitExceeded, LLMUnavailableError) as e:
+        logger.warning(f"LLM call rejected: {str(e)}")
+        yield format_sse_event(
+            "error", {"error": str(e), "retry_after": round(e.retry_after, 1)}
+        )
+        return
+    except Exception as e:
+        logger.error(f"Error streaming LLM response: {str(e)}", exc_info=True)
+        yield format_sse_event(
+            "error",
+            {"error": f"Erreur lors de la génération de la réponse: {str(e)}"},
+        )
+        return
+
+    # Sauvegarder la réponse complète une fois le flux terminé
+    ai_message = await Message.objects.acreate(
+        conversation=conversation,
+        role="ai",
+        content="".join(chunks),
+        agent=agent,
+        metadata=metadata,
+    )
+    logger.info(f"AI message saved: {ai_message.id}")
+
+    yield format_sse_event(
+        "done",
+        {
+            "conversation_id": conversation.id,
+            "ai_message": MessageSerializer(ai_message).data,
+        },
+    )
+
+
+@csrf_exempt
+@require_POST
+async def send_message(request):
+    """
+    Envoie un message et obtient une réponse de l'agent (chemin asynchrone).
+    Endpoint: POST /api/chat/async/conversations/send_message/
+    """
+    turn, error_response = await _aprepare_turn(request)
+    if error_response is not None:
+        return error_response
+
+    agent = turn["agent"]
+    conversation = turn["conversation"]
+
+    await _release_db_connection()
+
+    try:
+        result = await LLMService.agenerate_response_with_metadata(
+            agent, turn["history"]
+        )
+    except RateLimitExceeded as e:
+        logger.warning(f"LLM rate limit reached: {str(e)}")
+        response = JsonResponse(
+            {"error": str(e), "retry_after": round(e.retry_after, 1)}, status=429
+        )
+        response["Retry-After"] = str(math.ceil(e.retry_after))
+        return response
+    except LLMUnavailableError as e:
+        logger.error(f"LLM unavailable: {str(e)}")
+        response = JsonResponse(
+            {"error": str(e), "retry_after": round(e.retry_after, 1)}, status=503
+        )
+        response["Retry-After"] = str(math.ceil(e.retry_after))
+        return response
+    except Exception as e:
+        logger.error(f"Error generating LLM response: {str(e)}", exc_info=True)
+        return JsonResponse(
+            {"error": f"Erreur lors de la génération de la réponse: {str(e)}"},
+            status=500,
+        )
+
+    ai_message = await Message.objects.acreate(
+        conversation=conversation,
+        role="ai",
+        content=result["content"],
+        agent=agent,
+        metadata=result["metadata"],
+    )
+    logger.info(f"AI message saved: {ai_message.id}")
+
+    return JsonResponse(
+        {
+            "conversation_id": conversation.id,
+            "user_message": MessageSerializer(turn["user_message"]).data,
+            "ai_message": MessageSerializer(ai_message).data,
+        }
+    )
+
+
+@csrf_exempt
+@require_POST
+async def send_message_stream(request):
+    """
+    Variante streamée (SSE) du chemin asynchrone.
+    Endpoint: POST /api/chat/async/conversations/send_message_stream/
+    """
+    turn, error_response = await _aprepare_turn(request)
+    if error_response is not None:
+        return error_response
+
+    response = StreamingHttpResponse(
+        stream_turn_events(turn), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+async def conversation_list(request):
+    """
+    Liste paginée par curseur des conversations de l'utilisateur (mêmes
+    curseurs que ConversationViewSet).
+    Endpoint: GET /api/chat/async/conversations/?cursor=<curseur>&count=true
+    """
+    user = await request.auser()
+
+    # Compteur et aperçu sont dénormalisés : pas de préchargement des messages
+    queryset = (
+        _conversation_queryset(user).select_related("folder").prefetch_related("agents")
+    )
+    try:
+        data = await _paginate_conversations(request, queryset)
+    except NotFound:
+        return JsonResponse({"error": "Curseur invalide"}, status=404)
+    return JsonResponse(data)
+
+
+@require_GET
+async def conversation_detail(request, pk):
+    """
+    Détails d'une conversation avec ses messages.
+    Endpoint: GET /api/chat/async/conversations/<id>/
+    """
+    user = await request.auser()
+
+    try:
+        conversation = await (
+            _conversation_queryset(user).prefetch_related("agents").aget(pk=pk)
+        )
+    except Conversation.DoesNotExist:
+        return JsonResponse({"error": "Conversation introuvable"}, status=404)
+
+    data = await _serialize(ConversationSerializer(conversation))
+    return JsonResponse(data)
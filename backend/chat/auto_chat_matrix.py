@@ -0,0 +1,153 @@
+"""
+Matrice Auto-Chat : un Auto-Chat par paire (agent métier, agent client).
+
+Les paires sont réparties en `concurrency` files exécutées en parallèle
+(group de chains Celery), chaque file enchaînant ses Auto-Chats l'un après
+l'autre. Un chord agrège les résultats une fois toutes les files terminées.
+"""
+
+import logging
+import uuid
+from typing import Dict, List, Tuple
+from celery import chain, chord
+from agents.models import Agent
+from .models import AutoChatRun
+from .tasks import run_auto_chat, summarize_auto_chat_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class AutoChatMatrix:
+    """Lancement et suivi des matrices Auto-Chat."""
+
+    @staticmethod
+    def get_agents(
+        metier_agent_ids: List[int], client_agent_ids: List[int]
+    ) -> Tuple[List[Agent], List[Agent], List[str]]:
+        """
+        Charge les agents de la matrice (une requête) et vérifie leur type.
+
+        Returns:
+            tuple: (agents métier, agents clients, erreurs)
+        """
+        agents = Agent.objects.in_bulk(
+            set(metier_agent_ids) | set(client_agent_ids)
+        )
+        errors = []
+
+        metier_agents = []
+        for agent_id in metier_agent_ids:
+            agent = agents.get(agent_id)
+            if agent is None or not agent.is_active:
+                errors.append(f"Agent {agent_id} introuvable ou inactif")
+            elif agent.agent_type != "metier" or not agent.first_prompt:
+                errors.append(
+                    f"L'agent {agent.name} n'est pas un agent métier avec premier prompt"
+                )
+            else:
+                metier_agents.append(agent)
+
+        client_agents = []
+        for agent_id in client_agent_ids:
+            agent = agents.get(agent_id)
+            if agent is None or not agent.is_active:
+                errors.append(f"Agent {agent_id} introuvable ou inactif")
+            elif agent.agent_type != "client":
+                errors.append(f"L'agent {agent.name} n'est pas un agent client")
+            else:
+                client_agents.append(agent)
+
+        return metier_agents, client_agents, errors
+
+    @staticmethod
+    def launch(
+        metier_agents: List[Agent],
+        client_agents: List[Agent],
+        iterations: int,
+        user_id: int,
+        concurrency: int,
+    ) -> Tuple[str, str]:
+        """
+        Lance un Auto-Chat par paire (métier, client), `concurrency` à la fois.
+
+        Returns:
+            tuple: (matrix_id, ID de la tâche d'agrégation)
+        """
+        matrix_id = str(uuid.uuid4())
+        signatures = [
+            run_auto_chat.si(
+                agent_a_id=metier.id,
+                agent_b_id=client.id,
+                initial_message=metier.first_prompt,
+                iterations=iterations,
+                user_id=user_id,
+                matrix_id=matrix_id,
+            )
+            for metier in metier_agents
+            for client in client_agents
+        ]
+
+        # Répartition en files : l'agent métier initie (agent A), le client répond
+        lanes = [signatures[i::concurrency] for i in range(concurrency)]
+        header = [chain(*lane) for lane in lanes if lane]
+
+        result = chord(header)(summarize_auto_chat_matrix.si(matrix_id))
+        logger.info(
+            f"Auto-chat matrix {matrix_id} started: {len(signatures)} pairs, "
+            f"{len(header)} lanes"
+        )
+        return matrix_id, result.id
+
+    @staticmethod
+    def missing_pairs(
+        matrix_id: str, metier_agents: List[Agent], client_agents: List[Agent]
+    ) -> List[Tuple[Agent, Agent]]:
+        """Paires (métier, client) dont l'Auto-Chat n'a jamais démarré."""
+        started = set(
+            AutoChatRun.objects.filter(matrix_id=matrix_id).values_list(
+                "agent_a_id", "agent_b_id"
+            )
+        )
+        return [
+            (metier, client)
+            for metier in metier_agents
+            for client in client_agents
+            if (metier.id, client.id) not in started
+        ]
+
+    @staticmethod
+    def summarize(matrix_id: str) -> Dict:
+        """Résumé d'une matrice : une ligne par paire et totaux."""
+        runs = list(
+            AutoChatRun.objects.filter(matrix_id=matrix_id)
+            .select_related("agent_a", "agent_b")
+            .order_by("id")
+        )
+
+        pairs = [
+            {
+                "run_id": run.id,
+                "conversation_id": run.conversation_id,
+                "metier_agent": run.agent_a.name if run.agent_a else None,
+                "client_agent": run.agent_b.name if run.agent_b else None,
+                "status": run.status,
+                "turns": run.completed_turns,
+                "iterations": run.iterations,
+                "tokens": run.total_tokens,
+                "duration": run.duration,
+                "error": run.error,
+            }
+            for run in runs
+        ]
+        durations = [pair["duration"] for pair in pairs if pair["duration"] is not None]
+
+        return {
+            "matrix_id": matrix_id,
+            "runs": len(pairs),
+            "completed": sum(1 for pair in pairs if pair["status"] == "completed"),
+            "failed": sum(1 for pair in pairs if pair["status"] == "failed"),
+            "total_tokens": sum(pair["tokens"] for pair in pairs),
+            "total_turns": sum(pair["turns"] for pair in pairs),
+            "max_duration": max(durations) if durations else None,
+            "pairs": pairs,
+        }
@@ -0,0 +1,126 @@
+"""
+Construction de la fenêtre de contexte envoyée aux LLM.
+
+L'historique est tronqué pour tenir dans le budget du modèle :
+`context_window` (llm_config) moins les tokens réservés à la réponse
+(`agent.max_tokens`). Le prompt système et les tours les plus récents sont
+toujours conservés ; les messages les plus anciens sont omis.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List
+from chatagentb.llm_config import get_model_config
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken est une dépendance de langchain-openai
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Surcoût approximatif du format chat OpenAI par message (rôle, séparateurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Tokens réservés pour l'amorce de la réponse
+REPLY_PRIMING_TOKENS = 3
+DEFAULT_ENCODING = "o200k_base"
+# Comptes de tokens mémorisés : clé = empreinte du texte + modèle, pour que la
+# mémoire occupée ne dépende pas de la longueur des messages
+TOKEN_COUNT_CACHE_SIZE = 4096
+
+_token_counts: "OrderedDict[tuple, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # Le fichier d'encodage est téléchargé au premier usage
+        logger.warning(f"tiktoken encoding unavailable for {model_name}: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model_name: str) -> int:
+    """
+    Compte les tokens d'un texte pour un modèle donné.
+    Sans tiktoken, utilise l'approximation de 4 caractères par token.
+    """
+    key = (hashlib.blake2b(text.encode(), digest_size=16).digest(), model_name)
+    with _token_counts_lock:
+        tokens = _token_counts.get(key)
+        if tokens is not None:
+            _token_counts.move_to_end(key)
+            return tokens
+
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        tokens = len(text) // 4 + 1
+    else:
+        tokens = len(encoding.encode(text, disallowed_special=()))
+
+    with _token_counts_lock:
+        _token_counts[key] = tokens
+        if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return tokens
+
+
+def get_context_budget(model_key: str, max_tokens: int) -> int:
+    """Budget de tokens disponible pour le prompt (système + historique)."""
+    model_config = get_model_config(model_key)
+    context_window = model_config.get("context_window", model_config["max_tokens_limit"])
+    return max(context_window - max_tokens - REPLY_PRIMING_TOKENS, 0)
+
+
+def build_context(
+    conversation_history: List[Dict],
+    system_prompt: str,
+    model_key: str,
+    max_tokens: int,
+) -> Dict:
+    """
+    Sélectionne les messages les plus récents qui tiennent dans le budget.
+
+    Le dernier message est toujours conservé. La sélection est déterministe :
+    pour un même historique et une même configuration, le résultat est identique.
+
+    Returns:
+        dict: {
+            "history": messages conservés (ordre chronologique),
+            "tokens": tokens du prompt conservé (système inclus),
+            "budget": budget de tokens disponible,
+            "dropped": nombre de messages omis,
+        }
+    """
+    model_name = get_model_config(model_key)["model_name"]
+    budget = get_context_budget(model_key, max_tokens)
+
+    used = count_tokens(system_prompt, model_name) + MESSAGE_OVERHEAD_TOKENS
+    kept = []
+
+    for msg in reversed(conversation_history):
+        cost = count_tokens(msg["content"], model_name) + MESSAGE_OVERHEAD_TOKENS
+        if kept and used + cost > budget:
+            break
+        kept.append(msg)
+        used += cost
+
+    kept.reverse()
+    dropped = len(conversation_history) - len(kept)
+    if dropped:
+        logger.info(
+            f"Context truncated for {model_key}: dropped {dropped} messages, "
+            f"kept {used}/{budget} tokens"
+        )
+
+    return {"history": kept, "tokens": used, "budget": budget, "dropped": dropped}
@@ -0,0 +1,231 @@
+"""
+Modèle de chat factice, en mémoire, pour les tests de charge et la CI.
+
+Sélectionnable comme tout modèle de LLM_MODELS (provider `fake`, voir
+chat.providers) : il passe par LLMService, le limiteur de débit, les retries
+et le routeur comme un vrai provider, sans réseau ni coût. Réglages :
+
+- `latency` : délai avant la réponse (premier token en streaming), tiré
+  d'une distribution : "constant:0.2", "uniform:0.1:0.5",
+  "normal:<moyenne>:<écart-type>", "lognormal:<médiane>:<sigma>",
+  "exponential:<moyenne>" (secondes)
+- `tokens_per_second` : débit de génération après le premier token
+- `chunk_tokens` : tokens par morceau streamé
+- `completion_tokens` : longueur maximale des réponses (plafonnée par max_tokens)
+- `error_rate` : part des appels en erreur 500 (erreur transitoire) ; un
+  délai tiré au-delà de `timeout` lève un APITimeoutError
+- `seed` : graine du tirage des latences et erreurs
+
+Le texte d'une réponse ne dépend que des messages : une même conversation
+reçoit toujours la même réponse. Un mot compte pour un token. Le prompt de
+titrage par lots (LLMService.generate_titles) reçoit l'objet JSON attendu,
+un titre de quelques mots par conversation.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+import httpx
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+VOCABULARY = (
+    "le la les un une des de du et ou mais donc pour avec sans dans sur sous "
+    "agent client conseiller contrat offre demande réponse question dossier "
+    "service produit délai option tarif compte rendez-vous document besoin "
+    "nous vous pouvons proposer vérifier confirmer préciser envoyer étudier"
+).split()
+
+# Sections du prompt de titrage par lots
+_TITLE_SECTION = re.compile(r"^### Conversation (\d+)$", re.MULTILINE)
+
+_DISTRIBUTIONS = {
+    "constant": (1, lambda rng, value: value),
+    "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+    "normal": (2, lambda rng, mean, std: rng.gauss(mean, std)),
+    "lognormal": (
+        2,
+        lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma),
+    ),
+    "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Convertit une spécification de latence ("lognormal:0.4:0.5"...) en
+    fonction de tirage (secondes, jamais négatives).
+    """
+    name, _, args = spec.partition(":")
+    if name not in _DISTRIBUTIONS:
+        raise ValueError(f"Distribution de latence '{name}' inconnue")
+    arity, sample = _DISTRIBUTIONS[name]
+    try:
+        params = [float(arg) for arg in args.split(":")] if args else []
+    except ValueError:
+        raise ValueError(f"Paramètres de latence invalides : '{spec}'")
+    if len(params) != arity:
+        raise ValueError(f"La distribution '{name}' attend {arity} paramètre(s)")
+    return lambda rng: max(sample(rng, *params), 0.0)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Même approximation que context_window.count_tokens sans tiktoken
+    return len(text) // 4 + 1
+
+
+class FakeChatModel(BaseChatModel):
+    """Modèle de chat factice (voir le docstring du module)."""
+
+    model_name: str = "fake"
+    temperature: float = 0.0  # sans effet : la réponse ne dépend que des messages
+    latency: str = "constant:0"
+    tokens_per_second: float = 0.0  # 0 : pas de délai entre les morceaux
+    chunk_tokens: int = 4
+    completion_tokens: int = 120
+    error_rate: float = 0.0
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+    seed: Optional[int] = None
+
+    _sample_latency: Callable = PrivateAttr()
+    _rng: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._sample_latency = parse_latency(self.latency)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> List[str]:
+        """Mots de la réponse, déterminés par le contenu des messages."""
+        digest = hashlib.sha256(
+            "\n".join(str(message.content) for message in messages).encode()
+        ).digest()
+        rng = random.Random(digest)
+        conversation_ids = _TITLE_SECTION.findall(str(messages[-1].content))
+        if conversation_ids:
+            titles = {
+                conversation_id: " ".join(
+                    rng.choice(VOCABULARY) for _ in range(rng.randint(2, 5))
+                )
+                for conversation_id in conversation_ids
+            }
+            return json.dumps(titles, ensure_ascii=False).split(" ")
+        limit = self.completion_tokens
+        if self.max_tokens:
+            limit = min(limit, self.max_tokens)
+        length = rng.randint(max(limit // 2, 1), max(limit, 1))
+        return [rng.choice(VOCABULARY) for _ in range(length)]
+
+    def _usage(self, messages: List[BaseMessage], words: List[str]) -> dict:
+        input_tokens = sum(_estimate_tokens(str(message.content)) for message in messages)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(words),
+            "total_tokens": input_tokens + len(words),
+        }
+
+    def _draw(self):
+        """
+        Tire le délai avant la réponse et l'erreur éventuellement injectée,
+        à lever une fois ce délai écoulé.
+        """
+        delay = self._sample_latency(self._rng)
+        request = httpx.Request("POST", "http://fake-llm/v1/chat/completions")
+        if self.timeout and delay > self.timeout:
+            return self.timeout, openai.APITimeoutError(request=request)
+        if self._rng.random() < self.error_rate:
+            error = openai.InternalServerError(
+                "Fake LLM injected error",
+                response=httpx.Response(500, request=request),
+                body=None,
+            )
+            return delay, error
+        return delay, None
+
+    def _chunks(self, words: List[str]) -> Iterator[str]:
+        size = max(self.chunk_tokens, 1)
+        for i in range(0, len(words), size):
+            text = " ".join(words[i : i + size])
+            yield text if i == 0 else f" {text}"
+
+    def _chunk_delay(self) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return max(self.chunk_tokens, 1) / self.tokens_per_second
+
+    def _generation_time(self, words: List[str]) -> float:
+        """Durée de génération après le premier morceau (appel non streamé)."""
+        chunks = math.ceil(len(words) / max(self.chunk_tokens, 1))
+        return self._chunk_delay() * max(chunks - 1, 0)
+
+    def _result(self, messages: List[BaseMessage], words: List[str]) -> ChatResult:
+        message = AIMessage(
+            content=" ".join(words), usage_metadata=self._usage(messages, words)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, error = self._draw()
+        time.sleep(delay)
+        if error:
+            raise error
+        words = self._reply(messages)
+        time.sleep(self._generation_time(words))
+        return self._result(messages, words)
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        delay, error = self._draw()
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        words = self._reply(messages)
+        await asyncio.sleep(self._generation_time(words))
+        return self._result(messages, words)
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        delay, error = self._draw()
+        time.sleep(delay)
+        if error:
+            raise error
+        words = self._reply(messages)
+        for i, text in enumerate(self._chunks(words)):
+            if i:
+                time.sleep(self._chunk_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        # Usage dans le dernier morceau, comme stream_usage chez OpenAI
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, words))
+        )
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, error = self._draw()
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        words = self._reply(messages)
+        for i, text in enumerate(self._chunks(words)):
+            if i:
+                await asyncio.sleep(self._chunk_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, words))
+        )
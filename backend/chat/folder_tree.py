@@ -0,0 +1,100 @@
+"""
+Arbre des dossiers d'un utilisateur, construit en deux requêtes et mis en cache.
+
+Tous les dossiers de l'utilisateur sont chargés en une requête, le nombre de
+conversations par dossier en une requête groupée, puis l'arbre est assemblé en
+mémoire. Le résultat sérialisé est mis en cache (cache Django / Redis) et
+invalidé par les signaux sur Folder et Conversation.
+"""
+
+import logging
+from collections import defaultdict
+from typing import List, Optional
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter si le format de l'arbre sérialisé change
+FOLDER_TREE_CACHE_VERSION = 1
+
+
+class FolderTreeCache:
+    """Arbre des dossiers (avec nombre de conversations) mis en cache par utilisateur."""
+
+    @staticmethod
+    def _key(user_id: Optional[int]) -> str:
+        # user_id None : tous les dossiers (accès non authentifié, dev only)
+        owner = user_id if user_id is not None else "all"
+        return f"chat:folder-tree:v{FOLDER_TREE_CACHE_VERSION}:{owner}"
+
+    @staticmethod
+    def get(user_id: Optional[int]) -> List[dict]:
+        """
+        Retourne les dossiers racine sérialisés, sous-dossiers imbriqués.
+        Reconstruit depuis la base en cas d'absence ou si le cache est indisponible.
+        """
+        key = FolderTreeCache._key(user_id)
+        try:
+            tree = cache.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Folder tree cache unavailable: {str(e)}")
+            return FolderTreeCache.build(user_id)
+
+        if tree is None:
+            tree = FolderTreeCache.build(user_id)
+            try:
+                cache.set(key, tree, settings.FOLDER_TREE_CACHE_TTL)
+            except redis.RedisError as e:
+                logger.warning(f"Could not cache folder tree: {str(e)}")
+        return tree
+
+    @staticmethod
+    def build(user_id: Optional[int]) -> List[dict]:
+        """Construit l'arbre en deux requêtes, quelle que soit sa profondeur."""
+        from .models import Conversation, Folder
+        from .serializers import FolderSerializer
+
+        folders = Folder.objects.all()
+        conversations = Conversation.objects.filter(folder__isnull=False)
+        if user_id is not None:
+            folders = folders.filter(user_id=user_id)
+            conversations = conversations.filter(user_id=user_id)
+
+        children = defaultdict(list)
+        for folder in folders.order_by("order", "name"):
+            children[folder.parent_id].append(folder)
+
+        # order_by() : l'ordre par défaut (-updated_at) casserait le GROUP BY
+        counts = dict(
+            conversations.order_by()
+            .values("folder")
+            .annotate(count=Count("id"))
+            .values_list("folder", "count")
+        )
+
+        context = {"folder_children": children, "conversation_counts": counts}
+        return list(FolderSerializer(children[None], many=True, context=context).data)
+
+    @staticmethod
+    def find(tree: List[dict], folder_id: int) -> Optional[dict]:
+        """Retourne le nœud d'un dossier dans l'arbre sérialisé."""
+        for node in tree:
+            if node["id"] == folder_id:
+                return node
+            found = FolderTreeCache.find(node["subfolders"], folder_id)
+            if found:
+                return found
+        return None
+
+    @staticmethod
+    def invalidate(user_id: Optional[int]) -> None:
+        """Supprime l'arbre en cache de l'utilisateur (et la vue globale de dev)."""
+        try:
+            cache.delete_many(
+                [FolderTreeCache._key(user_id), FolderTreeCache._key(None)]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate folder tree cache: {str(e)}")
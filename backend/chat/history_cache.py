@@ -0,0 +1,193 @@
+"""
+Cache Redis de l'historique des conversations.
+
+L'historique de chaque conversation est stocké dans une liste Redis en ajout
+seul : chaque nouveau message y est ajouté après commit, et la liste n'est
+reconstruite depuis Postgres qu'en cas d'absence ou d'incohérence (message
+ajouté dans le désordre, changement de format).
+
+Chaque ajout enregistre aussi le dernier identifiant ajouté (clé `:last`) :
+une reconstruction lancée avant le commit d'un message ne réécrit pas une
+liste qui l'omettrait.
+"""
+
+import json
+import logging
+from typing import Dict, List
+import redis
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter si le format des entrées change
+HISTORY_CACHE_VERSION = 1
+
+# Mémorise le dernier identifiant ajouté, puis ajoute l'entrée seulement si
+# la liste existe et que le message est plus récent que la dernière entrée ;
+# sinon la liste est supprimée (reconstruction).
+APPEND_SCRIPT = """
+local last_id = tonumber(redis.call('GET', KEYS[2]) or '0')
+if tonumber(ARGV[1]) > last_id then
+    redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[3])
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local last = redis.call('LINDEX', KEYS[1], -1)
+if last and cjson.decode(last)['id'] >= tonumber(ARGV[1]) then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('RPUSH', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# Réécrit la liste, sauf si un message plus récent que les lignes lues a été
+# ajouté entre-temps (la liste serait incomplète : prochaine lecture = rebuild)
+REBUILD_SCRIPT = """
+local last_id = tonumber(redis.call('GET', KEYS[2]) or '0')
+redis.call('DEL', KEYS[1])
+if last_id > tonumber(ARGV[1]) then
+    return 0
+end
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class ConversationHistoryCache:
+    """Historique des conversations mis en cache dans Redis."""
+
+    _append_script = None
+    _rebuild_script = None
+
+    @staticmethod
+    def _key(conversation_id: int) -> str:
+        return f"chat:history:v{HISTORY_CACHE_VERSION}:{conversation_id}"
+
+    @staticmethod
+    def _last_id_key(conversation_id: int) -> str:
+        return f"{ConversationHistoryCache._key(conversation_id)}:last"
+
+    @staticmethod
+    def _entry(message_id: int, role: str, content: str) -> str:
+        return json.dumps({"id": message_id, "role": role, "content": content})
+
+    @staticmethod
+    def get(conversation_id: int) -> List[Dict]:
+        """
+        Retourne l'historique [{"role", "content"}] de la conversation.
+        Reconstruit depuis la base en cas d'absence ou si Redis est indisponible.
+        """
+        try:
+            entries = get_redis().lrange(
+                ConversationHistoryCache._key(conversation_id), 0, -1
+            )
+        except redis.RedisError as e:
+            logger.warning(f"History cache unavailable: {str(e)}")
+            return ConversationHistoryCache._load(conversation_id)
+
+        if not entries:
+            return ConversationHistoryCache.rebuild(conversation_id)
+
+        history = []
+        for entry in entries:
+            data = json.loads(entry)
+            history.append({"role": data["role"], "content": data["content"]})
+        return history
+
+    @staticmethod
+    def _load(conversation_id: int) -> List[Dict]:
+        from .models import Message
+
+        return list(
+            Message.objects.filter(conversation_id=conversation_id)
+            .order_by("created_at", "id")
+            .values("id", "role", "content")
+        )
+
+    @staticmethod
+    def rebuild(conversation_id: int) -> List[Dict]:
+        """Recharge l'historique depuis Postgres et le réécrit dans Redis."""
+        rows = ConversationHistoryCache._load(conversation_id)
+        logger.info(
+            f"Rebuilding history cache for conversation {conversation_id} "
+            f"({len(rows)} messages)"
+        )
+
+        if rows:
+            try:
+                if ConversationHistoryCache._rebuild_script is None:
+                    ConversationHistoryCache._rebuild_script = (
+                        get_redis().register_script(REBUILD_SCRIPT)
+                    )
+                written = ConversationHistoryCache._rebuild_script(
+                    keys=[
+                        ConversationHistoryCache._key(conversation_id),
+                        ConversationHistoryCache._last_id_key(conversation_id),
+                    ],
+                    args=[
+                        rows[-1]["id"],
+                        settings.CHAT_HISTORY_CACHE_TTL,
+                        *[
+                            ConversationHistoryCache._entry(
+                                row["id"], row["role"], row["content"]
+                            )
+                            for row in rows
+                        ],
+                    ],
+                )
+                if not written:
+                    logger.info(
+                        f"History cache for conversation {conversation_id} not "
+                        f"written: a newer message was appended during rebuild"
+                    )
+            except redis.RedisError as e:
+                logger.warning(f"History cache unavailable: {str(e)}")
+
+        return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+    @staticmethod
+    def append(message) -> None:
+        """Ajoute un message à l'historique en cache (s'il est déjà chargé)."""
+        try:
+            if ConversationHistoryCache._append_script is None:
+                ConversationHistoryCache._append_script = get_redis().register_script(
+                    APPEND_SCRIPT
+                )
+            result = ConversationHistoryCache._append_script(
+                keys=[
+                    ConversationHistoryCache._key(message.conversation_id),
+                    ConversationHistoryCache._last_id_key(message.conversation_id),
+                ],
+                args=[
+                    message.id,
+                    ConversationHistoryCache._entry(
+                        message.id, message.role, message.content
+                    ),
+                    settings.CHAT_HISTORY_CACHE_TTL,
+                ],
+            )
+            if result == -1:
+                logger.info(
+                    f"History cache out of order for conversation "
+                    f"{message.conversation_id}, invalidated"
+                )
+        except redis.RedisError as e:
+            logger.warning(f"History cache unavailable: {str(e)}")
+
+    @staticmethod
+    def invalidate(conversation_id: int) -> None:
+        """Supprime l'historique en cache (reconstruit à la prochaine lecture)."""
+        try:
+            get_redis().delete(
+                ConversationHistoryCache._key(conversation_id),
+                ConversationHistoryCache._last_id_key(conversation_id),
+            )
+        except redis.RedisError as e:
+            logger.warning(f"History cache unavailable: {str(e)}")
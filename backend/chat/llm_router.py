@@ -0,0 +1,114 @@
+"""
+Routage des appels LLM entre les endpoints d'un modèle logique.
+
+Chaque processus tient, par endpoint, une moyenne mobile exponentielle de la
+latence (premier token en streaming) et du taux d'erreur, ainsi que le nombre
+d'appels en cours. Un appel va à l'endpoint de plus petit score :
+
+    latence × (1 + appels en cours) × (1 + LLM_ROUTER_ERROR_PENALTY × taux d'erreur)
+
+Un endpoint sans mesure a un score nul (il est essayé en premier) et une
+petite part des appels (LLM_ROUTER_EXPLORATION) est envoyée au hasard pour
+que les statistiques d'un endpoint écarté se rafraîchissent.
+"""
+
+import random
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from django.conf import settings
+from chatagentb.metrics import LLM_ENDPOINT_ERROR_RATE, LLM_ENDPOINT_LATENCY
+from .providers import model_endpoints
+
+_stats: Dict[str, Dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _endpoint_stats(key: str) -> Dict:
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = {"latency": None, "error_rate": 0.0, "in_flight": 0}
+    return stats
+
+
+class LLMRouter:
+    """Choix de l'endpoint le plus sain et le plus rapide d'un modèle."""
+
+    @staticmethod
+    def pick(model_key: str) -> Dict:
+        """Retourne l'endpoint (voir providers.model_endpoints) à utiliser."""
+        endpoints = model_endpoints(model_key)
+        if len(endpoints) == 1:
+            return endpoints[0]
+        if random.random() < settings.LLM_ROUTER_EXPLORATION:
+            return random.choice(endpoints)
+        with _stats_lock:
+            return min(endpoints, key=lambda endpoint: LLMRouter._score(endpoint["key"]))
+
+    @staticmethod
+    def _score(key: str) -> float:
+        stats = _stats.get(key)
+        if stats is None:
+            return 0.0
+        # Jamais abouti : pénalisé comme un appel allant jusqu'au timeout
+        latency = stats["latency"] if stats["latency"] is not None else settings.LLM_TIMEOUT
+        return (
+            latency
+            * (1 + stats["in_flight"])
+            * (1 + settings.LLM_ROUTER_ERROR_PENALTY * stats["error_rate"])
+        )
+
+    @staticmethod
+    @contextmanager
+    def in_flight(key: str):
+        """
+        Compte l'appel parmi les appels en cours de l'endpoint le temps du bloc,
+        y compris quand il est annulé (déconnexion du client, CancelledError,
+        GeneratorExit d'un flux interrompu).
+        """
+        with _stats_lock:
+            _endpoint_stats(key)["in_flight"] += 1
+        try:
+            yield
+        finally:
+            with _stats_lock:
+                stats = _endpoint_stats(key)
+                stats["in_flight"] = max(stats["in_flight"] - 1, 0)
+
+    @staticmethod
+    def record(key: str, latency: Optional[float] = None, error: bool = False):
+        """
+        Issue d'un appel : latence mesurée si succès, `error` si l'endpoint a
+        échoué (erreur transitoire). Sans l'un ni l'autre, rien n'est mesuré.
+        Les appels en cours sont comptés par in_flight().
+        """
+        alpha = settings.LLM_ROUTER_EWMA_ALPHA
+        with _stats_lock:
+            stats = _endpoint_stats(key)
+            if latency is not None:
+                stats["latency"] = (
+                    latency
+                    if stats["latency"] is None
+                    else alpha * latency + (1 - alpha) * stats["latency"]
+                )
+                stats["error_rate"] *= 1 - alpha
+            elif error:
+                stats["error_rate"] = alpha + (1 - alpha) * stats["error_rate"]
+            else:
+                return
+            snapshot = dict(stats)
+
+        if snapshot["latency"] is not None:
+            LLM_ENDPOINT_LATENCY.labels(endpoint=key).set(snapshot["latency"])
+        LLM_ENDPOINT_ERROR_RATE.labels(endpoint=key).set(snapshot["error_rate"])
+
+    @staticmethod
+    def stats() -> Dict[str, Dict]:
+        """Statistiques courantes par endpoint (processus courant)."""
+        with _stats_lock:
+            return {key: dict(stats) for key, stats in _stats.items()}
+
+    @staticmethod
+    def reset():
+        with _stats_lock:
+            _stats.clear()
@@ -2,13 +2,67 @@
 Service LangChain pour la gestion des LLM.
 """
 
-from typing import List, Dict, Optional
-from langchain_openai import ChatOpenAI
-from langchain_openai import AzureChatOpenAI
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Iterator, List, Dict, Optional
+import httpx
+from asgiref.sync import sync_to_async
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from django.conf import settings
 from agents.models import Agent
 from chatagentb.llm_config import get_model_config
+from chatagentb.metrics import record_llm_usage
+from .context_window import build_context, count_tokens
+from .llm_router import LLMRouter
+from .providers import build_chat_model
+from .rate_limiter import LLMRateLimiter
+from .resilience import CallPlan
+from .response_cache import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Cache LRU des clients LLM (partagé par tous les threads du processus)
+_llm_cache = OrderedDict()
+_llm_cache_lock = threading.Lock()
+# agent_id -> clés de cache, pour l'invalidation à la sauvegarde d'un agent
+_agent_cache_keys = {}
+
+# Pools de connexions HTTP keep-alive partagés par tous les clients LLM
+_http_client = None
+_async_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _get_http_client() -> httpx.Client:
+    """Client HTTP synchrone partagé (pool keep-alive)."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(limits=_http_limits())
+    return _http_client
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    """Client HTTP asynchrone partagé (pool keep-alive, boucle uvicorn)."""
+    global _async_http_client
+    if _async_http_client is None:
+        with _http_client_lock:
+            if _async_http_client is None:
+                _async_http_client = httpx.AsyncClient(limits=_http_limits())
+    return _async_http_client
 
 
 class LLMService:
@@ -17,42 +71,95 @@ class LLMService:
     @staticmethod
     def get_llm(agent: Agent):
         """
-        Retourne une instance LLM configurée pour l'agent.
+        Retourne une instance LLM configurée pour l'agent (depuis le cache),
+        sur l'endpoint choisi par le routeur.
         """
-        model_config = get_model_config(agent.llm_model)
-        provider = model_config["provider"]
+        llm, cache_key = LLMService._get_cached_llm(
+            agent.llm_model, agent.temperature, agent.max_tokens
+        )
+        with _llm_cache_lock:
+            _agent_cache_keys.setdefault(agent.pk, set()).add(cache_key)
+        return llm
 
-        # Configuration commune
-        common_config = {
-            "temperature": agent.temperature,
-            "max_tokens": agent.max_tokens,
-        }
+    @staticmethod
+    def get_chat_model(model_key: str, temperature: float, max_tokens: int):
+        """
+        Retourne un client LLM pour une configuration donnée, indépendamment
+        d'un agent (ex: tâches de fond utilisant un modèle dédié).
+        """
+        llm, _ = LLMService._get_cached_llm(model_key, temperature, max_tokens)
+        return llm
 
-        # Configuration selon le provider
-        # TODO: a rétablir lorsqu'on aura plusieurs provider
-        if 42:  # provider == "openai":
-            llm_config = {
-                **common_config,
-                "model": model_config["model_name"],
-                "api_key": settings.OPENAI_API_KEY,
-            }
-            return ChatOpenAI(**llm_config)
-
-        # elif provider == "azure":
-        #     llm_config = {
-        #         **common_config,
-        #         "model": model_config["model_name"],
-        #         "azure_deployment": model_config.get("deployment_name"),
-        #         "api_key": settings.AZURE_OPENAI_API_KEY,
-        #         "azure_endpoint": settings.AZURE_OPENAI_ENDPOINT,
-        #         "api_version": settings.AZURE_OPENAI_API_VERSION,
-        #     }
-        #     if settings.OPENAI_API_BASE:
-        #         llm_config["base_url"] = settings.OPENAI_API_BASE
-        #     return AzureChatOpenAI(**llm_config)
+    @staticmethod
+    def _get_cached_llm(
+        model_key: str,
+        temperature: float,
+        max_tokens: int,
+        endpoint: Optional[Dict] = None,
+    ):
+        """
+        Cache LRU des clients LLM à l'échelle du processus.
 
-        else:
-            raise ValueError(f"Provider '{provider}' non supporté")
+        Clé : (endpoint, temperature, max_tokens). Les clients partagent le
+        pool de connexions HTTP keep-alive : pas de nouveau handshake TLS à
+        chaque appel. Sans `endpoint`, le routeur choisit celui du modèle.
+        """
+        if endpoint is None:
+            endpoint = LLMRouter.pick(model_key)
+        cache_key = (endpoint["key"], temperature, max_tokens)
+
+        with _llm_cache_lock:
+            llm = _llm_cache.get(cache_key)
+            if llm is not None:
+                _llm_cache.move_to_end(cache_key)
+                return llm, cache_key
+
+        llm = LLMService._build_llm(endpoint, temperature, max_tokens)
+
+        with _llm_cache_lock:
+            # Un autre thread a pu construire le même client entre-temps
+            llm = _llm_cache.setdefault(cache_key, llm)
+            _llm_cache.move_to_end(cache_key)
+            while len(_llm_cache) > settings.LLM_CLIENT_CACHE_SIZE:
+                _llm_cache.popitem(last=False)
+
+        return llm, cache_key
+
+    @staticmethod
+    def invalidate_agent(agent_id: int):
+        """
+        Retire du cache les clients utilisés par un agent (appelé à la
+        sauvegarde ou suppression de l'agent).
+        """
+        with _llm_cache_lock:
+            for cache_key in _agent_cache_keys.pop(agent_id, ()):
+                _llm_cache.pop(cache_key, None)
+
+    @staticmethod
+    def clear_llm_cache():
+        """Vide le cache des clients LLM."""
+        with _llm_cache_lock:
+            _llm_cache.clear()
+            _agent_cache_keys.clear()
+
+    @staticmethod
+    def _build_llm(endpoint: dict, temperature: float, max_tokens: int):
+        """
+        Construit un nouveau client LLM pour un endpoint (voir chat.providers ;
+        utiliser get_chat_model pour le cache).
+        """
+        common_config = {
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "http_client": _get_http_client(),
+            "http_async_client": _get_async_http_client(),
+            # Usage (tokens) renvoyé aussi en streaming, dans le dernier morceau
+            "stream_usage": True,
+            # Les retries sont gérés par chat.resilience (backoff, disjoncteur)
+            "timeout": endpoint.get("timeout", settings.LLM_TIMEOUT),
+            "max_retries": 0,
+        }
+        return build_chat_model(endpoint, common_config)
 
     @staticmethod
     def create_messages(conversation_history: List[Dict], system_prompt: str) -> List:
@@ -69,25 +176,462 @@ class LLMService:
 
         return messages
 
+    @staticmethod
+    def build_messages(agent: Agent, conversation_history: List[Dict]) -> tuple:
+        """
+        Construit les messages LangChain en ajustant l'historique au budget de
+        contexte du modèle de l'agent.
+
+        Returns:
+            tuple: (messages, context) où `context` contient le nombre de tokens
+            conservés ("tokens") et de messages omis ("dropped").
+        """
+        context = build_context(
+            conversation_history, agent.system_prompt, agent.llm_model, agent.max_tokens
+        )
+        messages = LLMService.create_messages(context["history"], agent.system_prompt)
+        return messages, context
+
     @staticmethod
     def generate_response(agent: Agent, conversation_history: List[Dict]) -> str:
         """
         Génère une réponse de l'agent en fonction de l'historique.
         """
-        llm = LLMService.get_llm(agent)
-        messages = LLMService.create_messages(conversation_history, agent.system_prompt)
+        result = LLMService.generate_response_with_metadata(agent, conversation_history)
+        return result["content"]
 
-        response = llm.invoke(messages)
-        return response.content
+    @staticmethod
+    def _call_metadata(
+        agent: Agent,
+        context: Dict,
+        started: float,
+        content: str,
+        cache_hit: bool,
+        usage: Optional[Dict] = None,
+        first_token_at: Optional[float] = None,
+        plan: Optional[CallPlan] = None,
+    ) -> Dict:
+        """
+        Métadonnées d'un appel LLM, stockées sur le Message IA : modèle,
+        cache_hit, latence et TTFT (ms), tokens du prompt, de la réponse et
+        du contexte conservé.
+
+        Les tokens proviennent de `usage_metadata` renvoyé par le provider ; à
+        défaut ils sont estimés (usage_estimated). Un cache hit ne consomme
+        aucun token. Si un modèle de repli a répondu, `model` est ce modèle et
+        `fallback_from` / `fallback_reason` indiquent le modèle de l'agent et
+        la cause du repli ; `retries` compte les nouvelles tentatives.
+        """
+        model_key = plan.model_key if plan else agent.llm_model
+        metadata = {
+            "model": model_key,
+            "cache_hit": cache_hit,
+            "latency_ms": round((time.perf_counter() - started) * 1000),
+            "context_tokens": context["tokens"],
+            "context_dropped": context["dropped"],
+        }
+        if first_token_at is not None:
+            metadata["ttft_ms"] = round((first_token_at - started) * 1000)
+        if plan:
+            metadata.update(plan.metadata())
+
+        if cache_hit:
+            prompt_tokens, completion_tokens = 0, 0
+        elif usage:
+            prompt_tokens = usage["input_tokens"]
+            completion_tokens = usage["output_tokens"]
+        else:
+            model_name = get_model_config(model_key)["model_name"]
+            prompt_tokens = context["tokens"]
+            completion_tokens = count_tokens(content, model_name)
+            metadata["usage_estimated"] = True
+
+        metadata["prompt_tokens"] = prompt_tokens
+        metadata["completion_tokens"] = completion_tokens
+        metadata["total_tokens"] = prompt_tokens + completion_tokens
+        record_llm_usage(metadata)
+        return metadata
 
     @staticmethod
-    def generate_title(agent: Agent, first_messages: List[Dict]) -> str:
+    def _max_tokens(agent: Agent, model_key: str, endpoint: Dict) -> int:
         """
-        Génère un titre court pour une conversation à partir du premier message.
+        max_tokens de l'appel : celui de l'agent, plafonné par l'endpoint pour
+        un modèle de repli.
         """
+        if model_key == agent.llm_model:
+            return agent.max_tokens
+        return min(agent.max_tokens, endpoint["max_tokens_limit"])
 
-        llm = LLMService.get_llm(agent)
+    @staticmethod
+    def _reserved_tokens(
+        agent: Agent, context: Dict, model_key: str, endpoint: Dict
+    ) -> int:
+        """Tokens réservés sur le budget tpm avant l'appel (prompt + max_tokens)."""
+        return context["tokens"] + LLMService._max_tokens(agent, model_key, endpoint)
 
+    @staticmethod
+    def _attempt_usage(context: Dict, model_key: str, chunks: List[str]) -> int:
+        """
+        Tokens consommés par une tentative échouée : aucun si rien n'a été
+        reçu, sinon le prompt et les morceaux déjà reçus (estimés).
+        """
+        if not chunks:
+            return 0
+        model_name = get_model_config(model_key)["model_name"]
+        return context["tokens"] + count_tokens("".join(chunks), model_name)
+
+    @staticmethod
+    def _get_model_llm(agent: Agent, model_key: str):
+        """
+        Client du modèle `model_key` (modèle de l'agent ou modèle de repli) sur
+        l'endpoint choisi par le routeur.
+
+        Returns:
+            tuple: (client, endpoint)
+        """
+        endpoint = LLMRouter.pick(model_key)
+        llm, cache_key = LLMService._get_cached_llm(
+            model_key,
+            agent.temperature,
+            LLMService._max_tokens(agent, model_key, endpoint),
+            endpoint,
+        )
+        if model_key == agent.llm_model:
+            with _llm_cache_lock:
+                _agent_cache_keys.setdefault(agent.pk, set()).add(cache_key)
+        return llm, endpoint
+
+    @staticmethod
+    def generate_response_with_metadata(
+        agent: Agent,
+        conversation_history: List[Dict],
+        rate_limit_wait: Optional[float] = None,
+    ) -> Dict:
+        """
+        Génère une réponse de l'agent et retourne {"content", "metadata"}
+        (voir _call_metadata).
+
+        Si l'agent a activé le cache des réponses, un historique identique
+        renvoie la réponse en cache (metadata["cache_hit"] = True).
+
+        L'appel consomme le budget rpm/tpm du modèle ; `rate_limit_wait` est
+        l'attente maximale d'un budget disponible (0 : RateLimitExceeded
+        immédiat, None : LLM_RATE_LIMIT_WAIT). Les erreurs transitoires sont
+        retentées puis la chaîne de repli du modèle est essayée (voir
+        chat.resilience) ; LLMUnavailableError si aucun modèle ne répond.
+        """
+        started = time.perf_counter()
+        messages, context = LLMService.build_messages(agent, conversation_history)
+
+        if agent.enable_response_cache:
+            cached = LLMResponseCache.get(agent, context["history"])
+            if cached is not None:
+                metadata = LLMService._call_metadata(
+                    agent, context, started, cached, cache_hit=True
+                )
+                return {"content": cached, "metadata": metadata}
+
+        plan = CallPlan(agent.llm_model)
+        for model_key, delay in plan:
+            time.sleep(delay)
+            reserved = 0
+            try:
+                llm, endpoint = LLMService._get_model_llm(agent, model_key)
+                reserved = LLMRateLimiter.acquire(
+                    model_key,
+                    LLMService._reserved_tokens(agent, context, model_key, endpoint),
+                    rate_limit_wait,
+                )
+                with plan.attempt(endpoint["key"]):
+                    response = llm.invoke(messages)
+            except Exception as e:
+                plan.failed(e)
+                # Rien n'a été consommé : la réservation est rendue
+                LLMRateLimiter.settle(model_key, reserved, 0)
+                continue
+            plan.succeeded()
+            break
+
+        metadata = LLMService._call_metadata(
+            agent,
+            context,
+            started,
+            response.content,
+            cache_hit=False,
+            usage=response.usage_metadata,
+            plan=plan,
+        )
+        LLMRateLimiter.settle(plan.model_key, reserved, metadata["total_tokens"])
+
+        if agent.enable_response_cache:
+            LLMResponseCache.set(agent, context["history"], response.content)
+        return {"content": response.content, "metadata": metadata}
+
+    @staticmethod
+    def stream_response(
+        agent: Agent,
+        conversation_history: List[Dict],
+        metadata: Optional[Dict] = None,
+        rate_limit_wait: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Version synchrone de astream_response (tâches Celery).
+        """
+        if metadata is None:
+            metadata = {}
+        started = time.perf_counter()
+        messages, context = LLMService.build_messages(agent, conversation_history)
+
+        if agent.enable_response_cache:
+            cached = LLMResponseCache.get(agent, context["history"])
+            if cached is not None:
+                metadata.update(
+                    LLMService._call_metadata(
+                        agent, context, started, cached, cache_hit=True
+                    )
+                )
+                yield cached
+                return
+
+        plan = CallPlan(agent.llm_model)
+        chunks = []
+        usage = None
+        first_token_at = None
+
+        for model_key, delay in plan:
+            time.sleep(delay)
+            reserved = 0
+            try:
+                llm, endpoint = LLMService._get_model_llm(agent, model_key)
+                reserved = LLMRateLimiter.acquire(
+                    model_key,
+                    LLMService._reserved_tokens(agent, context, model_key, endpoint),
+                    rate_limit_wait,
+                )
+                with plan.attempt(endpoint["key"]):
+                    if not get_model_config(model_key).get("supports_streaming", False):
+                        response = llm.invoke(messages)
+                        first_token_at = time.perf_counter()
+                        plan.succeeded()
+                        usage = response.usage_metadata
+                        chunks.append(response.content)
+                        yield response.content
+                    else:
+                        for chunk in llm.stream(messages):
+                            # L'usage est envoyé dans le dernier morceau (stream_usage)
+                            if chunk.usage_metadata:
+                                usage = chunk.usage_metadata
+                            if chunk.content:
+                                if first_token_at is None:
+                                    first_token_at = time.perf_counter()
+                                    plan.succeeded()
+                                chunks.append(chunk.content)
+                                yield chunk.content
+            except Exception as e:
+                plan.failed(e)
+                used = LLMService._attempt_usage(context, model_key, chunks)
+                LLMRateLimiter.settle(model_key, reserved, used)
+                # Une réponse déjà partiellement envoyée ne peut pas être rejouée
+                if chunks:
+                    raise
+                continue
+            if first_token_at is None:
+                plan.succeeded()
+            break
+
+        content = "".join(chunks)
+        metadata.update(
+            LLMService._call_metadata(
+                agent,
+                context,
+                started,
+                content,
+                cache_hit=False,
+                usage=usage,
+                first_token_at=first_token_at,
+                plan=plan,
+            )
+        )
+        LLMRateLimiter.settle(plan.model_key, reserved, metadata["total_tokens"])
+
+        if agent.enable_response_cache:
+            LLMResponseCache.set(agent, context["history"], content)
+
+    @staticmethod
+    async def agenerate_response(
+        agent: Agent, conversation_history: List[Dict]
+    ) -> str:
+        """
+        Version asynchrone de generate_response (utilise `ainvoke`).
+        """
+        result = await LLMService.agenerate_response_with_metadata(
+            agent, conversation_history
+        )
+        return result["content"]
+
+    @staticmethod
+    async def agenerate_response_with_metadata(
+        agent: Agent,
+        conversation_history: List[Dict],
+        rate_limit_wait: Optional[float] = None,
+    ) -> Dict:
+        """
+        Version asynchrone de generate_response_with_metadata.
+        """
+        started = time.perf_counter()
+        messages, context = LLMService.build_messages(agent, conversation_history)
+
+        if agent.enable_response_cache:
+            cached = await sync_to_async(LLMResponseCache.get, thread_sensitive=False)(
+                agent, context["history"]
+            )
+            if cached is not None:
+                metadata = LLMService._call_metadata(
+                    agent, context, started, cached, cache_hit=True
+                )
+                return {"content": cached, "metadata": metadata}
+
+        plan = CallPlan(agent.llm_model)
+        for model_key, delay in plan:
+            await asyncio.sleep(delay)
+            reserved = 0
+            try:
+                llm, endpoint = LLMService._get_model_llm(agent, model_key)
+                reserved = await LLMRateLimiter.aacquire(
+                    model_key,
+                    LLMService._reserved_tokens(agent, context, model_key, endpoint),
+                    rate_limit_wait,
+                )
+                with plan.attempt(endpoint["key"]):
+                    response = await llm.ainvoke(messages)
+            except Exception as e:
+                plan.failed(e)
+                # Rien n'a été consommé : la réservation est rendue
+                await LLMRateLimiter.asettle(model_key, reserved, 0)
+                continue
+            plan.succeeded()
+            break
+
+        metadata = LLMService._call_metadata(
+            agent,
+            context,
+            started,
+            response.content,
+            cache_hit=False,
+            usage=response.usage_metadata,
+            plan=plan,
+        )
+        await LLMRateLimiter.asettle(plan.model_key, reserved, metadata["total_tokens"])
+
+        if agent.enable_response_cache:
+            await sync_to_async(LLMResponseCache.set, thread_sensitive=False)(
+                agent, context["history"], response.content
+            )
+        return {"content": response.content, "metadata": metadata}
+
+    @staticmethod
+    async def astream_response(
+        agent: Agent,
+        conversation_history: List[Dict],
+        metadata: Optional[Dict] = None,
+        rate_limit_wait: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Génère la réponse de l'agent token par token (générateur asynchrone).
+        Si le modèle ne supporte pas le streaming, la réponse complète est
+        renvoyée en un seul morceau.
+
+        Si `metadata` est fourni, il est complété en fin de flux avec les
+        métadonnées de l'appel (voir _call_metadata, avec ttft_ms).
+        `rate_limit_wait` : voir generate_response_with_metadata. Retries et
+        repli ne sont possibles qu'avant l'envoi du premier morceau.
+        """
+        if metadata is None:
+            metadata = {}
+        started = time.perf_counter()
+        messages, context = LLMService.build_messages(agent, conversation_history)
+
+        if agent.enable_response_cache:
+            cached = await sync_to_async(LLMResponseCache.get, thread_sensitive=False)(
+                agent, context["history"]
+            )
+            if cached is not None:
+                metadata.update(
+                    LLMService._call_metadata(
+                        agent, context, started, cached, cache_hit=True
+                    )
+                )
+                yield cached
+                return
+
+        plan = CallPlan(agent.llm_model)
+        chunks = []
+        usage = None
+        first_token_at = None
+
+        for model_key, delay in plan:
+            await asyncio.sleep(delay)
+            reserved = 0
+            try:
+                llm, endpoint = LLMService._get_model_llm(agent, model_key)
+                reserved = await LLMRateLimiter.aacquire(
+                    model_key,
+                    LLMService._reserved_tokens(agent, context, model_key, endpoint),
+                    rate_limit_wait,
+                )
+                with plan.attempt(endpoint["key"]):
+                    if not get_model_config(model_key).get("supports_streaming", False):
+                        response = await llm.ainvoke(messages)
+                        first_token_at = time.perf_counter()
+                        plan.succeeded()
+                        usage = response.usage_metadata
+                        chunks.append(response.content)
+                        yield response.content
+                    else:
+                        async for chunk in llm.astream(messages):
+                            # L'usage est envoyé dans le dernier morceau (stream_usage)
+                            if chunk.usage_metadata:
+                                usage = chunk.usage_metadata
+                            if chunk.content:
+                                if first_token_at is None:
+                                    first_token_at = time.perf_counter()
+                                    plan.succeeded()
+                                chunks.append(chunk.content)
+                                yield chunk.content
+            except Exception as e:
+                plan.failed(e)
+                used = LLMService._attempt_usage(context, model_key, chunks)
+                await LLMRateLimiter.asettle(model_key, reserved, used)
+                # Une réponse déjà partiellement envoyée ne peut pas être rejouée
+                if chunks:
+                    raise
+                continue
+            if first_token_at is None:
+                plan.succeeded()
+            break
+
+        content = "".join(chunks)
+        metadata.update(
+            LLMService._call_metadata(
+                agent,
+                context,
+                started,
+                content,
+                cache_hit=False,
+                usage=usage,
+                first_token_at=first_token_at,
+                plan=plan,
+            )
+        )
+        await LLMRateLimiter.asettle(plan.model_key, reserved, metadata["total_tokens"])
+
+        if agent.enable_response_cache:
+            await sync_to_async(LLMResponseCache.set, thread_sensitive=False)(
+                agent, context["history"], content
+            )
+
+    @staticmethod
+    def _format_title_context(first_messages: List[Dict]) -> str:
         context_lines = []
         for msg in first_messages:
             # Les messages sont des dict avec 'role' et 'content'
@@ -102,17 +646,92 @@ class LLMService:
 
             context_lines.append(f"{role_label}: {content_preview}")
 
-        context = "\n".join(context_lines)
+        return "\n".join(context_lines)
 
-        prompt = f"""Génère un titre court (maximum 6 mots) pour cette conversation.
-Le titre doit être concis et descriptif.
+    @staticmethod
+    def generate_titles(
+        conversations: Dict[int, List[Dict]], rate_limit_wait: Optional[float] = None
+    ) -> Dict[int, str]:
+        """
+        Génère en un seul appel les titres d'un lot de conversations, avec le
+        modèle dédié CHAT_TITLE_MODEL.
 
-Message: {context}
+        Args:
+            conversations: {conversation_id: premiers messages}
+            rate_limit_wait: attente maximale du budget du modèle (voir
+                generate_response_with_metadata)
 
-Titre:"""
+        Returns:
+            dict: {conversation_id: titre} pour les conversations titrées
 
+        Raises:
+            LLMUnavailableError, RateLimitExceeded: comme
+                generate_response_with_metadata, si aucun modèle de la chaîne
+                de repli ne répond
+        """
+        max_tokens = 30 * len(conversations) + 50
+        sections = "\n\n".join(
+            f"### Conversation {conversation_id}\n"
+            f"{LLMService._format_title_context(messages)}"
+            for conversation_id, messages in conversations.items()
+        )
+        prompt = f"""Génère un titre court (maximum 6 mots) pour chacune des conversations suivantes.
+Chaque titre doit être concis et descriptif.
+Réponds uniquement avec un objet JSON associant l'identifiant de chaque conversation à son titre, par exemple {{"12": "Titre"}}.
+
+{sections}"""
         messages = [HumanMessage(content=prompt)]
-        response = llm.invoke(messages)
 
-        title = response.content.strip().strip('"').strip("'")
-        return title[:100]  # Limite à 100 caractères
+        # Même déroulé que les réponses des agents : retries, disjoncteur,
+        # repli et routage entre endpoints (voir chat.resilience)
+        plan = CallPlan(settings.CHAT_TITLE_MODEL)
+        for model_key, delay in plan:
+            time.sleep(delay)
+            reserved = 0
+            try:
+                endpoint = LLMRouter.pick(model_key)
+                call_max_tokens = min(max_tokens, endpoint["max_tokens_limit"])
+                llm, _ = LLMService._get_cached_llm(
+                    model_key, 0, call_max_tokens, endpoint
+                )
+                prompt_tokens = count_tokens(prompt, endpoint["model_name"])
+                reserved = LLMRateLimiter.acquire(
+                    model_key, prompt_tokens + call_max_tokens, rate_limit_wait
+                )
+                with plan.attempt(endpoint["key"]):
+                    response = llm.invoke(messages)
+            except Exception as e:
+                plan.failed(e)
+                LLMRateLimiter.settle(model_key, reserved, 0)
+                continue
+            plan.succeeded()
+            break
+
+        usage = response.usage_metadata
+        if usage:
+            used = usage["input_tokens"] + usage["output_tokens"]
+        else:
+            completion_tokens = count_tokens(response.content, endpoint["model_name"])
+            used = prompt_tokens + completion_tokens
+        LLMRateLimiter.settle(plan.model_key, reserved, used)
+
+        # Tolère un bloc de code Markdown autour du JSON
+        content = response.content.strip()
+        content = content[content.find("{") : content.rfind("}") + 1]
+        try:
+            raw_titles = json.loads(content)
+        except ValueError:
+            logger.warning(f"Unparseable batch title response: {response.content[:200]}")
+            return {}
+
+        titles = {}
+        for key, title in raw_titles.items():
+            try:
+                conversation_id = int(key)
+            except (TypeError, ValueError):
+                continue
+            if conversation_id in conversations and isinstance(title, str):
+                title = title.strip().strip('"').strip("'")
+                if title:
+                    titles[conversation_id] = title[:100]
+        return titles
@@ -0,0 +1,41 @@
+"""
+Commande pour recalculer les champs dénormalisés des conversations
+(message_count, last_message_at, aperçu et rôle du dernier message).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from chat.models import Conversation
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule message_count et le dernier message de chaque conversation "
+        "à partir de la table des messages (par lots)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Nombre de conversations mises à jour par transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(
+            Conversation.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start : start + batch_size]
+            # Un lot = une transaction courte : pas de verrou sur toute la table
+            with transaction.atomic():
+                updated += Conversation.objects.filter(
+                    id__range=(batch[0], batch[-1])
+                ).refresh_message_stats()
+            self.stdout.write(f"{updated}/{len(ids)} conversations mises à jour")
+
+        self.stdout.write(self.style.SUCCESS("Backfill terminé !"))
@@ -0,0 +1,69 @@
+"""
+Commande pour mesurer le surcoût par appel de la construction des clients LLM.
+"""
+
+import time
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+from django.conf import settings
+from chat.llm_service import LLMService
+from chatagentb.llm_config import get_model_config, validate_model_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la construction d'un client LLM à chaque appel avec le cache "
+        "de clients partagé (option --live pour mesurer de vrais appels)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default="gpt-4o-mini", help="Clé du modèle")
+        parser.add_argument(
+            "--iterations", type=int, default=200, help="Nombre d'itérations"
+        )
+        parser.add_argument(
+            "--live",
+            action="store_true",
+            help="Effectue de vrais appels au provider (consomme des tokens)",
+        )
+
+    def handle(self, *args, **options):
+        model_key = options["model"]
+        iterations = options["iterations"]
+
+        if not validate_model_key(model_key):
+            raise CommandError(f"Modèle LLM '{model_key}' inconnu")
+
+        model_config = get_model_config(model_key)
+
+        def uncached():
+            # Comportement historique : nouveau client HTTP à chaque appel
+            return ChatOpenAI(
+                model=model_config["model_name"],
+                temperature=0,
+                max_tokens=16,
+                api_key=settings.OPENAI_API_KEY or "sk-benchmark",
+                http_client=httpx.Client(),
+            )
+
+        def cached():
+            return LLMService.get_chat_model(model_key, 0, 16)
+
+        LLMService.clear_llm_cache()
+
+        for label, factory in (("Sans cache", uncached), ("Avec cache", cached)):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                llm = factory()
+                if options["live"]:
+                    llm.invoke([HumanMessage(content="Réponds 'ok'.")])
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{label}: {elapsed / iterations * 1000:.3f} ms/appel "
+                f"({iterations} itérations)"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminé !"))
@@ -0,0 +1,238 @@
+"""
+Commande de benchmark des endpoints de lecture (chemins chauds de l'ORM).
+
+Chaque endpoint est appelé via le client de test Django (middlewares, vues
+DRF, serializers) en tant que `bench_0` sur les données de
+generate_benchmark_data. La commande mesure les latences p50/p95/max et le
+nombre de requêtes SQL, vérifie les budgets de QUERY_BUDGETS et compare les
+résultats à une exécution de référence (--baseline). Elle échoue en cas de
+dépassement : à lancer avant un déploiement.
+"""
+
+import json
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from chat.folder_tree import FolderTreeCache
+from chat.models import Conversation, Message
+from .generate_benchmark_data import BENCH_USER_PREFIX
+
+# Requêtes SQL maximales par endpoint (session et utilisateur compris). Un
+# dépassement signale un N+1 introduit dans une vue ou un serializer.
+QUERY_BUDGETS = {
+    "conversation-list": 4,
+    "conversation-list-deep": 4,
+    "conversation-retrieve": 5,
+    "folder-list": 2,
+    "folder-list-cold": 4,
+    "message-list": 3,
+    "message-list-deep": 3,
+    "agent-list": 3,
+    "message-search": 4,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure latence et requêtes SQL des endpoints de liste et de détail "
+        "(conversations, dossiers, messages, agents, recherche) et vérifie "
+        "leurs budgets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=20, help="Appels mesurés par endpoint"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=2, help="Appels de chauffe par endpoint"
+        )
+        parser.add_argument(
+            "--user",
+            default=f"{BENCH_USER_PREFIX}0",
+            help="Utilisateur mesuré (défaut : bench_0)",
+        )
+        parser.add_argument(
+            "--only", nargs="+", choices=sorted(QUERY_BUDGETS), help="Endpoints à mesurer"
+        )
+        parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+        parser.add_argument(
+            "--baseline", help="Résultats de référence (JSON produit par --output)"
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Hausse de latence p50 tolérée par rapport à la référence (0.5 = +50%%)",
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(
+                f"Utilisateur {options['user']} introuvable "
+                "(lancer generate_benchmark_data)"
+            )
+
+        setup_test_environment()
+        self.client = Client()
+        self.client.force_login(user)
+        self.user = user
+
+        cases = self._cases()
+        if options["only"]:
+            cases = [case for case in cases if case[0] in options["only"]]
+
+        results = {}
+        for name, url, setup in cases:
+            results[name] = self._measure(name, url, setup, options)
+            self._print_result(name, results[name])
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "user": user.username,
+            "dataset": {
+                "conversations": Conversation.objects.filter(user=user).count(),
+                "messages": Message.objects.filter(conversation__user=user).count(),
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Résultats enregistrés dans {options['output']}")
+
+        failures = [
+            f"{name} : {result['queries']} requêtes (budget {result['budget']})"
+            for name, result in results.items()
+            if result["queries"] > result["budget"]
+        ]
+        if options["baseline"]:
+            failures += self._compare(results, options["baseline"], options["tolerance"])
+
+        if failures:
+            raise CommandError("Régressions détectées :\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Budgets respectés !"))
+
+    def _cases(self):
+        """(nom, url, préparation avant chaque appel) des endpoints mesurés."""
+        # Conversation la plus longue (Auto-Chat) : pire cas du détail
+        conversation = (
+            Conversation.objects.filter(user=self.user).order_by("-message_count").first()
+        )
+        if conversation is None:
+            raise CommandError(f"{self.user.username} n'a aucune conversation")
+
+        def invalidate_folder_tree():
+            FolderTreeCache.invalidate(self.user.id)
+
+        return [
+            ("conversation-list", reverse("conversation-list"), None),
+            (
+                "conversation-list-deep",
+                self._last_page_url(reverse("conversation-list")),
+                None,
+            ),
+            (
+                "conversation-retrieve",
+                reverse("conversation-detail", kwargs={"pk": conversation.pk}),
+                None,
+            ),
+            ("folder-list-cold", reverse("folder-list"), invalidate_folder_tree),
+            ("folder-list", reverse("folder-list"), None),
+            ("message-list", reverse("message-list"), None),
+            (
+                "message-list-deep",
+                self._last_page_url(f"{reverse('message-list')}?page_size=200", 50),
+                None,
+            ),
+            ("agent-list", reverse("agent-list"), None),
+            (
+                "message-search",
+                f"{reverse('message-search')}?q=contrat+offre",
+                None,
+            ),
+        ]
+
+    def _last_page_url(self, url, max_pages=None):
+        """
+        URL de la dernière page (ou de la page max_pages), en suivant les
+        curseurs : une page profonde doit coûter autant que la première.
+        """
+        pages = 1
+        while max_pages is None or pages < max_pages:
+            next_url = self.client.get(url).json()["next"]
+            if not next_url:
+                break
+            url = next_url
+            pages += 1
+        return url
+
+    def _measure(self, name, url, setup, options):
+        for _ in range(options["warmup"]):
+            if setup:
+                setup()
+            self.client.get(url)
+
+        timings = []
+        queries = 0
+        for _ in range(options["iterations"]):
+            if setup:
+                setup()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = self.client.get(url)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{name} : statut HTTP {response.status_code}")
+            queries = max(queries, len(context.captured_queries))
+
+        timings.sort()
+        return {
+            "url": url,
+            "p50_ms": round(statistics.median(timings) * 1000, 2),
+            "p95_ms": round(timings[int(0.95 * (len(timings) - 1))] * 1000, 2),
+            "max_ms": round(timings[-1] * 1000, 2),
+            "queries": queries,
+            "budget": QUERY_BUDGETS[name],
+        }
+
+    def _print_result(self, name, result):
+        line = (
+            f"{name:<24} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+            f"{result['queries']:>3} requêtes (budget {result['budget']})"
+        )
+        if result["queries"] > result["budget"]:
+            self.stdout.write(self.style.ERROR(line))
+        else:
+            self.stdout.write(line)
+
+    def _compare(self, results, baseline_path, tolerance):
+        """Régressions par rapport à la référence : requêtes et latence p50."""
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Référence illisible ({baseline_path}) : {str(e)}")
+
+        failures = []
+        for name, result in results.items():
+            reference = baseline.get(name)
+            if reference is None:
+                continue
+            if result["queries"] > reference["queries"]:
+                failures.append(
+                    f"{name} : {result['queries']} requêtes "
+                    f"(référence {reference['queries']})"
+                )
+            if result["p50_ms"] > reference["p50_ms"] * (1 + tolerance):
+                failures.append(
+                    f"{name} : p50 {result['p50_ms']} ms "
+                    f"(référence {reference['p50_ms']} ms, tolérance +{tolerance:.0%})"
+                )
+        return failures
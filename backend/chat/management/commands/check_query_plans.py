@@ -0,0 +1,261 @@
+"""
+Commande vérifiant les plans d'exécution (EXPLAIN) des requêtes principales.
+
+Chaque forme de requête des vues (listes paginées par curseur, page de
+messages, dossiers, agents, recherche, statistiques) est expliquée par
+Postgres. Par
+défaut les parcours séquentiels sont pénalisés (`enable_seqscan = off`), ainsi
+que les tris des requêtes dont l'ordre doit venir d'un index (`enable_sort =
+off`) : s'il en reste un dans le plan, aucun index ne peut servir la requête
+(ou son ordre), quelle que soit la taille des tables. Avec
+--natural, les plans réels du planificateur sont vérifiés et seuls les
+parcours et tris portant sur de gros volumes échouent. À lancer en CI après
+les migrations.
+"""
+
+import json
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from agents.models import Agent
+from chat.models import Conversation, Folder, Message
+from chat.pagination import CONVERSATION_ORDERING
+from chat.search import parse_query
+from .generate_benchmark_data import BENCH_USER_PREFIX
+
+
+def _plan_nodes(plan):
+    """Nœuds du plan JSON, en profondeur."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _describe(node):
+    parts = [node["Node Type"]]
+    if node.get("Index Name"):
+        parts.append(node["Index Name"])
+    elif node.get("Relation Name"):
+        parts.append(node["Relation Name"])
+    return " ".join(parts)
+
+
+class Command(BaseCommand):
+    help = (
+        "Explique les requêtes principales et échoue si l'une d'elles repasse "
+        "en parcours séquentiel ou perd l'ordre fourni par un index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            default=f"{BENCH_USER_PREFIX}0",
+            help="Utilisateur dont les données servent aux requêtes (défaut : bench_0)",
+        )
+        parser.add_argument(
+            "--natural",
+            action="store_true",
+            help="Plans du planificateur sans pénaliser les parcours séquentiels : "
+            "seuls ceux sur des tables d'au moins --min-rows lignes échouent",
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Taille à partir de laquelle une table est volumineuse (--natural)",
+        )
+        parser.add_argument("--only", nargs="+", help="Requêtes à vérifier")
+        parser.add_argument(
+            "--show-plans", action="store_true", help="Affiche les plans complets"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Vérification réservée à PostgreSQL")
+
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(
+                f"Utilisateur {options['user']} introuvable "
+                "(lancer generate_benchmark_data)"
+            )
+
+        cases = self._cases(user)
+        if options["only"]:
+            unknown = set(options["only"]) - {case[0] for case in cases}
+            if unknown:
+                raise CommandError(f"Requêtes inconnues : {', '.join(sorted(unknown))}")
+            cases = [case for case in cases if case[0] in options["only"]]
+
+        table_rows = self._table_rows() if options["natural"] else {}
+        failures = []
+        for name, queryset, index_ordered in cases:
+            plan = self._explain(queryset, index_ordered, options["natural"])
+            problems = self._problems(
+                plan, index_ordered, table_rows, options["min_rows"]
+            )
+            nodes = [
+                _describe(node)
+                for node in _plan_nodes(plan)
+                if "Scan" in node["Node Type"]
+            ]
+            line = f"{name:<24} {', '.join(nodes)} (coût {plan['Total Cost']:.0f})"
+            if problems:
+                self.stdout.write(self.style.ERROR(line))
+                failures += [f"{name} : {problem}" for problem in problems]
+            else:
+                self.stdout.write(line)
+            if options["show_plans"]:
+                self.stdout.write(json.dumps(plan, indent=2))
+
+        if failures:
+            raise CommandError("Plans en régression :\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Plans conformes !"))
+
+    def _cases(self, user):
+        """
+        (nom, queryset, ordre fourni par un index) des formes de requête
+        des vues et services.
+        """
+        conversation = (
+            Conversation.objects.filter(user=user).order_by("-message_count").first()
+        )
+        if conversation is None:
+            raise CommandError(f"{user.username} n'a aucune conversation")
+        last_message = (
+            Message.objects.filter(conversation=conversation)
+            .order_by("-created_at", "-id")
+            .values("created_at", "id")
+            .first()
+        ) or {"created_at": timezone.now(), "id": 0}
+        category = (
+            Agent.objects.exclude(categories=[])
+            .values_list("categories", flat=True)
+            .first()
+            or ["général"]
+        )[0]
+        messages = Message.objects.filter(conversation=conversation)
+        conversations = Conversation.objects.filter(user=user).select_related("folder")
+        folder = Folder.objects.filter(user=user, parent=None).first()
+
+        return [
+            (
+                "conversation-list",
+                conversations.order_by(*CONVERSATION_ORDERING)[:51],
+                True,
+            ),
+            (
+                "conversation-list-cursor",
+                conversations.filter(updated_at__lt=conversation.updated_at).order_by(
+                    *CONVERSATION_ORDERING
+                )[:51],
+                True,
+            ),
+            (
+                "message-list-cursor",
+                Message.objects.filter(
+                    conversation__user=user,
+                    conversation=conversation,
+                    created_at__gt=last_message["created_at"] - timedelta(days=1),
+                )
+                .select_related("conversation", "agent")
+                .order_by("created_at", "id")[:51],
+                True,
+            ),
+            (
+                "message-page",
+                messages.order_by("-created_at", "-id")[:51],
+                True,
+            ),
+            (
+                "message-page-before",
+                messages.filter(
+                    Q(created_at__lt=last_message["created_at"])
+                    | Q(created_at=last_message["created_at"], id__lt=last_message["id"])
+                ).order_by("-created_at", "-id")[:51],
+                True,
+            ),
+            (
+                "folder-roots",
+                Folder.objects.filter(user=user, parent=None).order_by("order", "name"),
+                True,
+            ),
+            (
+                "folder-children",
+                Folder.objects.filter(user=user, parent=folder).order_by("order", "name"),
+                True,
+            ),
+            (
+                "folder-tree-counts",
+                Conversation.objects.filter(user=user, folder__isnull=False)
+                .order_by()
+                .values("folder")
+                .annotate(count=Count("id")),
+                False,
+            ),
+            ("agent-active", Agent.objects.filter(is_active=True)[:20], True),
+            (
+                "agent-category",
+                Agent.objects.filter(categories__contains=[category]),
+                False,
+            ),
+            (
+                "message-search",
+                Message.objects.filter(
+                    conversation__user=user, search_vector=parse_query("contrat")
+                ).order_by(),
+                False,
+            ),
+            (
+                "llm-stats",
+                Message.objects.filter(
+                    role="ai",
+                    created_at__gte=timezone.now() - timedelta(hours=24),
+                    metadata__has_key="latency_ms",
+                )
+                .order_by()
+                .values("agent_id")
+                .annotate(count=Count("id")),
+                False,
+            ),
+        ]
+
+    def _explain(self, queryset, index_ordered, natural):
+        sql, params = queryset.query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not natural:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                if index_ordered:
+                    cursor.execute("SET LOCAL enable_sort = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            result = cursor.fetchone()[0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]["Plan"]
+
+    def _table_rows(self):
+        """Nombre de lignes estimé de chaque table (statistiques Postgres)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+            )
+            return dict(cursor.fetchall())
+
+    def _problems(self, plan, index_ordered, table_rows, min_rows):
+        """
+        Parcours séquentiels et tris du plan. Avec --natural (table_rows
+        renseigné), seuls ceux qui portent sur au moins min_rows lignes comptent.
+        """
+        problems = []
+        for node in _plan_nodes(plan):
+            if node["Node Type"] == "Seq Scan":
+                relation = node["Relation Name"]
+                if not table_rows or table_rows.get(relation, 0) >= min_rows:
+                    problems.append(f"parcours séquentiel de {relation}")
+            if index_ordered and node["Node Type"] == "Sort":
+                if not table_rows or node["Plan Rows"] >= min_rows:
+                    problems.append(f"tri explicite ({', '.join(node['Sort Key'])})")
+        return problems
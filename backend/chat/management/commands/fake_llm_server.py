@@ -0,0 +1,168 @@
+"""
+Commande lançant un serveur LLM factice compatible avec l'API OpenAI.
+
+Sert de stand-in local pour un endpoint `openai_compatible` (ou pour tout le
+provider openai via OPENAI_API_BASE) : latence, débit de tokens et taux
+d'erreur sont réglables, sans appel ni coût chez un provider.
+"""
+
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+
+LOREM = (
+    "Bien sûr, voici une réponse générée par le serveur factice pour les tests "
+    "de charge et de routage, sans appel à un vrai modèle de langage."
+).split()
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Implémente POST /v1/chat/completions (réponse complète ou streamée)."""
+
+    protocol_version = "HTTP/1.1"
+    options = {}
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        time.sleep(self.options["latency"] * random.uniform(0.8, 1.2))
+        if random.random() < self.options["error_rate"]:
+            self._send_json(
+                self.options["error_status"],
+                {"error": {"message": "Fake upstream error", "type": "server_error"}},
+            )
+            return
+
+        words = [
+            LOREM[i % len(LOREM)]
+            for i in range(min(self.options["words"], payload.get("max_tokens") or 10**6))
+        ]
+        prompt_tokens = sum(
+            len(str(message.get("content", "")).split())
+            for message in payload.get("messages", [])
+        )
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+        }
+
+        if payload.get("stream"):
+            self._stream(base, words, usage, payload.get("stream_options") or {})
+        else:
+            self._send_json(
+                200,
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": " ".join(words)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+
+    def _stream(self, base, words, usage, stream_options):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(data):
+            self.wfile.write(f"data: {data}\n\n".encode())
+            self.wfile.flush()
+
+        for i, word in enumerate(words):
+            content = word if i == 0 else f" {word}"
+            send(json.dumps({
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+            }))
+            time.sleep(self.options["token_delay"])
+        send(json.dumps({
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }))
+        if stream_options.get("include_usage"):
+            send(json.dumps({
+                **base, "object": "chat.completion.chunk", "choices": [], "usage": usage
+            }))
+        send("[DONE]")
+        self.close_connection = True
+
+    def _send_json(self, code, data):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Lance un serveur LLM factice compatible OpenAI "
+        "(endpoint openai_compatible pour les tests et benchmarks)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8999)
+        parser.add_argument(
+            "--latency", type=float, default=0.2, help="Délai avant réponse (s)"
+        )
+        parser.add_argument(
+            "--token-delay",
+            type=float,
+            default=0.01,
+            help="Délai entre deux tokens streamés (s)",
+        )
+        parser.add_argument(
+            "--words", type=int, default=40, help="Longueur de la réponse (mots)"
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Part de réponses en erreur"
+        )
+        parser.add_argument(
+            "--error-status", type=int, default=500, help="Code HTTP des erreurs"
+        )
+
+    def handle(self, *args, **options):
+        FakeLLMHandler.options = options
+        server = ThreadingHTTPServer((options["host"], options["port"]), FakeLLMHandler)
+        server.daemon_threads = True
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Serveur LLM factice sur http://{options['host']}:{options['port']}/v1 "
+                f"(latence {options['latency']}s, erreurs {options['error_rate']:.0%})"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
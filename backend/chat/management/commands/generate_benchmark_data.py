@@ -0,0 +1,342 @@
+"""
+Commande générant un jeu de données volumineux pour les benchmarks ORM.
+
+Les données sont insérées par lots (bulk_create) : utilisateurs `bench_<n>`,
+agents `Bench agent <n>`, conversations et messages répartis entre les
+utilisateurs. L'utilisateur `bench_0`, mesuré par benchmark_orm, possède en
+plus un arbre de dossiers profond et des Auto-Chats longs. Les champs
+dénormalisés des conversations sont calculés à l'insertion.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from agents.models import Agent
+from chat.fake_llm import VOCABULARY
+from chat.folder_tree import FolderTreeCache
+from chat.models import (
+    LAST_MESSAGE_PREVIEW_LENGTH,
+    AutoChatRun,
+    Conversation,
+    Folder,
+    Message,
+)
+
+User = get_user_model()
+
+BENCH_USER_PREFIX = "bench_"
+BENCH_AGENT_PREFIX = "Bench agent "
+BENCH_PASSWORD = "bench"
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    """Désactive auto_now / auto_now_add pour insérer des dates étalées."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des données de benchmark : utilisateurs, agents, dossiers, "
+        "conversations, messages et Auto-Chats (option --clear pour les supprimer)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--agents", type=int, default=50)
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=1_000_000,
+            help="Nombre total de messages (hors Auto-Chats)",
+        )
+        parser.add_argument(
+            "--messages-per-conversation",
+            type=int,
+            default=20,
+            help="Nombre moyen de messages par conversation",
+        )
+        parser.add_argument(
+            "--bench-conversations",
+            type=int,
+            default=2000,
+            help="Conversations de l'utilisateur mesuré (bench_0)",
+        )
+        parser.add_argument(
+            "--folder-depth", type=int, default=6, help="Profondeur de l'arbre de bench_0"
+        )
+        parser.add_argument(
+            "--folder-fanout",
+            type=int,
+            default=3,
+            help="Sous-dossiers par dossier dans l'arbre de bench_0",
+        )
+        parser.add_argument(
+            "--auto-chats", type=int, default=20, help="Auto-Chats de bench_0"
+        )
+        parser.add_argument(
+            "--auto-chat-turns", type=int, default=500, help="Tours par Auto-Chat"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Supprime les données de benchmark existantes et s'arrête",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+
+        self._clear()
+        if options["clear"]:
+            self.stdout.write(self.style.SUCCESS("Données de benchmark supprimées"))
+            return
+
+        users = self._create_users()
+        agents = self._create_agents()
+        bench_user = users[0]
+        folders = self._create_folder_tree(bench_user)
+
+        # Conversations de bench_0 (rangées dans l'arbre) puis des autres
+        # utilisateurs, à messages_per_conversation messages en moyenne
+        total_conversations = max(
+            options["messages"] // options["messages_per_conversation"],
+            options["bench_conversations"],
+        )
+        owners = [bench_user] * options["bench_conversations"] + [
+            users[1 + i % (len(users) - 1)] if len(users) > 1 else bench_user
+            for i in range(total_conversations - options["bench_conversations"])
+        ]
+        self._create_conversations(owners, agents, bench_user, folders)
+        self._create_auto_chats(bench_user, agents)
+
+        cache.delete_many([FolderTreeCache._key(user.id) for user in users])
+        self.stdout.write(self.style.SUCCESS("Données de benchmark générées !"))
+
+    def _clear(self):
+        # Les messages sont supprimés en masse par la cascade (pas de signal)
+        deleted, _ = User.objects.filter(username__startswith=BENCH_USER_PREFIX).delete()
+        Agent.objects.filter(name__startswith=BENCH_AGENT_PREFIX).delete()
+        if deleted:
+            self.stdout.write(f"{deleted} objets de benchmark supprimés")
+
+    def _text(self, min_words=5, max_words=80):
+        length = self.rng.randint(min_words, max_words)
+        return " ".join(self.rng.choice(VOCABULARY) for _ in range(length)).capitalize()
+
+    def _create_users(self):
+        password = make_password(BENCH_PASSWORD)
+        users = [
+            User(
+                username=f"{BENCH_USER_PREFIX}{i}",
+                email=f"{BENCH_USER_PREFIX}{i}@example.com",
+                password=password,
+                is_staff=(i == 0),
+            )
+            for i in range(self.options["users"])
+        ]
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.stdout.write(f"{len(users)} utilisateurs créés")
+        return users
+
+    def _create_agents(self):
+        agents = Agent.objects.bulk_create(
+            [
+                Agent(
+                    name=f"{BENCH_AGENT_PREFIX}{i}",
+                    description=self._text(5, 20),
+                    agent_type="metier" if i % 5 == 0 else "client",
+                    first_prompt=self._text(5, 15) if i % 5 == 0 else None,
+                    llm_model="fake",
+                    system_prompt=self._text(20, 60),
+                    temperature=0,
+                )
+                for i in range(self.options["agents"])
+            ]
+        )
+        self.stdout.write(f"{len(agents)} agents créés")
+        return agents
+
+    def _create_folder_tree(self, user):
+        """Arbre complet (profondeur × largeur) de bench_0, niveau par niveau."""
+        level = [None]
+        folders = []
+        for depth in range(self.options["folder_depth"]):
+            children = [
+                Folder(
+                    user=user,
+                    parent=parent,
+                    name=f"Dossier {depth}.{index}",
+                    order=index,
+                )
+                for parent in level
+                for index in range(self.options["folder_fanout"])
+            ]
+            level = Folder.objects.bulk_create(children, batch_size=self.batch_size)
+            folders.extend(level)
+        self.stdout.write(f"{len(folders)} dossiers créés pour {user.username}")
+        return folders
+
+    def _message_rows(self, conversation, count):
+        """
+        Messages d'une conversation, étalés dans le temps : alternance humain /
+        IA, ou pour un Auto-Chat message initial puis tours des deux agents
+        (comme run_auto_chat).
+        """
+        auto_chat = conversation.conversation_type == "auto"
+        agents = conversation._bench_agents
+        rows = []
+        for i in range(count):
+            if auto_chat:
+                ai, agent = True, (agents[i % 2] if i else None)
+            else:
+                ai = i % 2 == 1
+                agent = agents[0] if ai else None
+            metadata = {}
+            if agent is not None:
+                prompt = self.rng.randint(200, 4000)
+                completion = self.rng.randint(20, 600)
+                metadata = {
+                    "model": "fake",
+                    "cache_hit": False,
+                    "latency_ms": self.rng.randint(300, 8000),
+                    "ttft_ms": self.rng.randint(100, 1500),
+                    "prompt_tokens": prompt,
+                    "completion_tokens": completion,
+                    "total_tokens": prompt + completion,
+                }
+            rows.append(
+                Message(
+                    conversation=conversation,
+                    role="ai" if ai else "human",
+                    content=self._text(),
+                    agent=agent,
+                    is_auto_chat=auto_chat,
+                    metadata=metadata,
+                    created_at=conversation.created_at + timedelta(seconds=30 * i),
+                )
+            )
+        return rows
+
+    def _insert_conversations(self, conversations, message_counts):
+        """Insère des conversations, leurs agents et leurs messages."""
+        messages = []
+        for conversation, count in zip(conversations, message_counts):
+            rows = self._message_rows(conversation, count)
+            if rows:
+                last = rows[-1]
+                conversation.message_count = len(rows)
+                conversation.last_message_at = last.created_at
+                conversation.last_message_preview = last.content[
+                    :LAST_MESSAGE_PREVIEW_LENGTH
+                ]
+                conversation.last_message_role = last.role
+                conversation.updated_at = last.created_at
+            messages.append(rows)
+
+        with transaction.atomic():
+            Conversation.objects.bulk_create(conversations)
+            Conversation.agents.through.objects.bulk_create(
+                [
+                    Conversation.agents.through(
+                        conversation_id=conversation.id, agent_id=agent.id
+                    )
+                    for conversation in conversations
+                    for agent in conversation._bench_agents
+                ]
+            )
+            Message.objects.bulk_create(
+                [row for rows in messages for row in rows], batch_size=self.batch_size
+            )
+        return sum(len(rows) for rows in messages)
+
+    def _create_conversations(self, owners, agents, bench_user, folders):
+        mean = self.options["messages_per_conversation"]
+        timestamps = (
+            Conversation._meta.get_field("created_at"),
+            Conversation._meta.get_field("updated_at"),
+            Message._meta.get_field("created_at"),
+        )
+        created = messages = 0
+        chunk = max(self.batch_size // mean, 1)
+
+        with _explicit_timestamps(*timestamps):
+            for start in range(0, len(owners), chunk):
+                conversations, counts = [], []
+                for owner in owners[start : start + chunk]:
+                    created_at = self.now - timedelta(
+                        minutes=self.rng.randint(60, 365 * 24 * 60)
+                    )
+                    conversation = Conversation(
+                        user=owner,
+                        title=self._text(2, 6),
+                        folder=(
+                            self.rng.choice(folders)
+                            if owner is bench_user and folders and self.rng.random() < 0.5
+                            else None
+                        ),
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+                    conversation._bench_agents = [self.rng.choice(agents)]
+                    conversations.append(conversation)
+                    counts.append(max(int(self.rng.expovariate(1 / mean)), 1))
+                messages += self._insert_conversations(conversations, counts)
+                created += len(conversations)
+                self.stdout.write(
+                    f"{created}/{len(owners)} conversations, {messages} messages"
+                )
+
+    def _create_auto_chats(self, user, agents):
+        turns = self.options["auto_chat_turns"]
+        timestamps = (
+            Conversation._meta.get_field("created_at"),
+            Conversation._meta.get_field("updated_at"),
+            Message._meta.get_field("created_at"),
+        )
+        with _explicit_timestamps(*timestamps):
+            for i in range(self.options["auto_chats"]):
+                agent_a, agent_b = self.rng.sample(agents, 2)
+                created_at = self.now - timedelta(days=self.rng.randint(1, 90))
+                conversation = Conversation(
+                    user=user,
+                    title=f"AUTO: {agent_a.name} ↔ {agent_b.name}",
+                    conversation_type="auto",
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                conversation._bench_agents = [agent_a, agent_b]
+                self._insert_conversations([conversation], [turns + 1])
+                AutoChatRun.objects.create(
+                    task_id=f"bench-{user.id}-{i}",
+                    conversation=conversation,
+                    user=user,
+                    agent_a=agent_a,
+                    agent_b=agent_b,
+                    initial_message=self._text(5, 20),
+                    iterations=turns,
+                    completed_turns=turns,
+                    status="completed",
+                    attempts=1,
+                    finished_at=conversation.last_message_at,
+                )
+        self.stdout.write(
+            f"{self.options['auto_chats']} Auto-Chats de {turns} tours créés"
+        )
@@ -0,0 +1,472 @@
+"""
+Commande de test de charge de bout en bout (API DRF et tâches Celery).
+
+Les requêtes traversent toute la pile Django (middlewares, vues DRF, ORM)
+dans le processus de la commande ; les scénarios background, auto_chat et
+title attendent la fin de leur tâche sur un worker Celery réel. Avec le
+modèle `fake` (défaut), aucun provider n'est appelé : lancer le worker avec
+LLM_FAKE_ENABLED=True et les mêmes réglages LLM_FAKE_* (et
+CHAT_TITLE_MODEL=fake pour le titrage par lots).
+
+Le scénario title suit le chemin de production : la conversation est mise en
+file (TitleQueue) et la commande envoie generate_pending_titles toutes les
+--title-interval secondes, à la place de celery beat ; la latence va jusqu'à
+l'enregistrement du titre.
+
+Les conversations (messages, Auto-Chats) créées pendant le test et l'agent
+de test créé par la commande sont supprimés à la fin, sauf avec --keep-data.
+
+Les arrivées suivent le débit cible en boucle ouverte : la latence est
+mesurée depuis l'instant d'envoi prévu, attente d'un thread libre comprise.
+Les requêtes SQL comptées sont celles du processus de la commande (suivi des
+tâches compris), pas celles du worker.
+"""
+
+import asyncio
+import contextvars
+import json
+import queue
+import random
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Max
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from agents.models import Agent
+from chat.models import AutoChatRun, Conversation, Message
+from chat.tasks import generate_pending_titles
+from chat.title_queue import TitleQueue
+from chatagentb.llm_config import validate_model_key
+
+SCENARIOS = ("send_message", "stream", "background", "auto_chat", "title")
+
+# Compteur de requêtes SQL de la requête en cours. Le contexte est copié dans
+# les threads de sync_to_async : les requêtes du flux SSE sont comptées aussi.
+_query_counter = contextvars.ContextVar("loadtest_query_counter", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _percentile(values, percent):
+    """Percentile par rang le plus proche (valeurs triées)."""
+    if not values:
+        return None
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge des endpoints de chat et des tâches Celery à débit "
+        "cible : débit, latences p50/p95/p99 et requêtes SQL par requête"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario", choices=SCENARIOS, default="send_message", help="Scénario"
+        )
+        parser.add_argument(
+            "--rps", type=float, default=5, help="Débit cible (requêtes/s)"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Durée d'envoi (secondes)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Nombre maximal de requêtes simultanées",
+        )
+        parser.add_argument(
+            "--poisson",
+            action="store_true",
+            help="Arrivées poissoniennes (par défaut : régulières)",
+        )
+        parser.add_argument(
+            "--model",
+            default="fake",
+            help="Modèle de l'agent de test créé (ignoré avec --agent)",
+        )
+        parser.add_argument("--agent", type=int, help="ID d'un agent existant")
+        parser.add_argument(
+            "--user",
+            help="Utilisateur des requêtes (défaut : premier superutilisateur)",
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=2, help="Tours par Auto-Chat"
+        )
+        parser.add_argument(
+            "--task-timeout",
+            type=float,
+            default=120,
+            help="Attente maximale d'une tâche Celery (secondes)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.2,
+            help="Intervalle de suivi des tâches (secondes)",
+        )
+        parser.add_argument(
+            "--title-interval",
+            type=float,
+            default=settings.CHAT_TITLE_BATCH_INTERVAL,
+            help="Intervalle d'envoi de generate_pending_titles du scénario title "
+            "(secondes, 0 : laissé à celery beat)",
+        )
+        parser.add_argument(
+            "--keep-data",
+            action="store_true",
+            help="Conserve les conversations et l'agent de test créés",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Affiche le rapport en JSON"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("Utilisateur introuvable")
+        if options["scenario"] == "auto_chat" and not user.is_staff:
+            raise CommandError("Le scénario auto_chat nécessite un administrateur")
+
+        self.options = options
+        self.user = user
+        # Repères des données créées par le test (supprimées à la fin)
+        self.last_conversation_id = (
+            Conversation.objects.aggregate(last=Max("id"))["last"] or 0
+        )
+        self.last_run_id = AutoChatRun.objects.aggregate(last=Max("id"))["last"] or 0
+        self.agent, self.agent_created = self._get_agent()
+        self.scenario = getattr(self, f"_scenario_{options['scenario']}")
+
+        # Client de test hors suite de tests (hôte `testserver` autorisé)
+        setup_test_environment()
+        connection_created.connect(_install_query_counter)
+        for conn in connections.all(initialized_only=True):
+            _install_query_counter(None, conn)
+
+        self.results = []
+        self.results_lock = threading.Lock()
+        jobs = queue.Queue()
+        workers = [
+            threading.Thread(target=self._worker, args=(jobs,), daemon=True)
+            for _ in range(options["concurrency"])
+        ]
+        for worker in workers:
+            worker.start()
+
+        titles_stop = threading.Event()
+        if options["scenario"] == "title" and options["title_interval"] > 0:
+            threading.Thread(
+                target=self._send_pending_titles, args=(titles_stop,), daemon=True
+            ).start()
+
+        total = int(options["rps"] * options["duration"])
+        self.stderr.write(
+            f"{options['scenario']} : {total} requêtes à {options['rps']} req/s "
+            f"(agent {self.agent.id}, modèle {self.agent.llm_model})"
+        )
+        started = time.perf_counter()
+        scheduled = started
+        for index in range(total):
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((index, scheduled))
+            if options["poisson"]:
+                scheduled += random.expovariate(options["rps"])
+            else:
+                scheduled += 1 / options["rps"]
+        for _ in workers:
+            jobs.put(None)
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        titles_stop.set()
+
+        report = self._report(elapsed)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+        if not options["keep_data"]:
+            self._cleanup()
+
+    def _get_agent(self):
+        if self.options["agent"]:
+            try:
+                agent = Agent.objects.get(id=self.options["agent"], is_active=True)
+            except Agent.DoesNotExist:
+                raise CommandError(f"Agent {self.options['agent']} introuvable")
+            return agent, False
+
+        model_key = self.options["model"]
+        if not validate_model_key(model_key):
+            raise CommandError(f"Modèle LLM '{model_key}' inconnu")
+        return Agent.objects.get_or_create(
+            name=f"Loadtest ({model_key})",
+            defaults={
+                "llm_model": model_key,
+                "system_prompt": "Tu es un agent de test de charge. Réponds brièvement.",
+                "temperature": 0,
+                "max_tokens": 256,
+                "description": "Agent créé par la commande loadtest",
+            },
+        )
+
+    def _cleanup(self):
+        """Supprime les données créées par le test (repères pris au démarrage)."""
+        conversations = Conversation.objects.filter(
+            id__gt=self.last_conversation_id, user=self.user, agents=self.agent
+        )
+        deleted_conversations = conversations.delete()[1].get(
+            Conversation._meta.label, 0
+        )
+        AutoChatRun.objects.filter(
+            id__gt=self.last_run_id, user=self.user, agent_a=self.agent
+        ).delete()
+        if self.agent_created:
+            self.agent.delete()
+        self.stderr.write(
+            f"Données du test supprimées : {deleted_conversations} conversations"
+            + (", agent de test" if self.agent_created else "")
+        )
+
+    def _send_pending_titles(self, stop):
+        """Envoie generate_pending_titles à intervalle fixe (rôle de celery beat)."""
+        while not stop.wait(self.options["title_interval"]):
+            generate_pending_titles.delay()
+
+    def _worker(self, jobs):
+        client = Client()
+        client.force_login(self.user)
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                self._run_job(client, *job)
+        finally:
+            connection.close()
+
+    def _run_job(self, client, index, scheduled):
+        counter = [0]
+        token = _query_counter.set(counter)
+        try:
+            outcome = self.scenario(client, index, scheduled)
+        except Exception as e:
+            outcome = {"ok": False, "status": type(e).__name__}
+        finally:
+            _query_counter.reset(token)
+
+        result = {
+            "latency": time.perf_counter() - scheduled,
+            "queries": counter[0],
+            **outcome,
+        }
+        with self.results_lock:
+            self.results.append(result)
+
+    def _message(self, index):
+        # Message unique : pas de réponse servie par le cache des réponses
+        return f"Question de test de charge n°{index} : pouvez-vous m'aider ?"
+
+    def _scenario_send_message(self, client, index, scheduled):
+        response = client.post(
+            reverse("conversation-send-message"),
+            {"message": self._message(index), "agent_id": self.agent.id},
+            content_type="application/json",
+        )
+        return {"ok": response.status_code == 200, "status": response.status_code}
+
+    def _scenario_stream(self, client, index, scheduled):
+        response = client.post(
+            reverse("conversation-send-message-stream"),
+            {"message": self._message(index), "agent_id": self.agent.id},
+            content_type="application/json",
+        )
+        if response.status_code != 200:
+            return {"ok": False, "status": response.status_code}
+
+        stream = {"ttft": None, "last_event": None}
+
+        def read(chunk):
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            for line in text.splitlines():
+                if line.startswith("event: "):
+                    stream["last_event"] = line[len("event: ") :]
+                    if stream["last_event"] == "token" and stream["ttft"] is None:
+                        stream["ttft"] = time.perf_counter() - scheduled
+
+        # Flux asynchrone (vue ASGI) lu dans sa propre boucle, comme uvicorn :
+        # l'itération synchrone le mettrait entièrement en mémoire
+        if response.is_async:
+
+            async def consume():
+                async for chunk in response.streaming_content:
+                    read(chunk)
+
+            asyncio.run(consume())
+        else:
+            for chunk in response.streaming_content:
+                read(chunk)
+        response.close()
+
+        last_event = stream["last_event"]
+        return {
+            "ok": last_event == "done",
+            "status": last_event or "empty",
+            "ttft": stream["ttft"],
+        }
+
+    def _scenario_background(self, client, index, scheduled):
+        response = client.post(
+            reverse("conversation-send-message"),
+            {
+                "message": self._message(index),
+                "agent_id": self.agent.id,
+                "background": True,
+            },
+            content_type="application/json",
+        )
+        if response.status_code != 202:
+            return {"ok": False, "status": response.status_code}
+        return self._wait_task(client, response.json()["task_id"])
+
+    def _scenario_auto_chat(self, client, index, scheduled):
+        response = client.post(
+            reverse("conversation-auto-chat"),
+            {
+                "agent_a_id": self.agent.id,
+                "agent_b_id": self.agent.id,
+                "initial_message": self._message(index),
+                "iterations": self.options["iterations"],
+            },
+            content_type="application/json",
+        )
+        if response.status_code != 202:
+            return {"ok": False, "status": response.status_code}
+        return self._wait_task(client, response.json()["task_id"])
+
+    def _scenario_title(self, client, index, scheduled):
+        conversation = Conversation.objects.create(user=self.user)
+        conversation.agents.add(self.agent)
+        Message.objects.create(
+            conversation=conversation, role="human", content=self._message(index)
+        )
+        TitleQueue.enqueue(conversation.id)
+
+        # Titre enregistré par le prochain lot de generate_pending_titles
+        titled = Conversation.objects.filter(id=conversation.id).exclude(title="")
+        deadline = time.monotonic() + self.options["task_timeout"]
+        while time.monotonic() < deadline:
+            if titled.exists():
+                return {"ok": True, "status": "SUCCESS"}
+            time.sleep(self.options["poll_interval"])
+        return {"ok": False, "status": "TIMEOUT"}
+
+    def _wait_task(self, client, task_id):
+        """Suit la tâche via l'API (tasks/<task_id>/) jusqu'à son issue."""
+        url = reverse("conversation-task-status", kwargs={"task_id": task_id})
+        deadline = time.monotonic() + self.options["task_timeout"]
+        while time.monotonic() < deadline:
+            data = client.get(url).json()
+            if data["status"] == "SUCCESS":
+                result = data.get("result") or {}
+                ok = result.get("status") == "success"
+                return {"ok": ok, "status": "SUCCESS" if ok else "TASK_ERROR"}
+            if data["status"] == "FAILURE":
+                return {"ok": False, "status": "FAILURE"}
+            time.sleep(self.options["poll_interval"])
+        return {"ok": False, "status": "TIMEOUT"}
+
+    def _report(self, elapsed):
+        results = self.results
+        succeeded = [r for r in results if r["ok"]]
+        latencies = sorted(r["latency"] for r in succeeded)
+        ttfts = sorted(r["ttft"] for r in succeeded if r.get("ttft") is not None)
+        queries = sorted(r["queries"] for r in results)
+
+        errors = {}
+        for r in results:
+            if not r["ok"]:
+                errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        report = {
+            "scenario": self.options["scenario"],
+            "model": self.agent.llm_model,
+            "target_rps": self.options["rps"],
+            "requests": len(results),
+            "succeeded": len(succeeded),
+            "errors": errors,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(succeeded) / elapsed, 2) if elapsed else 0,
+            "latency_ms": {
+                "p50": ms(_percentile(latencies, 50)),
+                "p95": ms(_percentile(latencies, 95)),
+                "p99": ms(_percentile(latencies, 99)),
+                "max": ms(latencies[-1] if latencies else None),
+            },
+            "db_queries_per_request": {
+                "mean": round(sum(queries) / len(queries), 1) if queries else None,
+                "p95": _percentile(queries, 95),
+                "max": queries[-1] if queries else None,
+            },
+        }
+        if ttfts:
+            report["ttft_ms"] = {
+                "p50": ms(_percentile(ttfts, 50)),
+                "p95": ms(_percentile(ttfts, 95)),
+                "p99": ms(_percentile(ttfts, 99)),
+            }
+        return report
+
+    def _print_report(self, report):
+        self.stdout.write(
+            f"Scénario {report['scenario']} (modèle {report['model']}) : "
+            f"{report['succeeded']}/{report['requests']} succès "
+            f"en {report['elapsed_s']}s"
+        )
+        self.stdout.write(
+            f"Débit : {report['throughput_rps']} req/s (cible {report['target_rps']})"
+        )
+        for label, key in (("Latence", "latency_ms"), ("TTFT", "ttft_ms")):
+            if key in report:
+                values = ", ".join(
+                    f"{name} {value} ms" for name, value in report[key].items()
+                )
+                self.stdout.write(f"{label} : {values}")
+        queries = report["db_queries_per_request"]
+        self.stdout.write(
+            f"Requêtes SQL par requête (processus API) : moyenne {queries['mean']}, "
+            f"p95 {queries['p95']}, max {queries['max']}"
+        )
+        if report["errors"]:
+            self.stdout.write(self.style.WARNING(f"Erreurs : {report['errors']}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Test de charge terminé !"))
@@ -0,0 +1,125 @@
+"""
+Commande pour lancer une matrice Auto-Chat (agents métier × agents clients).
+"""
+
+import time
+from celery.result import AsyncResult
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from chat.auto_chat_matrix import AutoChatMatrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Lance un Auto-Chat pour chaque paire (agent métier, agent client) avec "
+        "une concurrence bornée (option --wait pour attendre le résumé)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--metier", type=int, nargs="+", required=True, help="IDs des agents métier"
+        )
+        parser.add_argument(
+            "--clients", type=int, nargs="+", required=True, help="IDs des agents clients"
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=10, help="Nombre de tours par Auto-Chat"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.AUTO_CHAT_MATRIX_CONCURRENCY,
+            help="Nombre d'Auto-Chats exécutés en parallèle",
+        )
+        parser.add_argument(
+            "--user",
+            help="Utilisateur propriétaire des conversations (défaut : premier superutilisateur)",
+        )
+        parser.add_argument(
+            "--wait", action="store_true", help="Attend la fin de la matrice"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=3600,
+            help="Attente maximale en secondes avec --wait (défaut : 3600)",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("Utilisateur introuvable")
+
+        metier_agents, client_agents, errors = AutoChatMatrix.get_agents(
+            options["metier"], options["clients"]
+        )
+        if errors:
+            raise CommandError("\n".join(errors))
+
+        matrix_id, task_id = AutoChatMatrix.launch(
+            metier_agents,
+            client_agents,
+            iterations=options["iterations"],
+            user_id=user.id,
+            concurrency=max(options["concurrency"], 1),
+        )
+        pairs = len(metier_agents) * len(client_agents)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Matrice {matrix_id} lancée : {pairs} paires (tâche {task_id})"
+            )
+        )
+
+        if not options["wait"]:
+            return
+
+        # La matrice est finie quand le chord l'est (succès ou échec d'une
+        # file) : une file interrompue ne crée jamais ses Auto-Chats suivants,
+        # compter les exécutions terminées attendrait indéfiniment
+        result = AsyncResult(task_id)
+        deadline = time.monotonic() + options["timeout"]
+        while True:
+            summary = AutoChatMatrix.summarize(matrix_id)
+            finished = summary["completed"] + summary["failed"]
+            self.stdout.write(f"{finished}/{pairs} Auto-Chats terminés")
+            if finished >= pairs or result.ready():
+                break
+            if time.monotonic() >= deadline:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Délai d'attente de {options['timeout']}s dépassé"
+                    )
+                )
+                break
+            time.sleep(5)
+        if result.failed():
+            self.stdout.write(self.style.ERROR(f"Matrice interrompue : {result.result}"))
+        summary = AutoChatMatrix.summarize(matrix_id)
+
+        for pair in summary["pairs"]:
+            duration = f"{pair['duration']:.1f}s" if pair["duration"] is not None else "-"
+            self.stdout.write(
+                f"{pair['metier_agent']} ↔ {pair['client_agent']} : {pair['status']}, "
+                f"{pair['turns']}/{pair['iterations']} tours, {pair['tokens']} tokens, "
+                f"{duration}"
+            )
+        missing = AutoChatMatrix.missing_pairs(matrix_id, metier_agents, client_agents)
+        for metier, client in missing:
+            self.stdout.write(f"{metier.name} ↔ {client.name} : jamais démarré")
+
+        unfinished = pairs - summary["completed"] - summary["failed"]
+        report = (
+            f"{summary['completed']} réussis, {summary['failed']} en échec, "
+            f"{summary['total_tokens']} tokens"
+        )
+        if unfinished:
+            raise CommandError(
+                f"Matrice incomplète : {report}, {unfinished} non terminés "
+                f"dont {len(missing)} jamais démarrés"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Matrice terminée : {report}"))
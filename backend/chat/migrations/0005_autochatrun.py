@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0005_agent_enable_response_cache'),
+        ('chat', '0004_message_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutoChatRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(max_length=255, unique=True, verbose_name='ID de la tâche Celery')),
+                ('initial_message', models.TextField(verbose_name='Message initial')),
+                ('iterations', models.PositiveIntegerField(verbose_name='Nombre de tours')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminé'), ('failed', 'Échec')], default='pending', max_length=10, verbose_name='Statut')),
+                ('completed_turns', models.PositiveIntegerField(default=0, verbose_name='Tours terminés')),
+                ('total_tokens', models.PositiveIntegerField(default=0, help_text="Tokens générés depuis le début de l'exécution", verbose_name='Tokens')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text="Nombre d'exécutions de la tâche (reprises comprises)", verbose_name='Exécutions')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('agent_a', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.agent', verbose_name='Agent A')),
+                ('agent_b', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.agent', verbose_name='Agent B')),
+                ('conversation', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='auto_chat_run', to='chat.conversation', verbose_name='Conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auto_chat_runs', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Exécution Auto-Chat',
+                'verbose_name_plural': 'Exécutions Auto-Chat',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
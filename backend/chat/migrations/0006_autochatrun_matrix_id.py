@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_autochatrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autochatrun',
+            name='matrix_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Renseigné pour les exécutions lancées par une matrice Auto-Chat', max_length=36, verbose_name='ID de la matrice'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:01
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# Colonnes nullables sans défaut : ajoutées sans réécrire les tables (une
+# colonne générée les réécrirait sous verrou exclusif). Un trigger les tient à
+# jour à l'écriture ; les lignes existantes sont remplies par lots (0011) puis
+# indexées sans bloquer les écritures (0012).
+TRIGGER_SQL = """
+CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('french'::regconfig, COALESCE(NEW.{column}, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_vector_trigger
+BEFORE INSERT OR UPDATE OF {column} ON {table}
+FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER {table}_search_vector_trigger ON {table};
+DROP FUNCTION {table}_search_vector_update();
+"""
+
+
+def search_vector_trigger(table, column):
+    return migrations.RunSQL(
+        TRIGGER_SQL.format(table=table, column=column),
+        DROP_TRIGGER_SQL.format(table=table),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0006_alter_agent_llm_model'),
+        ('chat', '0006_autochatrun_matrix_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        search_vector_trigger('chat_conversation', 'title'),
+        search_vector_trigger('chat_message', 'content'),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Index créés sans bloquer les écritures sur les tables volumineuses,
+    # avant de supprimer les index des clés étrangères qu'ils couvrent
+    atomic = False
+
+    dependencies = [
+        ('agents', '0007_query_indexes'),
+        ('chat', '0007_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=models.Index(fields=['user', '-updated_at'], name='chat_conv_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('folder__isnull', False)), fields=['user', 'folder'], name='chat_conv_user_folder_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='folder',
+            index=models.Index(fields=['user', 'parent', 'order', 'name'], name='chat_folder_user_parent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='folder',
+            index=models.Index(condition=models.Q(('parent__isnull', True)), fields=['user', 'order', 'name'], name='chat_folder_user_root_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(condition=models.Q(('role', 'ai')), fields=['created_at'], name='chat_msg_ai_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='conversation',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='folders', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='chat.conversation', verbose_name='Conversation'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Nouvel index créé avant de supprimer l'ancien, sans bloquer les écritures
+    atomic = False
+
+    dependencies = [
+        ('agents', '0007_query_indexes'),
+        ('chat', '0008_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='chat_conv_user_recent_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='conversation',
+            name='chat_conv_user_updated_idx',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0009_conversation_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autochatrun',
+            name='error_retries',
+            field=models.PositiveIntegerField(default=0, help_text='Plafonnées par AUTO_CHAT_MAX_RETRIES', verbose_name='Reprises après erreur'),
+        ),
+        migrations.AddField(
+            model_name='autochatrun',
+            name='stalled_retries',
+            field=models.PositiveIntegerField(default=0, help_text='Limites de temps et de débit consécutives sans tour terminé (plafonnées par AUTO_CHAT_MAX_STALLED_RETRIES)', verbose_name='Reprises sans progression'),
+        ),
+    ]
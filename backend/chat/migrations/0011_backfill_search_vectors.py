@@ -0,0 +1,37 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, transaction
+from django.db.models import Max, Min
+
+# Lignes mises à jour par transaction : chaque lot ne verrouille que ses lignes
+BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """
+    Remplit par lots d'identifiants les vecteurs des lignes antérieures à la
+    migration 0007 (les nouvelles lignes sont remplies par les triggers).
+    """
+    alias = schema_editor.connection.alias
+    for model_name, field in (("Conversation", "title"), ("Message", "content")):
+        model = apps.get_model("chat", model_name)
+        bounds = model.objects.using(alias).aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            continue
+        for start in range(bounds["low"], bounds["high"] + 1, BATCH_SIZE):
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(
+                    id__gte=start, id__lt=start + BATCH_SIZE, search_vector__isnull=True
+                ).update(search_vector=SearchVector(field, config="french"))
+
+
+class Migration(migrations.Migration):
+    # Une transaction par lot plutôt qu'une seule sur toute la table
+    atomic = False
+
+    dependencies = [
+        ('chat', '0010_autochatrun_retry_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:28
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Index GIN construits sans bloquer les écritures, une fois les vecteurs
+    # remplis (0011)
+    atomic = False
+
+    dependencies = [
+        ('agents', '0007_query_indexes'),
+        ('chat', '0011_backfill_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='chat_conv_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='chat_msg_search_idx'),
+        ),
+    ]
@@ -2,12 +2,23 @@
 Modèles pour la gestion des conversations et messages.
 """
 
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Substr
 from django.contrib.auth import get_user_model
 from agents.models import Agent
 
 User = get_user_model()
 
+# Longueur de l'aperçu du dernier message affiché dans la liste des conversations
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+# Configuration Postgres de la recherche plein texte (LANGUAGE_CODE = fr-fr),
+# identique à celle des triggers de la migration 0007
+SEARCH_CONFIG = "french"
+
 
 class Folder(models.Model):
     """
@@ -21,6 +32,7 @@ class Folder(models.Model):
         on_delete=models.CASCADE,
         related_name="folders",
         verbose_name="Utilisateur",
+        db_index=False,  # préfixe de chat_folder_user_parent_idx
     )
 
     parent = models.ForeignKey(
@@ -39,6 +51,20 @@ class Folder(models.Model):
 
     class Meta:
         ordering = ["order", "name"]
+        indexes = [
+            # Dossiers d'un utilisateur par parent, dans l'ordre d'affichage
+            models.Index(
+                fields=["user", "parent", "order", "name"],
+                name="chat_folder_user_parent_idx",
+            ),
+            # Dossiers racines (parent IS NULL ne fixe pas l'ordre de l'index
+            # précédent)
+            models.Index(
+                fields=["user", "order", "name"],
+                condition=Q(parent__isnull=True),
+                name="chat_folder_user_root_idx",
+            ),
+        ]
         verbose_name = "Dossier"
         verbose_name_plural = "Dossiers"
         unique_together = ["user", "name", "parent"]
@@ -47,6 +73,40 @@ class Folder(models.Model):
         return self.name
 
 
+class ConversationQuerySet(models.QuerySet):
+    def refresh_message_stats(self):
+        """
+        Recalcule les champs dénormalisés (nombre de messages, dernier message)
+        à partir de la table des messages, en une seule requête UPDATE.
+        """
+        messages = Message.objects.filter(conversation=OuterRef("pk"))
+        last_message = messages.order_by("-created_at", "-id")
+
+        return self.update(
+            message_count=Coalesce(
+                Subquery(
+                    messages.order_by()
+                    .values("conversation")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            ),
+            last_message_at=Subquery(last_message.values("created_at")[:1]),
+            last_message_preview=Coalesce(
+                Subquery(
+                    last_message.annotate(
+                        preview=Substr("content", 1, LAST_MESSAGE_PREVIEW_LENGTH)
+                    ).values("preview")[:1]
+                ),
+                Value(""),
+            ),
+            last_message_role=Coalesce(
+                Subquery(last_message.values("role")[:1]), Value("")
+            ),
+        )
+
+
 class Conversation(models.Model):
     """
     Représente une conversation entre un utilisateur et un ou plusieurs agents.
@@ -76,6 +136,7 @@ class Conversation(models.Model):
         on_delete=models.CASCADE,
         related_name="conversations",
         verbose_name="Utilisateur",
+        db_index=False,  # préfixe de chat_conv_user_recent_idx
     )
 
     folder = models.ForeignKey(
@@ -91,11 +152,48 @@ class Conversation(models.Model):
         Agent, related_name="conversations", verbose_name="Agents impliqués"
     )
 
+    # Champs dénormalisés, maintenus par Message.save / Message.delete
+    # (recalcul complet : commande backfill_conversation_stats)
+    message_count = models.PositiveIntegerField(
+        default=0, verbose_name="Nombre de messages"
+    )
+    last_message_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Date du dernier message"
+    )
+    last_message_preview = models.CharField(
+        max_length=LAST_MESSAGE_PREVIEW_LENGTH,
+        blank=True,
+        verbose_name="Aperçu du dernier message",
+    )
+    last_message_role = models.CharField(
+        max_length=10, blank=True, verbose_name="Rôle du dernier message"
+    )
+
+    # Vecteur de recherche plein texte du titre, tenu à jour par un trigger
+    # Postgres (migration 0007)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ConversationQuerySet.as_manager()
+
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # Liste des conversations d'un utilisateur (plus récentes d'abord),
+            # paginée par curseur sur (updated_at, id)
+            models.Index(
+                fields=["user", "-updated_at", "-id"], name="chat_conv_user_recent_idx"
+            ),
+            # Nombre de conversations par dossier (arbre des dossiers)
+            models.Index(
+                fields=["user", "folder"],
+                condition=Q(folder__isnull=False),
+                name="chat_conv_user_folder_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="chat_conv_search_idx"),
+        ]
         verbose_name = "Conversation"
         verbose_name_plural = "Conversations"
 
@@ -103,6 +201,39 @@ class Conversation(models.Model):
         return self.title or f"Conversation #{self.id}"
 
 
+class MessageQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Suppression en masse (QuerySet.delete, actions de l'admin) : recalcule
+        les compteurs des conversations touchées et invalide leur historique en
+        cache, comme Message.delete(). Les suppressions en cascade d'une
+        conversation n'ont pas de compteurs à recalculer.
+        """
+        from .history_cache import ConversationHistoryCache
+
+        conversation_ids = set(
+            self.order_by().values_list("conversation_id", flat=True).distinct()
+        )
+        with transaction.atomic():
+            result = super().delete()
+            Conversation.objects.filter(pk__in=conversation_ids).refresh_message_stats()
+        for conversation_id in conversation_ids:
+            transaction.on_commit(
+                lambda pk=conversation_id: ConversationHistoryCache.invalidate(pk)
+            )
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class MessageManager(models.Manager.from_queryset(MessageQuerySet)):
+    def get_queryset(self):
+        # Le vecteur de recherche, de la taille du contenu, n'est lu que par
+        # la recherche (filtre et rang calculés en base)
+        return super().get_queryset().defer("search_vector")
+
+
 class Message(models.Model):
     """
     Représente un message dans une conversation.
@@ -119,6 +250,7 @@ class Message(models.Model):
         on_delete=models.CASCADE,
         related_name="messages",
         verbose_name="Conversation",
+        db_index=False,  # préfixe de chat_msg_conv_created_idx
     )
 
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, verbose_name="Rôle")
@@ -147,12 +279,194 @@ class Message(models.Model):
         help_text="Informations supplémentaires (tokens, durée, etc.)",
     )
 
+    # Vecteur de recherche plein texte du contenu, tenu à jour par un trigger
+    # Postgres (migration 0007)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = MessageManager()
+
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # Pagination par clé des messages d'une conversation
+            models.Index(
+                fields=["conversation", "created_at", "id"],
+                name="chat_msg_conv_created_idx",
+            ),
+            # Statistiques d'usage LLM (réponses IA sur une fenêtre de temps)
+            models.Index(
+                fields=["created_at"],
+                condition=Q(role="ai"),
+                name="chat_msg_ai_created_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="chat_msg_search_idx"),
+        ]
         verbose_name = "Message"
         verbose_name_plural = "Messages"
 
     def __str__(self):
         return f"{self.get_role_display()}: {self.content[:50]}..."
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Nouveau message : mise à jour des compteurs de la conversation dans la
+        # même transaction (F() pour rester correct sous écritures concurrentes ;
+        # l'aperçu n'est remplacé que par un message plus récent)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            is_latest = Q(last_message_at__isnull=True) | Q(
+                last_message_at__lte=self.created_at
+            )
+            Conversation.objects.filter(pk=self.conversation_id).update(
+                message_count=F("message_count") + 1,
+                last_message_at=Greatest(F("last_message_at"), Value(self.created_at)),
+                last_message_preview=Case(
+                    When(
+                        is_latest,
+                        then=Value(self.content[:LAST_MESSAGE_PREVIEW_LENGTH]),
+                    ),
+                    default=F("last_message_preview"),
+                ),
+                last_message_role=Case(
+                    When(is_latest, then=Value(self.role)),
+                    default=F("last_message_role"),
+                ),
+            )
+
+    def delete(self, *args, **kwargs):
+        # Pas de signal post_delete sur Message : il empêcherait la suppression
+        # en masse (fast delete) des messages lors de la suppression d'une conversation.
+        from .history_cache import ConversationHistoryCache
+
+        conversation_id = self.conversation_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Conversation.objects.filter(pk=conversation_id).refresh_message_stats()
+        ConversationHistoryCache.invalidate(conversation_id)
+        return result
+
+
+class AutoChatRun(models.Model):
+    """
+    Exécution d'un Auto-Chat (tâche Celery run_auto_chat).
+
+    Sert de point de reprise : chaque tour terminé est enregistré dans la même
+    transaction que son message, une nouvelle exécution de la tâche reprend
+    au tour suivant.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "En attente"),
+        ("running", "En cours"),
+        ("completed", "Terminé"),
+        ("failed", "Échec"),
+    ]
+
+    task_id = models.CharField(
+        max_length=255, unique=True, verbose_name="ID de la tâche Celery"
+    )
+
+    matrix_id = models.CharField(
+        max_length=36,
+        blank=True,
+        db_index=True,
+        verbose_name="ID de la matrice",
+        help_text="Renseigné pour les exécutions lancées par une matrice Auto-Chat",
+    )
+
+    conversation = models.OneToOneField(
+        Conversation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="auto_chat_run",
+        verbose_name="Conversation",
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="auto_chat_runs",
+        verbose_name="Utilisateur",
+    )
+
+    agent_a = models.ForeignKey(
+        Agent,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+        verbose_name="Agent A",
+    )
+
+    agent_b = models.ForeignKey(
+        Agent,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+        verbose_name="Agent B",
+    )
+
+    initial_message = models.TextField(verbose_name="Message initial")
+
+    iterations = models.PositiveIntegerField(verbose_name="Nombre de tours")
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="pending",
+        verbose_name="Statut",
+    )
+
+    completed_turns = models.PositiveIntegerField(
+        default=0, verbose_name="Tours terminés"
+    )
+
+    total_tokens = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tokens",
+        help_text="Tokens générés depuis le début de l'exécution",
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Exécutions",
+        help_text="Nombre d'exécutions de la tâche (reprises comprises)",
+    )
+
+    error_retries = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Reprises après erreur",
+        help_text="Plafonnées par AUTO_CHAT_MAX_RETRIES",
+    )
+
+    stalled_retries = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Reprises sans progression",
+        help_text="Limites de temps et de débit consécutives sans tour terminé "
+        "(plafonnées par AUTO_CHAT_MAX_STALLED_RETRIES)",
+    )
+
+    error = models.TextField(blank=True, verbose_name="Erreur")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Exécution Auto-Chat"
+        verbose_name_plural = "Exécutions Auto-Chat"
+
+    def __str__(self):
+        return f"Auto-Chat {self.task_id} ({self.completed_turns}/{self.iterations})"
+
+    @property
+    def duration(self):
+        """Durée de l'exécution en secondes (None si non terminée)."""
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.created_at).total_seconds()
@@ -0,0 +1,43 @@
+"""
+Pagination par clé (keyset) des messages d'une conversation.
+
+Les pages sont découpées sur (created_at, id) et non par OFFSET : le coût d'une
+page reste constant quelle que soit la longueur de la conversation.
+"""
+
+from collections import namedtuple
+from django.conf import settings
+from django.db.models import Q
+from .models import Message
+
+MessagePage = namedtuple("MessagePage", ["messages", "has_more"])
+
+# Ordre de la liste des conversations (vue synchrone et chemin asynchrone),
+# servi par l'index chat_conv_user_recent_idx
+CONVERSATION_ORDERING = ("-updated_at", "-id")
+
+
+def get_message_page(conversation_id, before=None, limit=None):
+    """
+    Retourne la page de messages la plus récente antérieure au message `before`
+    (ou la plus récente de la conversation si `before` est None).
+
+    Les messages sont renvoyés dans l'ordre chronologique. Lève
+    Message.DoesNotExist si `before` n'appartient pas à la conversation.
+    """
+    limit = limit or settings.CONVERSATION_MESSAGES_PAGE_SIZE
+    queryset = Message.objects.filter(conversation_id=conversation_id)
+
+    if before is not None:
+        cursor = queryset.values("created_at", "id").get(id=before)
+        queryset = queryset.filter(
+            Q(created_at__lt=cursor["created_at"])
+            | Q(created_at=cursor["created_at"], id__lt=cursor["id"])
+        )
+
+    # limit + 1 pour savoir s'il reste des messages plus anciens
+    messages = list(
+        queryset.select_related("agent").order_by("-created_at", "-id")[: limit + 1]
+    )
+    has_more = len(messages) > limit
+    return MessagePage(messages=messages[:limit][::-1], has_more=has_more)
@@ -0,0 +1,141 @@
+"""
+Registre des providers LLM.
+
+Un modèle logique de LLM_MODELS est servi par un ou plusieurs endpoints
+(clé `endpoints`, par défaut un seul endpoint sur le `provider` du modèle).
+Chaque endpoint hérite de la configuration du modèle et peut la surcharger :
+
+    "gpt-4o": {
+        ...
+        "provider": "openai",
+        "endpoints": [
+            {"name": "openai"},
+            {"name": "azure-we", "provider": "azure", "deployment_name": "gpt-4o"},
+            {"name": "local", "provider": "openai_compatible",
+             "base_url": "http://localhost:8999/v1"},
+        ],
+    }
+
+Un provider est une fonction (endpoint, configuration commune) -> client
+LangChain, enregistrée avec @register_provider. chat.llm_router choisit
+l'endpoint de chaque appel.
+"""
+
+import os
+from typing import Callable, Dict, List
+from django.conf import settings
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
+from chatagentb.llm_config import get_model_config
+from .fake_llm import FakeChatModel
+
+_providers: Dict[str, Callable] = {}
+
+
+def register_provider(name: str):
+    """Décorateur : enregistre la fonction de construction d'un provider."""
+
+    def decorator(builder: Callable) -> Callable:
+        _providers[name] = builder
+        return builder
+
+    return decorator
+
+
+def build_chat_model(endpoint: Dict, common_config: Dict):
+    """Construit le client LangChain d'un endpoint."""
+    builder = _providers.get(endpoint["provider"])
+    if builder is None:
+        raise ValueError(f"Provider '{endpoint['provider']}' non supporté")
+    return builder(endpoint, common_config)
+
+
+def model_endpoints(model_key: str) -> List[Dict]:
+    """
+    Endpoints d'un modèle logique. Chaque endpoint a une clé unique
+    (`key` : "<modèle>/<nom>") utilisée pour le cache des clients et les
+    statistiques du routeur.
+    """
+    model_config = get_model_config(model_key)
+    base = {k: v for k, v in model_config.items() if k != "endpoints"}
+    endpoints = []
+    for override in model_config.get("endpoints") or [{}]:
+        endpoint = {**base, **override}
+        endpoint.setdefault("name", endpoint["provider"])
+        endpoint["key"] = f"{model_key}/{endpoint['name']}"
+        endpoints.append(endpoint)
+    return endpoints
+
+
+@register_provider("openai")
+def build_openai(endpoint: Dict, common_config: Dict):
+    """API OpenAI (ou proxy compatible désigné par OPENAI_API_BASE)."""
+    llm_config = {
+        **common_config,
+        "model": endpoint["model_name"],
+        "api_key": settings.OPENAI_API_KEY,
+    }
+    if settings.OPENAI_API_BASE:
+        llm_config["base_url"] = settings.OPENAI_API_BASE
+    return ChatOpenAI(**llm_config)
+
+
+@register_provider("azure")
+def build_azure(endpoint: Dict, common_config: Dict):
+    """
+    Azure OpenAI. Sans AZURE_OPENAI_ENDPOINT, les modèles `azure.*` passent
+    par le proxy LiteLLM d'OPENAI_API_BASE, comme le provider openai.
+    """
+    azure_endpoint = endpoint.get("azure_endpoint", settings.AZURE_OPENAI_ENDPOINT)
+    if not azure_endpoint:
+        return build_openai(endpoint, common_config)
+
+    return AzureChatOpenAI(
+        **common_config,
+        model=endpoint["model_name"],
+        azure_deployment=endpoint.get("deployment_name"),
+        api_key=settings.AZURE_OPENAI_API_KEY,
+        azure_endpoint=azure_endpoint,
+        api_version=settings.AZURE_OPENAI_API_VERSION,
+    )
+
+
+@register_provider("openai_compatible")
+def build_openai_compatible(endpoint: Dict, common_config: Dict):
+    """
+    Tout serveur compatible avec l'API OpenAI (vLLM, LiteLLM, Ollama, serveur
+    factice `fake_llm_server`...). La clé API est lue dans la variable
+    d'environnement `api_key_env` de l'endpoint, si définie.
+    """
+    api_key = os.getenv(endpoint.get("api_key_env", ""), "") or "not-needed"
+    return ChatOpenAI(
+        **common_config,
+        model=endpoint["model_name"],
+        base_url=endpoint["base_url"],
+        api_key=api_key,
+    )
+
+
+@register_provider("fake")
+def build_fake(endpoint: Dict, common_config: Dict):
+    """
+    Modèle factice en mémoire (tests de charge, CI sans réseau), voir
+    chat.fake_llm. Réglages de l'endpoint, à défaut les settings LLM_FAKE_*.
+    """
+    if not settings.LLM_FAKE_ENABLED:
+        raise ValueError("Le provider 'fake' est désactivé (LLM_FAKE_ENABLED)")
+    return FakeChatModel(
+        model_name=endpoint["model_name"],
+        temperature=common_config["temperature"],
+        max_tokens=common_config["max_tokens"],
+        timeout=common_config["timeout"],
+        latency=endpoint.get("latency", settings.LLM_FAKE_LATENCY),
+        tokens_per_second=endpoint.get(
+            "tokens_per_second", settings.LLM_FAKE_TOKENS_PER_SECOND
+        ),
+        chunk_tokens=endpoint.get("chunk_tokens", settings.LLM_FAKE_CHUNK_TOKENS),
+        completion_tokens=endpoint.get(
+            "completion_tokens", settings.LLM_FAKE_COMPLETION_TOKENS
+        ),
+        error_rate=endpoint.get("error_rate", settings.LLM_FAKE_ERROR_RATE),
+        seed=endpoint.get("seed", settings.LLM_FAKE_SEED),
+    )
@@ -0,0 +1,206 @@
+"""
+Limiteur de débit des appels LLM, partagé par tous les processus via Redis.
+
+Deux seaux à jetons par modèle (`rpm` requêtes et `tpm` tokens par minute,
+définis dans LLM_MODELS) sont mis à jour atomiquement par un script Lua,
+avec l'horloge de Redis : web et workers Celery consomment le même budget.
+Un appel réserve 1 requête et une estimation de ses tokens (prompt +
+max_tokens, plafonnée à tpm) ; l'écart entre les tokens prélevés et l'usage
+réel est rendu au seau une fois l'appel terminé, y compris quand il échoue
+(usage nul, ou partiel pour un flux interrompu).
+
+Les appelants choisissent d'attendre (délai maximal) ou d'échouer tout de
+suite (RateLimitExceeded, avec le délai avant réessai). Si Redis est
+indisponible, les appels passent sans limitation.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Optional, Tuple
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from chatagentb.llm_config import get_model_config
+from chatagentb.metrics import LLM_RATE_LIMITED
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "chat:ratelimit"
+
+# Remplit les deux seaux au prorata du temps écoulé puis réserve la requête si
+# les deux budgets suffisent. Retourne {délai d'attente en secondes ("0" si la
+# réservation est faite), tokens effectivement prélevés}. Une limite à 0
+# désactive le seau correspondant.
+ACQUIRE_SCRIPT = """
+redis.replicate_commands()
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(now - (tonumber(state[3]) or now), 0)
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+-- Un appel plus gros que le seau entier ne passerait jamais
+cost = math.min(cost, tpm)
+
+local wait = 0
+if rpm > 0 and requests < 1 then
+    wait = math.max(wait, (1 - requests) * 60 / rpm)
+end
+if tpm > 0 and tokens < cost then
+    wait = math.max(wait, (cost - tokens) * 60 / tpm)
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+else
+    cost = 0
+end
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return {tostring(wait), tostring(cost)}
+"""
+
+# Rend (ou prélève) l'écart entre les tokens réservés et l'usage réel
+SETTLE_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens == nil then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + tonumber(ARGV[2])))
+return 1
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Budget du modèle épuisé au-delà du délai d'attente accepté."""
+
+    def __init__(self, model_key: str, retry_after: float):
+        self.model_key = model_key
+        self.retry_after = retry_after
+        super().__init__(
+            f"Limite de débit atteinte pour {model_key}, "
+            f"réessayez dans {retry_after:.1f}s"
+        )
+
+
+class LLMRateLimiter:
+    """Seaux à jetons Redis par modèle (requêtes et tokens par minute)."""
+
+    _acquire_script = None
+    _settle_script = None
+
+    @staticmethod
+    def _limits(model_key: str):
+        config = get_model_config(model_key)
+        return config.get("rpm", 0), config.get("tpm", 0)
+
+    @staticmethod
+    def try_acquire(model_key: str, tokens: int) -> Tuple[float, int]:
+        """
+        Tente de réserver une requête et `tokens` tokens.
+
+        Returns:
+            tuple: (0 si la réservation est faite, sinon le délai d'attente en
+            secondes ; tokens effectivement prélevés, à passer à settle)
+        """
+        rpm, tpm = LLMRateLimiter._limits(model_key)
+        if not rpm and not tpm:
+            return 0.0, 0
+        try:
+            if LLMRateLimiter._acquire_script is None:
+                LLMRateLimiter._acquire_script = get_redis().register_script(
+                    ACQUIRE_SCRIPT
+                )
+            wait, reserved = LLMRateLimiter._acquire_script(
+                keys=[f"{KEY_PREFIX}:{model_key}"], args=[rpm, tpm, tokens]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"LLM rate limiter unavailable: {str(e)}")
+            return 0.0, 0
+        return float(wait), int(float(reserved))
+
+    @staticmethod
+    def _next_wait(model_key: str, retry_after: float, deadline: float) -> float:
+        """Délai avant la prochaine tentative, ou RateLimitExceeded."""
+        if time.monotonic() + retry_after > deadline:
+            LLM_RATE_LIMITED.labels(model=model_key).inc()
+            raise RateLimitExceeded(model_key, retry_after)
+        # Étale les réveils des appelants en attente sur le même seau
+        return retry_after + random.uniform(0, 0.05)
+
+    @staticmethod
+    def acquire(model_key: str, tokens: int, wait: Optional[float] = None) -> int:
+        """
+        Réserve une requête et `tokens` tokens sur le budget du modèle.
+
+        Args:
+            wait: attente maximale en secondes (0 : échec immédiat, None :
+                LLM_RATE_LIMIT_WAIT)
+
+        Returns:
+            int: tokens effectivement prélevés (`tokens` plafonné à tpm), à
+            rendre par settle une fois l'usage réel connu
+
+        Raises:
+            RateLimitExceeded: si le budget n'est pas disponible à temps
+        """
+        if wait is None:
+            wait = settings.LLM_RATE_LIMIT_WAIT
+        deadline = time.monotonic() + wait
+        while True:
+            retry_after, reserved = LLMRateLimiter.try_acquire(model_key, tokens)
+            if not retry_after:
+                return reserved
+            time.sleep(LLMRateLimiter._next_wait(model_key, retry_after, deadline))
+
+    @staticmethod
+    async def aacquire(
+        model_key: str, tokens: int, wait: Optional[float] = None
+    ) -> int:
+        """Version asynchrone de acquire (attente sans bloquer la boucle)."""
+        if wait is None:
+            wait = settings.LLM_RATE_LIMIT_WAIT
+        deadline = time.monotonic() + wait
+        try_acquire = sync_to_async(LLMRateLimiter.try_acquire, thread_sensitive=False)
+        while True:
+            retry_after, reserved = await try_acquire(model_key, tokens)
+            if not retry_after:
+                return reserved
+            await asyncio.sleep(
+                LLMRateLimiter._next_wait(model_key, retry_after, deadline)
+            )
+
+    @staticmethod
+    def settle(model_key: str, reserved: int, used: int) -> None:
+        """
+        Corrige le seau de tokens avec l'usage réel d'un appel terminé
+        (`reserved` : valeur retournée par acquire).
+        """
+        _, tpm = LLMRateLimiter._limits(model_key)
+        if not tpm or reserved == used:
+            return
+        try:
+            if LLMRateLimiter._settle_script is None:
+                LLMRateLimiter._settle_script = get_redis().register_script(
+                    SETTLE_SCRIPT
+                )
+            LLMRateLimiter._settle_script(
+                keys=[f"{KEY_PREFIX}:{model_key}"], args=[tpm, reserved - used]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"LLM rate limiter unavailable: {str(e)}")
+
+    @staticmethod
+    async def asettle(model_key: str, reserved: int, used: int) -> None:
+        """Version asynchrone de settle."""
+        await sync_to_async(LLMRateLimiter.settle, thread_sensitive=False)(
+            model_key, reserved, used
+        )
@@ -0,0 +1,21 @@
+"""
+Client Redis partagé (même instance que le broker Celery par défaut).
+"""
+
+import redis
+from django.conf import settings
+
+_redis_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Retourne le client Redis du processus (pool de connexions partagé)."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _redis_client
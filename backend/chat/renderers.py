@@ -0,0 +1,35 @@
+"""
+Renderers et utilitaires pour les réponses Server-Sent Events (SSE).
+"""
+
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def format_sse_event(event: str, data) -> str:
+    """
+    Formate un événement SSE (`event: ...` / `data: ...`).
+    Les données sont sérialisées en JSON sur une seule ligne.
+    """
+    payload = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer `text/event-stream`.
+
+    Permet aux clients SSE (Accept: text/event-stream) de passer la négociation
+    de contenu de DRF. Les réponses non streamées (erreurs de validation, 404...)
+    sont renvoyées sous forme d'un unique événement `error`.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_sse_event("error", data).encode(self.charset)
@@ -0,0 +1,228 @@
+"""
+Résilience des appels LLM : retries, disjoncteur par modèle et chaîne de repli.
+
+Chaque modèle de LLM_MODELS peut définir :
+- `timeout` : délai maximal d'une tentative (secondes, LLM_TIMEOUT par défaut)
+- `max_retries` : nouvelles tentatives après une erreur transitoire
+  (LLM_MAX_RETRIES), espacées d'un backoff exponentiel avec jitter
+- `latency_slo` : latence cible (secondes, délai avant le premier token en
+  streaming) ; un appel plus lent compte comme un échec pour le disjoncteur
+- `fallbacks` : modèles essayés dans l'ordre quand le modèle principal a son
+  circuit ouvert, épuise ses tentatives ou son budget de débit
+
+Le disjoncteur s'ouvre après LLM_CIRCUIT_FAILURE_THRESHOLD échecs consécutifs
+et laisse passer un appel d'essai toutes les LLM_CIRCUIT_RESET_TIMEOUT
+secondes ; un succès le referme. Son état est propre à chaque processus.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+import httpx
+import openai
+from django.conf import settings
+from chatagentb.llm_config import get_model_config
+from chatagentb.metrics import LLM_CIRCUIT_OPEN, LLM_FALLBACKS, track_llm_call
+from .llm_router import LLMRouter
+from .rate_limiter import RateLimitExceeded
+
+# Erreurs transitoires : la même requête peut réussir plus tard
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # dont APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TransportError,
+    TimeoutError,
+)
+
+
+class LLMUnavailableError(Exception):
+    """Aucun modèle de la chaîne de repli n'a pu répondre."""
+
+    def __init__(self, model_key: str, retry_after: float, last_error=None):
+        self.model_key = model_key
+        self.retry_after = retry_after
+        self.last_error = last_error
+        reason = f" ({last_error})" if last_error else ""
+        super().__init__(f"Modèle {model_key} indisponible{reason}")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponentiel avec jitter complet avant la tentative `attempt`."""
+    ceiling = min(
+        settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_RETRY_BACKOFF_BASE * 2 ** (attempt - 1)
+    )
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Disjoncteur d'un modèle (état partagé par les threads du processus)."""
+
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self, model_key: str):
+        self.model_key = model_key
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_key: str) -> "CircuitBreaker":
+        with cls._breakers_lock:
+            breaker = cls._breakers.get(model_key)
+            if breaker is None:
+                breaker = cls._breakers[model_key] = cls(model_key)
+            return breaker
+
+    @classmethod
+    def reset_all(cls):
+        with cls._breakers_lock:
+            cls._breakers.clear()
+
+    def allow(self) -> bool:
+        """
+        True si un appel peut partir. Circuit ouvert : un seul appel d'essai
+        par période LLM_CIRCUIT_RESET_TIMEOUT.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= settings.LLM_CIRCUIT_RESET_TIMEOUT:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Secondes avant le prochain appel d'essai (0 si le circuit est fermé)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            elapsed = time.monotonic() - self.opened_at
+            return max(settings.LLM_CIRCUIT_RESET_TIMEOUT - elapsed, 0.0)
+
+    def record_success(self, latency: float):
+        slo = get_model_config(self.model_key).get("latency_slo")
+        if slo and latency > slo:
+            self.record_failure()
+            return
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+        LLM_CIRCUIT_OPEN.labels(model=self.model_key).set(0)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures < settings.LLM_CIRCUIT_FAILURE_THRESHOLD:
+                return
+            self.opened_at = time.monotonic()
+        LLM_CIRCUIT_OPEN.labels(model=self.model_key).set(1)
+
+
+class CallPlan:
+    """
+    Déroulé d'un appel LLM : itère sur les (modèle, délai) à tenter, du modèle
+    de l'agent à sa chaîne de repli. L'appelant attend `délai`, fait l'appel
+    dans le bloc attempt() puis signale l'issue par succeeded() ou failed() ; l'itération s'arrête au
+    premier succès. Si tout échoue, lève l'erreur adaptée (LLMUnavailableError,
+    RateLimitExceeded si seul le débit manquait, ou l'erreur non transitoire).
+
+    Utilisable depuis du code synchrone comme asynchrone : seule l'attente
+    est laissée à l'appelant.
+    """
+
+    def __init__(self, model_key: str):
+        self.primary = model_key
+        self.chain = [model_key] + list(get_model_config(model_key).get("fallbacks", []))
+        self.model_key = model_key
+        self.retries = 0
+        self.fallback_reason = None
+        self._error = None
+        self._started = None
+        self._endpoint = None
+
+    def __iter__(self):
+        last_error = None
+        for model_key in self.chain:
+            breaker = CircuitBreaker.get(model_key)
+            if not breaker.allow():
+                self._skip("circuit_open")
+                continue
+
+            self.model_key = model_key
+            max_retries = get_model_config(model_key).get(
+                "max_retries", settings.LLM_MAX_RETRIES
+            )
+            for attempt in range(max_retries + 1):
+                self._error = None
+                self._endpoint = None
+                yield model_key, backoff_delay(attempt) if attempt else 0.0
+                if self._error is None:
+                    return
+                last_error = self._error
+                if not isinstance(last_error, RETRYABLE_ERRORS) or not breaker.allow():
+                    break
+                if attempt < max_retries:
+                    self.retries += 1
+
+            if isinstance(last_error, RateLimitExceeded):
+                self._skip("rate_limited")
+            elif isinstance(last_error, RETRYABLE_ERRORS):
+                self._skip("error")
+            else:
+                raise last_error
+
+        if isinstance(last_error, RateLimitExceeded):
+            raise last_error
+        retry_after = min(CircuitBreaker.get(key).retry_after() for key in self.chain)
+        raise LLMUnavailableError(self.primary, retry_after, last_error)
+
+    def _skip(self, reason: str):
+        """Passe au modèle suivant de la chaîne (la première raison est gardée)."""
+        if self.fallback_reason is None:
+            self.fallback_reason = reason
+
+    @contextmanager
+    def attempt(self, endpoint_key: str):
+        """
+        Bloc de la requête à l'endpoint choisi (jusqu'au dernier morceau en
+        streaming) : l'appel est compté parmi les appels en cours de
+        l'endpoint et mesuré (track_llm_call) jusqu'à la sortie du bloc,
+        même sur annulation.
+        """
+        self._started = time.perf_counter()
+        self._endpoint = endpoint_key
+        with LLMRouter.in_flight(endpoint_key), track_llm_call(self.model_key):
+            yield
+
+    def succeeded(self):
+        """Réponse reçue (premier morceau en streaming)."""
+        latency = time.perf_counter() - self._started
+        LLMRouter.record(self._endpoint, latency=latency)
+        self._endpoint = None
+        CircuitBreaker.get(self.model_key).record_success(latency)
+        if self.model_key != self.primary:
+            LLM_FALLBACKS.labels(model=self.primary, fallback=self.model_key).inc()
+
+    def failed(self, error: Exception):
+        self._error = error
+        transient = isinstance(error, RETRYABLE_ERRORS)
+        # Erreur levée avant la requête (budget de débit...) : pas d'endpoint
+        if self._endpoint is not None:
+            LLMRouter.record(self._endpoint, error=transient)
+            self._endpoint = None
+        if transient:
+            CircuitBreaker.get(self.model_key).record_failure()
+
+    def metadata(self) -> Dict:
+        """Champs ajoutés aux métadonnées du message (repli et retries)."""
+        metadata = {}
+        if self.model_key != self.primary:
+            metadata["fallback_from"] = self.primary
+            metadata["fallback_reason"] = self.fallback_reason
+        if self.retries:
+            metadata["retries"] = self.retries
+        return metadata
@@ -0,0 +1,118 @@
+"""
+Cache des réponses LLM (correspondance exacte) pour les agents déterministes.
+
+Activé par agent (`Agent.enable_response_cache`). La clé est un hash du modèle,
+de la température, de max_tokens, du prompt système et de l'historique
+normalisé. Les entrées expirent après un TTL et leur nombre est borné
+(éviction des plus anciennes). Les compteurs de hits/misses sont partagés
+par tous les processus via Redis.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+import redis
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "chat:llm-cache"
+INDEX_KEY = f"{KEY_PREFIX}:index"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+# Écrit l'entrée, l'indexe par date d'insertion et évince les plus anciennes
+# au-delà de la taille maximale.
+SET_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local evicted = redis.call('ZPOPMIN', KEYS[2], excess)
+    for i = 1, #evicted, 2 do
+        redis.call('DEL', evicted[i])
+    end
+end
+return 1
+"""
+
+
+class LLMResponseCache:
+    """Cache Redis des réponses LLM."""
+
+    _set_script = None
+
+    @staticmethod
+    def make_key(agent, conversation_history: List[Dict]) -> str:
+        """Hash de la configuration de l'agent et de l'historique normalisé."""
+        normalized = [
+            {"role": msg["role"], "content": " ".join(msg["content"].split())}
+            for msg in conversation_history
+        ]
+        payload = json.dumps(
+            {
+                "model": agent.llm_model,
+                "temperature": agent.temperature,
+                "max_tokens": agent.max_tokens,
+                "system_prompt": agent.system_prompt,
+                "history": normalized,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{digest}"
+
+    @staticmethod
+    def get(agent, conversation_history: List[Dict]) -> Optional[str]:
+        """Retourne la réponse en cache ou None (et incrémente les compteurs)."""
+        key = LLMResponseCache.make_key(agent, conversation_history)
+        try:
+            client = get_redis()
+            content = client.get(key)
+            field = "hits" if content is not None else "misses"
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(STATS_KEY, field, 1)
+            pipe.hincrby(STATS_KEY, f"{field}:agent:{agent.pk}", 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"LLM response cache unavailable: {str(e)}")
+            return None
+        return content
+
+    @staticmethod
+    def set(agent, conversation_history: List[Dict], content: str) -> None:
+        """Met en cache une réponse."""
+        key = LLMResponseCache.make_key(agent, conversation_history)
+        try:
+            if LLMResponseCache._set_script is None:
+                LLMResponseCache._set_script = get_redis().register_script(SET_SCRIPT)
+            LLMResponseCache._set_script(
+                keys=[key, INDEX_KEY],
+                args=[
+                    content,
+                    settings.LLM_RESPONSE_CACHE_TTL,
+                    time.time(),
+                    settings.LLM_RESPONSE_CACHE_MAX_ENTRIES,
+                ],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"LLM response cache unavailable: {str(e)}")
+
+    @staticmethod
+    def stats() -> Dict:
+        """Compteurs de hits/misses (globaux et par agent) et nombre d'entrées."""
+        try:
+            client = get_redis()
+            counters = {k: int(v) for k, v in client.hgetall(STATS_KEY).items()}
+            # Les entrées expirées restent indexées jusqu'à leur éviction
+            client.zremrangebyscore(
+                INDEX_KEY, "-inf", time.time() - settings.LLM_RESPONSE_CACHE_TTL
+            )
+            counters["entries"] = client.zcard(INDEX_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"LLM response cache unavailable: {str(e)}")
+            return {}
+        return counters
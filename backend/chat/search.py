@@ -0,0 +1,160 @@
+"""
+Recherche plein texte dans les messages et les titres de conversation.
+
+Les vecteurs `search_vector` (configuration `french`) sont tenus à jour par
+des triggers Postgres et indexés en GIN : une recherche ne lit que les
+lignes qui correspondent, sans parcourir la table des messages. Les pages
+sont découpées sans COUNT (limit + 1 lignes, comme pagination.get_message_page).
+"""
+
+from collections import namedtuple
+from html import escape
+from typing import Iterable, List, Optional
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F
+from .folder_tree import FolderTreeCache
+from .models import SEARCH_CONFIG, Conversation, Message
+
+SearchPage = namedtuple("SearchPage", ["results", "has_more"])
+
+# Délimiteurs des termes trouvés dans les extraits (caractères à usage privé,
+# absents des messages) : remplacés par <mark> après échappement HTML
+_HIGHLIGHT_START = "\ue000"
+_HIGHLIGHT_STOP = "\ue001"
+
+
+def parse_query(text: str) -> SearchQuery:
+    """Requête au format « moteur de recherche » : "expression exacte", OR, -mot."""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+
+def _headline(field: str, query: SearchQuery, **options) -> SearchHeadline:
+    return SearchHeadline(
+        field,
+        query,
+        config=SEARCH_CONFIG,
+        start_sel=_HIGHLIGHT_START,
+        stop_sel=_HIGHLIGHT_STOP,
+        **options,
+    )
+
+
+def _highlight(headline: str) -> str:
+    """Extrait échappé, termes trouvés entourés de <mark>."""
+    return (
+        escape(headline)
+        .replace(_HIGHLIGHT_START, "<mark>")
+        .replace(_HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def folder_scope(user_id: int, folder_id: int) -> Optional[List[int]]:
+    """
+    Identifiants du dossier et de tous ses sous-dossiers (arbre en cache),
+    None si le dossier n'appartient pas à l'utilisateur.
+    """
+    node = FolderTreeCache.find(FolderTreeCache.get(user_id), folder_id)
+    if node is None:
+        return None
+    ids, stack = [], [node]
+    while stack:
+        node = stack.pop()
+        ids.append(node["id"])
+        stack.extend(node["subfolders"])
+    return ids
+
+
+def search_messages(
+    user,
+    text: str,
+    folder_ids: Optional[Iterable[int]] = None,
+    conversation_id: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> SearchPage:
+    """
+    Messages des conversations de l'utilisateur correspondant à `text`, par
+    pertinence décroissante, avec un extrait surligné (`headline`).
+    """
+    limit = limit or settings.SEARCH_PAGE_SIZE
+    query = parse_query(text)
+
+    queryset = Message.objects.filter(conversation__user=user, search_vector=query)
+    if folder_ids is not None:
+        queryset = queryset.filter(conversation__folder_id__in=folder_ids)
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+
+    # L'extrait n'est calculé que pour les lignes de la page (après LIMIT)
+    rows = list(
+        queryset.annotate(
+            rank=SearchRank(F("search_vector"), query),
+            headline=_headline(
+                "content", query, max_words=35, min_words=15, max_fragments=2
+            ),
+        )
+        .order_by("-rank", "-created_at", "-id")
+        .values(
+            "id",
+            "conversation_id",
+            "conversation__title",
+            "role",
+            "agent_id",
+            "created_at",
+            "rank",
+            "headline",
+        )[offset : offset + limit + 1]
+    )
+
+    results = [
+        {
+            "id": row["id"],
+            "conversation_id": row["conversation_id"],
+            "conversation_title": row["conversation__title"],
+            "role": row["role"],
+            "agent": row["agent_id"],
+            "created_at": row["created_at"],
+            "rank": round(row["rank"], 4),
+            "headline": _highlight(row["headline"]),
+        }
+        for row in rows[:limit]
+    ]
+    return SearchPage(results=results, has_more=len(rows) > limit)
+
+
+def search_conversations(
+    user,
+    text: str,
+    folder_ids: Optional[Iterable[int]] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    """Conversations de l'utilisateur dont le titre correspond à `text`."""
+    limit = limit or settings.SEARCH_CONVERSATIONS_LIMIT
+    query = parse_query(text)
+
+    queryset = Conversation.objects.filter(user=user, search_vector=query)
+    if folder_ids is not None:
+        queryset = queryset.filter(folder_id__in=folder_ids)
+
+    rows = (
+        queryset.annotate(
+            rank=SearchRank(F("search_vector"), query),
+            headline=_headline("title", query, highlight_all=True),
+        )
+        .order_by("-rank", "-updated_at")
+        .values("id", "folder_id", "message_count", "updated_at", "rank", "headline")[
+            :limit
+        ]
+    )
+    return [
+        {
+            "id": row["id"],
+            "title": _highlight(row["headline"]),
+            "folder": row["folder_id"],
+            "message_count": row["message_count"],
+            "updated_at": row["updated_at"],
+            "rank": round(row["rank"], 4),
+        }
+        for row in rows
+    ]
@@ -4,6 +4,7 @@ Serializers pour l'API de chat.
 
 from rest_framework import serializers
 from .models import Conversation, Message, Folder
+from .pagination import get_message_page
 from agents.serializers import AgentListSerializer
 
 
@@ -28,12 +29,21 @@ class FolderSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
     def get_subfolders(self, obj):
+        # Arbre préchargé par FolderTreeCache.build : aucune requête
+        children = self.context.get("folder_children")
+        if children is not None:
+            return FolderSerializer(
+                children.get(obj.id, []), many=True, context=self.context
+            ).data
         if hasattr(obj, "subfolders"):
             subfolders = obj.subfolders.all()
             return FolderSerializer(subfolders, many=True).data
         return []
 
     def get_conversations_count(self, obj):
+        counts = self.context.get("conversation_counts")
+        if counts is not None:
+            return counts.get(obj.id, 0)
         return obj.conversations.count()
 
 
@@ -61,9 +71,9 @@ class MessageSerializer(serializers.ModelSerializer):
 class ConversationSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Conversation."""
 
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    has_more = serializers.SerializerMethodField()
     agents_details = AgentListSerializer(source="agents", many=True, read_only=True)
-    message_count = serializers.IntegerField(source="messages.count", read_only=True)
 
     class Meta:
         model = Conversation
@@ -75,19 +85,32 @@ class ConversationSerializer(serializers.ModelSerializer):
             "agents",
             "agents_details",
             "messages",
+            "has_more",
             "message_count",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at", "message_count"]
 
+    def _get_message_page(self, obj):
+        # Seule la page la plus récente est embarquée ; les messages plus anciens
+        # sont servis par /conversations/<id>/messages/?before=<id>
+        if not hasattr(obj, "_message_page"):
+            obj._message_page = get_message_page(obj.id)
+        return obj._message_page
+
+    def get_messages(self, obj):
+        return MessageSerializer(self._get_message_page(obj).messages, many=True).data
+
+    def get_has_more(self, obj):
+        return self._get_message_page(obj).has_more
+
 
 class ConversationListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour la liste des conversations."""
 
     agents_details = AgentListSerializer(source="agents", many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
-    message_count = serializers.IntegerField(source="messages.count", read_only=True)
     folder_name = serializers.CharField(
         source="folder.name", read_only=True, allow_null=True
     )
@@ -106,14 +129,15 @@ class ConversationListSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        read_only_fields = ["message_count"]
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
-        if last_msg:
+        # Champs dénormalisés : aucune requête sur les messages
+        if obj.last_message_at:
             return {
-                "content": last_msg.content[:100],
-                "role": last_msg.role,
-                "created_at": last_msg.created_at,
+                "content": obj.last_message_preview,
+                "role": obj.last_message_role,
+                "created_at": obj.last_message_at,
             }
         return None
 
@@ -124,6 +148,7 @@ class ChatMessageInputSerializer(serializers.Serializer):
     message = serializers.CharField()
     agent_id = serializers.IntegerField()
     conversation_id = serializers.IntegerField(required=False, allow_null=True)
+    background = serializers.BooleanField(required=False, default=False)
 
 
 class AutoChatInputSerializer(serializers.Serializer):
@@ -133,3 +158,49 @@ class AutoChatInputSerializer(serializers.Serializer):
     agent_b_id = serializers.IntegerField()
     initial_message = serializers.CharField()
     iterations = serializers.IntegerField(min_value=1, max_value=50)
+
+
+class AutoChatMatrixInputSerializer(serializers.Serializer):
+    """Serializer pour la matrice Auto-Chat (agents métier × agents clients)."""
+
+    metier_agent_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=50
+    )
+    client_agent_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=50
+    )
+    iterations = serializers.IntegerField(min_value=1, max_value=50)
+    concurrency = serializers.IntegerField(min_value=1, max_value=32, required=False)
+
+
+# Nombre maximal d'éléments par opération groupée
+BULK_MAX_ITEMS = 1000
+
+
+class FolderOrderItemSerializer(serializers.Serializer):
+    """Position d'un dossier pour la réorganisation groupée."""
+
+    id = serializers.IntegerField()
+    order = serializers.IntegerField()
+
+
+class FolderReorderSerializer(serializers.Serializer):
+    """Serializer pour la réorganisation groupée des dossiers."""
+
+    folders = FolderOrderItemSerializer(many=True, max_length=BULK_MAX_ITEMS)
+
+
+class BulkConversationSerializer(serializers.Serializer):
+    """Serializer pour les opérations groupées sur les conversations."""
+
+    conversation_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
+
+
+class BulkConversationMoveSerializer(BulkConversationSerializer):
+    """Serializer pour le déplacement groupé de conversations."""
+
+    folder_id = serializers.IntegerField(required=False, allow_null=True)
@@ -0,0 +1,45 @@
+"""
+Signaux de l'application chat.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from agents.models import Agent
+from .folder_tree import FolderTreeCache
+from .history_cache import ConversationHistoryCache
+from .llm_service import LLMService
+from .models import Conversation, Folder, Message
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_agent_llm(sender, instance, **kwargs):
+    """Invalide le client LLM en cache lorsqu'un agent est modifié ou supprimé."""
+    LLMService.invalidate_agent(instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def append_message_to_history_cache(sender, instance, created, **kwargs):
+    """Ajoute le nouveau message à l'historique en cache, après commit."""
+    if created:
+        transaction.on_commit(lambda: ConversationHistoryCache.append(instance))
+
+
+@receiver(post_delete, sender=Conversation)
+def invalidate_history_cache(sender, instance, **kwargs):
+    """Supprime l'historique en cache d'une conversation supprimée."""
+    ConversationHistoryCache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Folder)
+@receiver(post_delete, sender=Folder)
+@receiver(post_save, sender=Conversation)
+@receiver(post_delete, sender=Conversation)
+def invalidate_folder_tree(sender, instance, **kwargs):
+    """
+    Invalide l'arbre des dossiers en cache de l'utilisateur, après commit
+    (une lecture concurrente ne doit pas remettre en cache l'état précédent).
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: FolderTreeCache.invalidate(user_id))
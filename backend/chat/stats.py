@@ -0,0 +1,77 @@
+"""
+Statistiques d'usage des LLM calculées à partir des métadonnées des messages IA
+(latence, TTFT, tokens), pour le dimensionnement de la capacité.
+"""
+
+from django.db.models import Aggregate, Count, FloatField, IntegerField, Q, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from .models import Message
+
+
+class PercentileCont(Aggregate):
+    """Percentile continu PostgreSQL : percentile_cont(p) WITHIN GROUP (ORDER BY ...)."""
+
+    function = "percentile_cont"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _metadata_number(key, output_field=None):
+    return Cast(KT(f"metadata__{key}"), output_field or FloatField())
+
+
+def _aggregates():
+    latency = _metadata_number("latency_ms")
+    ttft = _metadata_number("ttft_ms")
+    return {
+        "messages": Count("id"),
+        "cache_hits": Count("id", filter=Q(metadata__cache_hit=True)),
+        "latency_p50_ms": PercentileCont(latency, 0.5),
+        "latency_p95_ms": PercentileCont(latency, 0.95),
+        "ttft_p50_ms": PercentileCont(ttft, 0.5),
+        "ttft_p95_ms": PercentileCont(ttft, 0.95),
+        "prompt_tokens": Sum(_metadata_number("prompt_tokens", IntegerField())),
+        "completion_tokens": Sum(_metadata_number("completion_tokens", IntegerField())),
+        "total_tokens": Sum(_metadata_number("total_tokens", IntegerField())),
+    }
+
+
+def llm_usage_stats(since, until=None):
+    """
+    Agrège les métadonnées des messages IA créés dans la fenêtre [since, until[ :
+    au global, par agent et par modèle.
+    """
+    queryset = Message.objects.filter(
+        role="ai", created_at__gte=since, metadata__has_key="latency_ms"
+    )
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    # Pas de tri par défaut (created_at) dans le GROUP BY
+    queryset = queryset.order_by()
+
+    by_agent = (
+        queryset.values("agent_id", "agent__name")
+        .annotate(**_aggregates())
+        .order_by("-messages")
+    )
+    by_model = (
+        queryset.annotate(model=KT("metadata__model"))
+        .values("model")
+        .annotate(**_aggregates())
+        .order_by("-messages")
+    )
+
+    return {
+        "since": since,
+        "until": until,
+        "total": queryset.aggregate(**_aggregates()),
+        "by_agent": [
+            {"agent_id": row.pop("agent_id"), "agent_name": row.pop("agent__name"), **row}
+            for row in by_agent
+        ],
+        "by_model": list(by_model),
+    }
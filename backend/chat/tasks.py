@@ -3,135 +3,257 @@ Tâches Celery pour les opérations asynchrones.
 """
 
 import logging
+import time
+from collections import defaultdict
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 from agents.models import Agent
-from chat.models import Conversation, Message
+from chat.models import AutoChatRun, Conversation, Message
+from chat.history_cache import ConversationHistoryCache
 from chat.llm_service import LLMService
+from chat.rate_limiter import RateLimitExceeded
+from chat.serializers import MessageSerializer
+from chat.title_queue import TitleQueue
 from agents.models import Agent
 
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Intervalle minimal (secondes) entre deux publications du résultat partiel
+PARTIAL_RESULT_INTERVAL = 0.5
+
 
 @shared_task
-def generate_conversation_title(conversation_id: int, agent_id: int):
+def generate_pending_titles():
     """
-    Génère un titre pour une conversation en utilisant le premier message.
+    Tâche périodique (Celery Beat) : titre un lot de conversations de la file
+    TitleQueue en un seul appel LLM sur le modèle CHAT_TITLE_MODEL.
+    Les conversations non titrées (erreur, réponse incomplète) sont remises en file.
     """
+    conversation_ids = TitleQueue.pop_batch(settings.CHAT_TITLE_BATCH_SIZE)
+    if not conversation_ids:
+        return {"titled": 0}
+
+    # Déjà titrées entre-temps ou supprimées : ignorées
+    conversations = Conversation.objects.filter(
+        id__in=conversation_ids, title=""
+    ).in_bulk()
+    if not conversations:
+        return {"titled": 0}
+
+    # Les 3 premiers messages de chaque conversation, en une requête
+    first_messages = (
+        Message.objects.filter(conversation_id__in=conversations)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("conversation_id"),
+                order_by=[F("created_at").asc(), F("id").asc()],
+            )
+        )
+        .filter(position__lte=3)
+        .order_by("conversation_id", "position")
+    )
+    histories = defaultdict(list)
+    for msg in first_messages:
+        histories[msg.conversation_id].append({"role": msg.role, "content": msg.content})
+
     try:
-        logger.info(f"Generating title for conversation {conversation_id}")
+        titles = LLMService.generate_titles(
+            dict(histories), rate_limit_wait=settings.LLM_RATE_LIMIT_TASK_WAIT
+        )
+    except Exception as e:
+        logger.error(f"Error generating titles: {str(e)}", exc_info=True)
+        TitleQueue.requeue(histories)
+        return {"titled": 0, "error": str(e)}
 
-        conversation = Conversation.objects.get(id=conversation_id)
+    for conversation_id, title in titles.items():
+        conversations[conversation_id].title = title
+    Conversation.objects.bulk_update(
+        [conversations[conversation_id] for conversation_id in titles], ["title"]
+    )
 
-        # Si la conversation a déjà un titre, ne rien faire
-        if conversation.title:
-            return f"Conversation {conversation_id} a déjà un titre"
-
-        # Récupérer le premier message humain
-        # Récupérer les 3 premiers messages
-        messages = Message.objects.filter(conversation=conversation).order_by(
-            "created_at"
-        )[:3]
-
-        if agent_id:
-            try:
-                agent = Agent.objects.get(id=agent_id)
-                logger.info(f"Using provided agent: {agent.name} (ID: {agent_id})")
-            except Agent.DoesNotExist:
-                logger.error(
-                    f"Agent {agent_id} not found, falling back to conversation.agents.first()"
-                )
-                agent = conversation.agents.first()
+    TitleQueue.requeue(set(histories) - set(titles))
+    logger.info(f"Generated {len(titles)}/{len(histories)} conversation titles")
+    return {"titled": len(titles), "requeued": len(histories) - len(titles)}
+
+
+def _start_auto_chat_run(
+    task_id, agent_a, agent_b, initial_message, iterations, user, matrix_id=""
+):
+    """
+    Retourne l'exécution associée à la tâche, en la créant au premier passage
+    avec sa conversation et le message initial (une seule transaction).
+    """
+    with transaction.atomic():
+        run, created = AutoChatRun.objects.select_for_update().get_or_create(
+            task_id=task_id,
+            defaults={
+                "user": user,
+                "agent_a": agent_a,
+                "agent_b": agent_b,
+                "initial_message": initial_message,
+                "iterations": iterations,
+                "matrix_id": matrix_id,
+            },
+        )
+
+        if run.conversation_id is None:
+            conversation = Conversation.objects.create(
+                title=f"AUTO: {agent_a.name} ↔ {agent_b.name}",
+                conversation_type="auto",
+                user=user,
+            )
+            conversation.agents.add(agent_a, agent_b)
+
+            # Message initial
+            Message.objects.create(
+                conversation=conversation,
+                role="ai",
+                content=run.initial_message,
+                is_auto_chat=True,
+            )
+            run.conversation = conversation
         else:
-            agent = conversation.agents.first()
             logger.info(
-                f"Using conversation's first agent: {agent.name if agent else 'None'}"
+                f"Resuming auto-chat {task_id} at turn "
+                f"{run.completed_turns + 1}/{run.iterations}"
             )
 
-        # Vérifier qu'on a bien un agent
-        if not agent:
-            error_msg = f"No agent found for conversation {conversation_id}"
-            logger.error(error_msg)
-            return f"Erreur: {error_msg}"
-
-        # Générer le titre
-        history = []
-        for msg in messages:
-            history.append(
-                {
-                    "role": msg.role,  # ✅ Dict avec 'role' et 'content'
-                    "content": msg.content,
-                }
-            )
+        run.status = "running"
+        run.attempts += 1
+        run.save(update_fields=["conversation", "status", "attempts", "updated_at"])
 
-        # Appel de generate_title
-        title = LLMService.generate_title(agent, history)
+    return run
 
-        # Sauvegarder
-        conversation.title = title
-        conversation.save(update_fields=["title"])
 
-        return f"Titre généré pour la conversation {conversation_id}: {title}"
+def _load_auto_chat_history(conversation):
+    """
+    Reconstruit l'historique d'un Auto-Chat depuis ses messages enregistrés :
+    chaque réponse est ajoutée comme message IA puis comme prompt pour l'autre agent.
+    """
+    messages = list(
+        conversation.messages.order_by("created_at", "id").values_list(
+            "content", flat=True
+        )
+    )
+    history = [{"role": "ai", "content": messages[0]}]
+    for content in messages[1:]:
+        history.append({"role": "ai", "content": content})
+        history.append({"role": "human", "content": content})
+    return history
 
-    except Conversation.DoesNotExist:
-        return f"Conversation {conversation_id} introuvable"
-    except Exception as e:
-        return f"Erreur lors de la génération du titre: {str(e)}"
 
+def _auto_chat_progress(run):
+    return {
+        "run_id": run.id,
+        "conversation_id": run.conversation_id,
+        "turn": run.completed_turns,
+        "iterations": run.iterations,
+        "tokens": run.total_tokens,
+    }
 
-@shared_task
+
+def _auto_chat_result(run):
+    agent_a_name = run.agent_a.name if run.agent_a else "?"
+    agent_b_name = run.agent_b.name if run.agent_b else "?"
+    return {
+        "status": "success",
+        "run_id": run.id,
+        "conversation_id": run.conversation_id,
+        "total_messages": run.completed_turns + 1,
+        "total_tokens": run.total_tokens,
+        "message": f"Auto-chat terminé: {run.completed_turns} échanges entre {agent_a_name} et {agent_b_name}",
+    }
+
+
+def _fail_auto_chat_run(run, error: str):
+    """Marque l'exécution en échec et retourne le résultat d'erreur de la tâche."""
+    run.status = "failed"
+    run.error = error
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return {"status": "error", "run_id": run.id, "message": f"Erreur: {error}"}
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=settings.AUTO_CHAT_SOFT_TIME_LIMIT,
+)
 def run_auto_chat(
+    self,
     agent_a_id: int,
     agent_b_id: int,
     initial_message: str,
     iterations: int,
     user_id: int,
+    matrix_id: str = "",
 ):
     """
     Exécute une conversation automatique entre deux agents.
+
+    Chaque tour enregistre son message et le point de reprise (AutoChatRun) dans
+    une même transaction. Une nouvelle exécution de la tâche (retry, worker
+    perdu, limite de temps atteinte) reprend après le dernier tour enregistré.
+    La progression est publiée dans le backend de résultats (état PROGRESS).
     """
     try:
         agent_a = Agent.objects.get(id=agent_a_id)
         agent_b = Agent.objects.get(id=agent_b_id)
         user = User.objects.get(id=user_id)
+    except Agent.DoesNotExist:
+        return {"status": "error", "message": "Un ou plusieurs agents introuvables"}
+    except User.DoesNotExist:
+        return {"status": "error", "message": "Utilisateur introuvable"}
 
-        # Créer la conversation
-        conversation = Conversation.objects.create(
-            title=f"AUTO: {agent_a.name} ↔ {agent_b.name}",
-            conversation_type="auto",
-            user=user,
-        )
-        conversation.agents.add(agent_a, agent_b)
-
-        # Message initial
-        Message.objects.create(
-            conversation=conversation,
-            role="ai",
-            content=initial_message,
-            is_auto_chat=True,
-        )
+    run = _start_auto_chat_run(
+        self.request.id, agent_a, agent_b, initial_message, iterations, user, matrix_id
+    )
+    history = _load_auto_chat_history(run.conversation)
 
-        # Historique de conversation
-        history = [{"role": "ai", "content": initial_message}]
+    try:
+        # Alternance entre les deux agents, à partir du dernier tour enregistré
+        for i in range(run.completed_turns, run.iterations):
+            self.update_state(state="PROGRESS", meta=_auto_chat_progress(run))
 
-        # Alternance entre les deux agents
-        for i in range(iterations):
-            # Agent A répond
             current_agent = agent_a if i % 2 == 1 else agent_b
-
-            response = LLMService.generate_response(current_agent, history)
-
-            # Sauvegarder le message
-            Message.objects.create(
-                conversation=conversation,
-                role="ai",
-                content=response,
-                agent=current_agent,
-                is_auto_chat=True,
-                metadata={"iteration": i + 1},
+            result = LLMService.generate_response_with_metadata(
+                current_agent,
+                history,
+                rate_limit_wait=settings.LLM_RATE_LIMIT_TASK_WAIT,
             )
+            response = result["content"]
+
+            # Message et point de reprise dans la même transaction
+            with transaction.atomic():
+                Message.objects.create(
+                    conversation=run.conversation,
+                    role="ai",
+                    content=response,
+                    agent=current_agent,
+                    is_auto_chat=True,
+                    metadata={"iteration": i + 1, **result["metadata"]},
+                )
+                run.completed_turns = i + 1
+                run.total_tokens += result["metadata"]["total_tokens"]
+                run.stalled_retries = 0
+                run.save(
+                    update_fields=[
+                        "completed_turns",
+                        "total_tokens",
+                        "stalled_retries",
+                        "updated_at",
+                    ]
+                )
 
             # Ajouter à l'historique
             history.append({"role": "ai", "content": response})
@@ -139,16 +261,116 @@ def run_auto_chat(
             # Préparer le prochain tour (le message de l'IA devient le prompt pour l'autre agent)
             history.append({"role": "human", "content": response})
 
+    # Les relances sont comptées sur le point de reprise et non par
+    # self.request.retries (qui cumule toutes les causes) : max_retries=None
+    except (SoftTimeLimitExceeded, RateLimitExceeded) as e:
+        # Limite de temps : relance immédiate depuis le dernier tour ; débit
+        # épuisé : reprise une fois le seau rechargé. Bornées tant qu'aucun
+        # tour n'aboutit.
+        run.stalled_retries += 1
+        run.save(update_fields=["stalled_retries", "updated_at"])
+        if run.stalled_retries > settings.AUTO_CHAT_MAX_STALLED_RETRIES:
+            return _fail_auto_chat_run(
+                run, f"Aucun tour terminé après {run.stalled_retries - 1} relances"
+            )
+        if isinstance(e, RateLimitExceeded):
+            logger.warning(f"Auto-chat {run.task_id} rate limited, retrying: {str(e)}")
+            countdown = e.retry_after
+        else:
+            logger.warning(f"Auto-chat {run.task_id} hit its time limit, continuing")
+            countdown = 0
+        raise self.retry(countdown=countdown, max_retries=None)
+
+    except Exception as e:
+        run.error_retries += 1
+        run.save(update_fields=["error_retries", "updated_at"])
+        if run.error_retries <= settings.AUTO_CHAT_MAX_RETRIES:
+            countdown = settings.AUTO_CHAT_RETRY_DELAY * 2 ** (run.error_retries - 1)
+            logger.warning(
+                f"Auto-chat {run.task_id} failed at turn {run.completed_turns + 1}, "
+                f"retrying in {countdown}s: {str(e)}"
+            )
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+
+        logger.error(f"Auto-chat {run.task_id} failed: {str(e)}", exc_info=True)
+        return _fail_auto_chat_run(run, str(e))
+
+    run.status = "completed"
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "finished_at", "updated_at"])
+
+    return _auto_chat_result(run)
+
+
+@shared_task(bind=True)
+def generate_ai_response(self, conversation_id: int, agent_id: int):
+    """
+    Génère la réponse de l'agent pour le dernier message d'une conversation
+    (mode `background` de send_message).
+
+    Le texte partiel est publié dans le backend de résultats (état PROGRESS)
+    au fil du streaming.
+    """
+    try:
+        conversation = Conversation.objects.get(id=conversation_id)
+        agent = Agent.objects.get(id=agent_id)
+    except (Conversation.DoesNotExist, Agent.DoesNotExist):
         return {
-            "status": "success",
-            "conversation_id": conversation.id,
-            "total_messages": iterations + 1,
-            "message": f"Auto-chat terminé: {iterations} échanges entre {agent_a.name} et {agent_b.name}",
+            "status": "error",
+            "conversation_id": conversation_id,
+            "message": "Conversation ou agent introuvable",
         }
 
-    except Agent.DoesNotExist:
-        return {"status": "error", "message": "Un ou plusieurs agents introuvables"}
-    except User.DoesNotExist:
-        return {"status": "error", "message": "Utilisateur introuvable"}
+    history = ConversationHistoryCache.get(conversation_id)
+
+    # Mettre la conversation en file de titrage à partir du cinquième message
+    if len(history) >= 5 and not conversation.title:
+        TitleQueue.enqueue(conversation_id)
+
+    chunks = []
+    metadata = {}
+    last_update = 0.0
+    try:
+        for chunk in LLMService.stream_response(
+            agent, history, metadata, rate_limit_wait=settings.LLM_RATE_LIMIT_TASK_WAIT
+        ):
+            chunks.append(chunk)
+            now = time.monotonic()
+            if now - last_update >= PARTIAL_RESULT_INTERVAL:
+                self.update_state(
+                    state="PROGRESS",
+                    meta={"conversation_id": conversation_id, "partial": "".join(chunks)},
+                )
+                last_update = now
     except Exception as e:
-        return {"status": "error", "message": f"Erreur: {str(e)}"}
+        logger.error(f"Error generating LLM response: {str(e)}", exc_info=True)
+        return {
+            "status": "error",
+            "conversation_id": conversation_id,
+            "message": f"Erreur lors de la génération de la réponse: {str(e)}",
+        }
+
+    ai_message = Message.objects.create(
+        conversation=conversation,
+        role="ai",
+        content="".join(chunks),
+        agent=agent,
+        metadata=metadata,
+    )
+
+    return {
+        "status": "success",
+        "conversation_id": conversation_id,
+        "ai_message": MessageSerializer(ai_message).data,
+    }
+
+
+@shared_task
+def summarize_auto_chat_matrix(matrix_id: str):
+    """
+    Callback du chord d'une matrice Auto-Chat : agrège les exécutions
+    (durée, tours, tokens par paire).
+    """
+    from chat.auto_chat_matrix import AutoChatMatrix
+
+    return AutoChatMatrix.summarize(matrix_id)
@@ -0,0 +1,56 @@
+"""
+File d'attente Redis des conversations à titrer.
+
+Un ensemble Redis (SADD) : une conversation n'y figure qu'une fois, quel que
+soit le nombre de requêtes concurrentes qui l'ajoutent. La tâche périodique
+generate_pending_titles en retire un lot (SPOP) et titre tout le lot en un
+seul appel LLM.
+"""
+
+import logging
+from typing import Iterable, List
+import redis
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TITLE_QUEUE_KEY = "chat:title-queue"
+
+
+class TitleQueue:
+    """Conversations en attente de génération de titre."""
+
+    @staticmethod
+    def enqueue(conversation_id: int) -> None:
+        try:
+            get_redis().sadd(TITLE_QUEUE_KEY, conversation_id)
+        except redis.RedisError as e:
+            logger.warning(f"Could not enqueue conversation for title: {str(e)}")
+
+    @staticmethod
+    def requeue(conversation_ids: Iterable[int]) -> None:
+        """Remet en file les conversations d'un lot non titrées."""
+        conversation_ids = list(conversation_ids)
+        if not conversation_ids:
+            return
+        try:
+            get_redis().sadd(TITLE_QUEUE_KEY, *conversation_ids)
+        except redis.RedisError as e:
+            logger.warning(f"Could not requeue conversations for title: {str(e)}")
+
+    @staticmethod
+    def pop_batch(size: int) -> List[int]:
+        """Retire au plus `size` conversations de la file."""
+        try:
+            members = get_redis().spop(TITLE_QUEUE_KEY, size)
+        except redis.RedisError as e:
+            logger.warning(f"Title queue unavailable: {str(e)}")
+            return []
+        return [int(member) for member in members or []]
+
+    @staticmethod
+    def size() -> int:
+        try:
+            return get_redis().scard(TITLE_QUEUE_KEY)
+        except redis.RedisError:
+            return 0
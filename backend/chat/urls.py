@@ -5,6 +5,7 @@ URLs pour l'API de chat.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ConversationViewSet, MessageViewSet, FolderViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r"conversations", ConversationViewSet, basename="conversation")
@@ -13,4 +14,25 @@ router.register(r"folders", FolderViewSet, basename="folder")
 
 urlpatterns = [
     path("", include(router.urls)),
+    # Chemin asynchrone natif (ORM async + ainvoke), servi par uvicorn
+    path(
+        "async/conversations/",
+        async_views.conversation_list,
+        name="async-conversation-list",
+    ),
+    path(
+        "async/conversations/<int:pk>/",
+        async_views.conversation_detail,
+        name="async-conversation-detail",
+    ),
+    path(
+        "async/conversations/send_message/",
+        async_views.send_message,
+        name="async-send-message",
+    ),
+    path(
+        "async/conversations/send_message_stream/",
+        async_views.send_message_stream,
+        name="async-send-message-stream",
+    ),
 ]
@@ -3,12 +3,22 @@ Views pour l'API de chat.
 """
 
 import logging
+import math
+from datetime import timedelta
+from celery.result import AsyncResult
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Prefetch
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from agents.models import Agent
+from chatagentb.pagination import EstimatedCountCursorPagination
 from .models import Conversation, Message, Folder
 from .serializers import (
     ConversationSerializer,
@@ -16,10 +26,25 @@ from .serializers import (
     MessageSerializer,
     ChatMessageInputSerializer,
     AutoChatInputSerializer,
+    AutoChatMatrixInputSerializer,
     FolderSerializer,
+    FolderReorderSerializer,
+    BulkConversationSerializer,
+    BulkConversationMoveSerializer,
 )
+from .auto_chat_matrix import AutoChatMatrix
+from .folder_tree import FolderTreeCache
+from .history_cache import ConversationHistoryCache
+from .pagination import CONVERSATION_ORDERING, get_message_page
+from .search import folder_scope, search_conversations, search_messages
 from .llm_service import LLMService
-from .tasks import generate_conversation_title, run_auto_chat
+from .rate_limiter import RateLimitExceeded
+from .resilience import LLMUnavailableError
+from .renderers import EventStreamRenderer
+from .stats import llm_usage_stats
+from .title_queue import TitleQueue
+from .async_views import stream_turn_events
+from .tasks import generate_ai_response, run_auto_chat
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +55,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = ConversationSerializer
+    pagination_class = EstimatedCountCursorPagination
+    ordering = CONVERSATION_ORDERING
     # Temporairement AllowAny pour le développement
     # TODO: Remettre IsAuthenticated après avoir configuré les sessions correctement
     permission_classes = []
@@ -37,15 +64,19 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtre les conversations de l'utilisateur connecté (si authentifié)."""
         if self.request.user.is_authenticated:
-            return Conversation.objects.filter(user=self.request.user).prefetch_related(
-                "agents",
-                Prefetch("messages", queryset=Message.objects.select_related("agent")),
-            )
-        # Si non authentifié, retourner toutes les conversations (dev only)
-        return Conversation.objects.all().prefetch_related(
-            "agents",
-            Prefetch("messages", queryset=Message.objects.select_related("agent")),
-        )
+            queryset = Conversation.objects.filter(user=self.request.user)
+        else:
+            # Si non authentifié, retourner toutes les conversations (dev only)
+            queryset = Conversation.objects.all()
+
+        if self.action == "list":
+            # Compteur et aperçu sont dénormalisés : pas de préchargement des messages
+            return queryset.select_related("folder").prefetch_related("agents")
+        if self.action == "messages":
+            return queryset
+
+        # Les messages sont paginés par le serializer (page la plus récente)
+        return queryset.prefetch_related("agents")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -65,92 +96,144 @@ class ConversationViewSet(viewsets.ModelViewSet):
             default_user = User.objects.filter(is_superuser=True).first()
             serializer.save(user=default_user)
 
-    @action(detail=False, methods=["post"])
-    def send_message(self, request):
+    def _get_request_user(self, request):
+        """Retourne l'utilisateur authentifié ou, en dev, le superutilisateur par défaut."""
+        if request.user.is_authenticated:
+            logger.info(f"Authenticated user: {request.user.username}")
+            return request.user
+
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+        user = User.objects.filter(is_superuser=True).first()
+        if user:
+            logger.info(f"Using default user: {user.username}")
+        return user
+
+    def _prepare_turn(self, request, allow_background=True):
         """
-        Envoie un message et obtient une réponse de l'agent.
+        Prépare un tour de conversation : valide l'entrée, résout l'agent et la
+        conversation, sauvegarde le message utilisateur et construit l'historique.
+
+        Retourne un tuple (turn, error_response) où `turn` est un dict contenant
+        agent, conversation, user_message, background et history (None en
+        mode background).
         """
-        try:
-            logger.info(f"Received send_message request: {request.data}")
+        serializer = ChatMessageInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-            serializer = ChatMessageInputSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+        message_content = serializer.validated_data["message"]
+        agent_id = serializer.validated_data["agent_id"]
+        conversation_id = serializer.validated_data.get("conversation_id")
 
-            message_content = serializer.validated_data["message"]
-            agent_id = serializer.validated_data["agent_id"]
-            conversation_id = serializer.validated_data.get("conversation_id")
+        logger.info(
+            f"Message: {message_content}, Agent: {agent_id}, Conversation: {conversation_id}"
+        )
 
-            logger.info(
-                f"Message: {message_content}, Agent: {agent_id}, Conversation: {conversation_id}"
+        try:
+            agent = Agent.objects.get(id=agent_id, is_active=True)
+            logger.info(f"Agent found: {agent.name}")
+        except Agent.DoesNotExist:
+            logger.error(f"Agent not found: {agent_id}")
+            return None, Response(
+                {"error": "Agent introuvable ou inactif"},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
+        # Obtenir l'utilisateur (authentifié ou par défaut)
+        user = self._get_request_user(request)
+        if not user:
+            logger.error("No default superuser found")
+            return None, Response(
+                {"error": "Aucun utilisateur par défaut trouvé"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        # Créer ou récupérer la conversation
+        if conversation_id:
             try:
-                agent = Agent.objects.get(id=agent_id, is_active=True)
-                logger.info(f"Agent found: {agent.name}")
-            except Agent.DoesNotExist:
-                logger.error(f"Agent not found: {agent_id}")
-                return Response(
-                    {"error": "Agent introuvable ou inactif"},
+                conversation = Conversation.objects.get(id=conversation_id, user=user)
+                logger.info(f"Existing conversation found: {conversation.id}")
+            except Conversation.DoesNotExist:
+                logger.error(f"Conversation not found: {conversation_id}")
+                return None, Response(
+                    {"error": "Conversation introuvable"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
+        else:
+            conversation = Conversation.objects.create(user=user)
+            conversation.agents.add(agent)
+            logger.info(f"New conversation created: {conversation.id}")
 
-            # Obtenir l'utilisateur (authentifié ou par défaut)
-            if request.user.is_authenticated:
-                user = request.user
-                logger.info(f"Authenticated user: {user.username}")
-            else:
-                from django.contrib.auth import get_user_model
-
-                User = get_user_model()
-                user = User.objects.filter(is_superuser=True).first()
-                if not user:
-                    logger.error("No default superuser found")
-                    return Response(
-                        {"error": "Aucun utilisateur par défaut trouvé"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
-                logger.info(f"Using default user: {user.username}")
-
-            # Créer ou récupérer la conversation
-            if conversation_id:
-                try:
-                    conversation = Conversation.objects.get(
-                        id=conversation_id, user=user
-                    )
-                    logger.info(f"Existing conversation found: {conversation.id}")
-                except Conversation.DoesNotExist:
-                    logger.error(f"Conversation not found: {conversation_id}")
-                    return Response(
-                        {"error": "Conversation introuvable"},
-                        status=status.HTTP_404_NOT_FOUND,
-                    )
-            else:
-                conversation = Conversation.objects.create(user=user)
-                conversation.agents.add(agent)
-                logger.info(f"New conversation created: {conversation.id}")
-
-            # Sauvegarder le message de l'utilisateur
-            user_message = Message.objects.create(
-                conversation=conversation, role="human", content=message_content
-            )
-            logger.info(f"User message saved: {user_message.id}")
+        # Sauvegarder le message de l'utilisateur
+        user_message = Message.objects.create(
+            conversation=conversation, role="human", content=message_content
+        )
+        logger.info(f"User message saved: {user_message.id}")
+
+        turn = {
+            "agent": agent,
+            "conversation": conversation,
+            "user_message": user_message,
+            "background": allow_background
+            and serializer.validated_data["background"],
+            "history": None,
+        }
+
+        # En mode background, l'historique et le titre sont gérés par la tâche
+        if turn["background"]:
+            return turn, None
+
+        # Construire l'historique de conversation (cache Redis incrémental)
+        history = ConversationHistoryCache.get(conversation.id)
+        logger.info(f"History constructed with {len(history)} messages")
+
+        # Mettre la conversation en file de titrage à partir du cinquième message
+        if len(history) >= 5 and not conversation.title:
+            TitleQueue.enqueue(conversation.id)
+
+        turn["history"] = history
+        return turn, None
+
+    @action(detail=False, methods=["post"])
+    def send_message(self, request):
+        """
+        Envoie un message et obtient une réponse de l'agent.
+
+        Avec `"background": true`, la génération est confiée à Celery et la
+        réponse 202 contient un task_id à suivre via `tasks/<task_id>/`.
+        """
+        try:
+            logger.info(f"Received send_message request: {request.data}")
+
+            turn, error_response = self._prepare_turn(request)
+            if error_response is not None:
+                return error_response
 
-            # Générer le titre si c'est le cinquième message
-            if conversation.messages.count() == 5:
-                logger.info("Triggering title generation")
-                generate_conversation_title.delay(conversation.id, agent.id)
+            agent = turn["agent"]
+            conversation = turn["conversation"]
+            user_message = turn["user_message"]
 
-            # Construire l'historique de conversation
-            history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in conversation.messages.all()
-            ]
-            logger.info(f"History constructed with {len(history)} messages")
+            if turn["background"]:
+                task = generate_ai_response.delay(conversation.id, agent.id)
+                logger.info(f"AI response queued: {task.id}")
+                return Response(
+                    {
+                        "status": "queued",
+                        "task_id": task.id,
+                        "conversation_id": conversation.id,
+                        "user_message": MessageSerializer(user_message).data,
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                )
 
             # Générer la réponse de l'agent
             try:
                 logger.info("Calling LLMService.generate_response")
-                response_content = LLMService.generate_response(agent, history)
+                result = LLMService.generate_response_with_metadata(
+                    agent, turn["history"]
+                )
+                response_content = result["content"]
                 logger.info(f"LLM response received: {response_content[:100]}...")
 
                 # Sauvegarder la réponse
@@ -159,6 +242,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
                     role="ai",
                     content=response_content,
                     agent=agent,
+                    metadata=result["metadata"],
                 )
                 logger.info(f"AI message saved: {ai_message.id}")
 
@@ -170,6 +254,24 @@ class ConversationViewSet(viewsets.ModelViewSet):
                     }
                 )
 
+            except RateLimitExceeded as e:
+                logger.warning(f"LLM rate limit reached: {str(e)}")
+                response = Response(
+                    {"error": str(e), "retry_after": round(e.retry_after, 1)},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+                response["Retry-After"] = str(math.ceil(e.retry_after))
+                return response
+
+            except LLMUnavailableError as e:
+                logger.error(f"LLM unavailable: {str(e)}")
+                response = Response(
+                    {"error": str(e), "retry_after": round(e.retry_after, 1)},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+                response["Retry-After"] = str(math.ceil(e.retry_after))
+                return response
+
             except Exception as e:
                 logger.error(f"Error generating LLM response: {str(e)}", exc_info=True)
                 return Response(
@@ -184,6 +286,36 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        renderer_classes=[JSONRenderer, EventStreamRenderer],
+    )
+    def send_message_stream(self, request):
+        """
+        Variante streamée de send_message : la réponse de l'agent est poussée
+        token par token en Server-Sent Events.
+
+        Événements émis :
+        - `start` : conversation_id et message utilisateur sauvegardé
+        - `token` : morceau de texte généré ({"content": "..."})
+        - `done`  : message IA sauvegardé une fois le flux terminé
+        - `error` : erreur survenue pendant la génération
+        """
+        logger.info(f"Received send_message_stream request: {request.data}")
+
+        turn, error_response = self._prepare_turn(request, allow_background=False)
+        if error_response is not None:
+            return error_response
+
+        response = StreamingHttpResponse(
+            stream_turn_events(turn), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Désactive le buffering des reverse proxies (nginx)
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
     def auto_chat(self, request):
         """
@@ -226,6 +358,126 @@ class ConversationViewSet(viewsets.ModelViewSet):
             status=status.HTTP_202_ACCEPTED,
         )
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def auto_chat_matrix(self, request):
+        """
+        Lance un Auto-Chat pour chaque paire (agent métier, agent client),
+        avec un nombre borné d'Auto-Chats simultanés.
+        Réservé aux administrateurs.
+        """
+        serializer = AutoChatMatrixInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        metier_agents, client_agents, errors = AutoChatMatrix.get_agents(
+            serializer.validated_data["metier_agent_ids"],
+            serializer.validated_data["client_agent_ids"],
+        )
+        if errors:
+            return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        matrix_id, task_id = AutoChatMatrix.launch(
+            metier_agents,
+            client_agents,
+            iterations=serializer.validated_data["iterations"],
+            user_id=request.user.id,
+            concurrency=serializer.validated_data.get(
+                "concurrency", settings.AUTO_CHAT_MATRIX_CONCURRENCY
+            ),
+        )
+        pairs = len(metier_agents) * len(client_agents)
+
+        return Response(
+            {
+                "status": "started",
+                "matrix_id": matrix_id,
+                "task_id": task_id,
+                "pairs": pairs,
+                "message": f"Matrice Auto-Chat lancée : {pairs} paires",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"auto_chat_matrix/(?P<matrix_id>[0-9a-f-]+)",
+        permission_classes=[IsAdminUser],
+    )
+    def auto_chat_matrix_summary(self, request, matrix_id=None):
+        """Résumé (en cours ou final) d'une matrice Auto-Chat."""
+        return Response(AutoChatMatrix.summarize(matrix_id))
+
+    @action(detail=False, methods=["get"], url_path=r"tasks/(?P<task_id>[^/.]+)")
+    def task_status(self, request, task_id=None):
+        """
+        Suivi d'une tâche de génération (send_message en mode background,
+        auto_chat) : statut, résultat partiel et message IA final.
+        """
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+
+        # Vérifier que la conversation associée appartient à l'utilisateur
+        conversation_id = info.get("conversation_id")
+        if conversation_id and request.user.is_authenticated:
+            if not Conversation.objects.filter(
+                id=conversation_id, user=request.user
+            ).exists():
+                return Response(
+                    {"error": "Tâche introuvable"}, status=status.HTTP_404_NOT_FOUND
+                )
+
+        data = {"task_id": task_id, "status": result.state}
+        if result.state == "PROGRESS":
+            data["progress"] = info
+            if "partial" in info:
+                data["partial"] = info["partial"]
+        elif result.state == "SUCCESS":
+            data["result"] = result.result
+            if "ai_message" in info:
+                data["ai_message"] = info["ai_message"]
+        elif result.state == "FAILURE":
+            data["error"] = str(result.result)
+
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def messages(self, request, pk=None):
+        """
+        Messages d'une conversation, paginés par clé (created_at, id).
+        Endpoint: GET /api/chat/conversations/<id>/messages/?before=<message_id>
+
+        Renvoie la page la plus récente antérieure à `before` (ou la dernière
+        page de la conversation), dans l'ordre chronologique.
+        """
+        conversation = self.get_object()
+
+        try:
+            before = request.query_params.get("before")
+            before = int(before) if before else None
+            page_size = settings.CONVERSATION_MESSAGES_PAGE_SIZE
+            limit = int(request.query_params.get("limit", page_size))
+            limit = max(1, min(limit, page_size))
+        except ValueError:
+            return Response(
+                {"error": "Paramètres de pagination invalides"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            page = get_message_page(conversation.id, before=before, limit=limit)
+        except Message.DoesNotExist:
+            return Response(
+                {"error": "Message introuvable"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "results": MessageSerializer(page.messages, many=True).data,
+                "has_more": page.has_more,
+                "next_before": page.messages[0].id if page.has_more else None,
+            }
+        )
+
     @action(detail=True, methods=["post"])
     def move_to_folder(self, request, pk=None):
         """Déplacer une conversation dans un dossier."""
@@ -251,6 +503,84 @@ class ConversationViewSet(viewsets.ModelViewSet):
         conversation.save()
         return Response(ConversationListSerializer(conversation).data)
 
+    def _get_owned_conversations(self, conversation_ids):
+        """
+        Vérifie en une requête que toutes les conversations appartiennent à
+        l'utilisateur. Retourne ({id: user_id}, error_response).
+        """
+        owned = dict(
+            self.get_queryset()
+            .filter(id__in=set(conversation_ids))
+            .order_by()
+            .values_list("id", "user_id")
+        )
+        missing = sorted(set(conversation_ids) - owned.keys())
+        if missing:
+            return None, Response(
+                {"error": f"Conversations introuvables: {missing}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return owned, None
+
+    @action(detail=False, methods=["post"])
+    def bulk_move(self, request):
+        """
+        Déplacer plusieurs conversations dans un dossier (ou les en retirer
+        avec folder_id null), en une seule mise à jour.
+        """
+        serializer = BulkConversationMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        folder_id = serializer.validated_data.get("folder_id")
+
+        folder = None
+        if folder_id:
+            folders = Folder.objects.filter(id=folder_id)
+            if request.user.is_authenticated:
+                folders = folders.filter(user=request.user)
+            folder = folders.first()
+            if folder is None:
+                return Response(
+                    {"error": "Dossier non trouvé"}, status=status.HTTP_404_NOT_FOUND
+                )
+
+        with transaction.atomic():
+            owned, error_response = self._get_owned_conversations(
+                serializer.validated_data["conversation_ids"]
+            )
+            if error_response is not None:
+                return error_response
+
+            moved = Conversation.objects.filter(id__in=owned).update(
+                folder=folder, updated_at=timezone.now()
+            )
+
+            # update() n'émet pas de signal post_save
+            for user_id in set(owned.values()):
+                transaction.on_commit(
+                    lambda user_id=user_id: FolderTreeCache.invalidate(user_id)
+                )
+
+        return Response({"status": "success", "moved": moved})
+
+    @action(detail=False, methods=["post"])
+    def bulk_delete(self, request):
+        """Supprimer plusieurs conversations en une seule transaction."""
+        serializer = BulkConversationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            owned, error_response = self._get_owned_conversations(
+                serializer.validated_data["conversation_ids"]
+            )
+            if error_response is not None:
+                return error_response
+
+            # Les messages sont supprimés en masse (cascade sans signal) ;
+            # les signaux post_delete de Conversation invalident les caches
+            Conversation.objects.filter(id__in=owned).delete()
+
+        return Response({"status": "success", "deleted": len(owned)})
+
 
 class MessageViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -259,12 +589,118 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountCursorPagination
+    ordering = ("created_at", "id")
 
     def get_queryset(self):
-        """Filtre les messages des conversations de l'utilisateur."""
-        return Message.objects.filter(
+        """
+        Filtre les messages des conversations de l'utilisateur, et ceux d'une
+        conversation avec ?conversation=<id> (index chat_msg_conv_created_idx).
+        """
+        queryset = Message.objects.filter(
             conversation__user=self.request.user
         ).select_related("conversation", "agent")
+        conversation_id = self.request.query_params.get("conversation")
+        if self.action == "list" and conversation_id:
+            if not conversation_id.isdigit():
+                raise ValidationError({"conversation": "Identifiant invalide"})
+            queryset = queryset.filter(conversation_id=conversation_id)
+        return queryset
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def stats(self, request):
+        """
+        Latence (p50/p95), TTFT et tokens des réponses IA, par agent et par modèle.
+        Endpoint: GET /api/chat/messages/stats/?hours=24 (ou ?since=...&until=...)
+        Réservé aux administrateurs.
+        """
+        try:
+            hours = float(request.query_params.get("hours", 24))
+        except ValueError:
+            return Response(
+                {"error": "Paramètre hours invalide"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        window = {}
+        for param in ("since", "until"):
+            value = request.query_params.get(param)
+            try:
+                window[param] = parse_datetime(value) if value else None
+            except ValueError:
+                window[param] = None
+            if value and window[param] is None:
+                return Response(
+                    {"error": f"Paramètre {param} invalide (format ISO 8601 attendu)"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        since = window["since"] or timezone.now() - timedelta(hours=hours)
+        return Response(llm_usage_stats(since, window["until"]))
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Recherche plein texte dans les messages de l'utilisateur.
+        Endpoint: GET /api/chat/messages/search/?q=<texte>&folder=<id>&conversation=<id>&page=<n>
+
+        Syntaxe « moteur de recherche » : "expression exacte", OR, -mot. Les
+        messages sont triés par pertinence, avec un extrait où les termes
+        trouvés sont entourés de <mark>. `folder` inclut ses sous-dossiers ;
+        la première page liste aussi les conversations dont le titre correspond.
+        """
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"error": "Paramètre q requis"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = settings.SEARCH_PAGE_SIZE
+            limit = int(request.query_params.get("limit", page_size))
+            limit = max(1, min(limit, page_size))
+            folder_id = request.query_params.get("folder")
+            folder_id = int(folder_id) if folder_id else None
+            conversation_id = request.query_params.get("conversation")
+            conversation_id = int(conversation_id) if conversation_id else None
+        except ValueError:
+            return Response(
+                {"error": "Paramètres de recherche invalides"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        folder_ids = None
+        if folder_id is not None:
+            folder_ids = folder_scope(request.user.id, folder_id)
+            if folder_ids is None:
+                return Response(
+                    {"error": "Dossier introuvable"}, status=status.HTTP_404_NOT_FOUND
+                )
+
+        results = search_messages(
+            request.user,
+            text,
+            folder_ids=folder_ids,
+            conversation_id=conversation_id,
+            offset=(page - 1) * limit,
+            limit=limit,
+        )
+        conversations = []
+        if page == 1 and conversation_id is None:
+            conversations = search_conversations(
+                request.user, text, folder_ids=folder_ids
+            )
+
+        return Response(
+            {
+                "query": text,
+                "conversations": conversations,
+                "results": results.results,
+                "page": page,
+                "has_more": results.has_more,
+                "next_page": page + 1 if results.has_more else None,
+            }
+        )
 
 
 class FolderViewSet(viewsets.ModelViewSet):
@@ -294,20 +730,56 @@ class FolderViewSet(viewsets.ModelViewSet):
             default_user = User.objects.filter(is_superuser=True).first()
             serializer.save(user=default_user)
 
+    def _get_tree_user_id(self, request):
+        # None : tous les dossiers (accès non authentifié, dev only)
+        return request.user.id if request.user.is_authenticated else None
+
+    def list(self, request, *args, **kwargs):
+        """Dossiers racine paginés, arbre complet issu de FolderTreeCache."""
+        tree = FolderTreeCache.get(self._get_tree_user_id(request))
+        page = self.paginate_queryset(tree)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(tree)
+
+    def retrieve(self, request, *args, **kwargs):
+        folder = self.get_object()
+        node = FolderTreeCache.find(
+            FolderTreeCache.get(self._get_tree_user_id(request)), folder.id
+        )
+        if node is None:
+            # Arbre en cache pas encore invalidé : sérialisation directe
+            node = self.get_serializer(folder).data
+        return Response(node)
+
     @action(detail=False, methods=["post"])
     def reorder(self, request):
-        """Réorganiser les dossiers."""
-        folder_orders = request.data.get("folders", [])
-
-        for item in folder_orders:
-            try:
-                if request.user.is_authenticated:
-                    folder = Folder.objects.get(id=item["id"], user=request.user)
-                else:
-                    folder = Folder.objects.get(id=item["id"])
-                folder.order = item["order"]
-                folder.save()
-            except (Folder.DoesNotExist, KeyError):
-                pass
+        """
+        Réorganiser les dossiers en une seule mise à jour groupée.
+        Les dossiers inconnus ou n'appartenant pas à l'utilisateur sont ignorés.
+        """
+        serializer = FolderReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        orders = {
+            item["id"]: item["order"] for item in serializer.validated_data["folders"]
+        }
+
+        queryset = Folder.objects.filter(id__in=orders)
+        if request.user.is_authenticated:
+            queryset = queryset.filter(user=request.user)
+
+        now = timezone.now()
+        with transaction.atomic():
+            folders = list(queryset.select_for_update())
+            for folder in folders:
+                folder.order = orders[folder.id]
+                folder.updated_at = now
+            Folder.objects.bulk_update(folders, ["order", "updated_at"])
+
+            # bulk_update n'émet pas de signal post_save
+            for user_id in {folder.user_id for folder in folders}:
+                transaction.on_commit(
+                    lambda user_id=user_id: FolderTreeCache.invalidate(user_id)
+                )
 
-        return Response({"status": "success"})
+        return Response({"status": "success", "updated": len(folders)})
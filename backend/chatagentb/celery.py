@@ -2,7 +2,9 @@
 Celery configuration for chatagentb project.
 """
 import os
+import time
 from celery import Celery
+from celery.signals import before_task_publish
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chatagentb.settings')
 
@@ -10,6 +12,16 @@ app = Celery('chatagentb')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+# Métriques des tâches (signaux task_prerun / task_postrun)
+from chatagentb import metrics  # noqa: E402,F401
+
+
+@before_task_publish.connect
+def add_published_at_header(headers=None, **kwargs):
+    """Horodate chaque message : worker-wrapper.py en déduit l'âge de la file."""
+    headers.setdefault('published_at', time.time())
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -2,7 +2,19 @@
 Configuration centralisée des modèles LLM.
 """
 
+import os
+import re
+
 # Configuration des modèles LLM disponibles
+#
+# `rpm` / `tpm` : quotas du compte (requêtes et tokens par minute), propres à
+# chaque déploiement : lus dans LLM_RPM_<MODÈLE> / LLM_TPM_<MODÈLE> (ex.
+# LLM_TPM_GPT_4O, LLM_RPM_AZURE_GPT_4O_MINI) et appliqués par
+# chat.rate_limiter à tous les processus ; 0 ou absent = pas de limite.
+# `timeout`, `max_retries`, `latency_slo` et `fallbacks` (modèles de repli,
+# dans l'ordre) : voir chat.resilience ; valeurs par défaut dans settings.
+# `endpoints` : endpoints (providers) servant le modèle, choisis par
+# chat.llm_router ; voir chat.providers.
 LLM_MODELS = {
     # OpenAI Models
     "gpt-4o": {
@@ -10,27 +22,35 @@ LLM_MODELS = {
         "provider": "openai",
         "model_name": "gpt-4o",
         "max_tokens_limit": 4096,
+        "context_window": 128000,  # Taille du contexte (tokens)
         "supports_streaming": True,
+        "latency_slo": 20,
+        "fallbacks": ["gpt-4o-mini"],
     },
     "gpt-4o-mini": {
         "display_name": "GPT-4o Mini",
         "provider": "openai",
         "model_name": "gpt-4o-mini",
         "max_tokens_limit": 4096,
+        "context_window": 128000,
         "supports_streaming": True,
+        "timeout": 30,
     },
     "gpt-4-turbo": {
         "display_name": "GPT-4 Turbo",
         "provider": "openai",
         "model_name": "gpt-4-turbo",
         "max_tokens_limit": 4096,
+        "context_window": 128000,
         "supports_streaming": True,
+        "fallbacks": ["gpt-4o", "gpt-4o-mini"],
     },
     "gpt-4": {
         "display_name": "GPT-4",
         "provider": "openai",
         "model_name": "gpt-4",
         "max_tokens_limit": 8192,
+        "context_window": 8192,
         "supports_streaming": True,
     },
     "gpt-3.5-turbo": {
@@ -38,6 +58,7 @@ LLM_MODELS = {
         "provider": "openai",
         "model_name": "gpt-3.5-turbo",
         "max_tokens_limit": 4096,
+        "context_window": 16385,
         "supports_streaming": True,
     },
     # Azure OpenAI Models (si vous utilisez Azure)
@@ -47,7 +68,9 @@ LLM_MODELS = {
         "model_name": "azure.gpt-4o",
         # "deployment_name": "gpt-4o",  # Nom du déploiement Azure
         "max_tokens_limit": 4096,
+        "context_window": 128000,
         "supports_streaming": True,
+        "fallbacks": ["azure.gpt-4o-mini"],
     },
     "azure.gpt-4o-mini": {
         "display_name": "litellm Azure GPT-4o Mini",
@@ -55,11 +78,34 @@ LLM_MODELS = {
         "model_name": "azure.gpt-4o-mini",
         # "deployment_name": "gpt-4o-mini",
         "max_tokens_limit": 4096,
+        "context_window": 128000,
+        "supports_streaming": True,
+    },
+    # Modèle factice (tests de charge, CI) : réglages LLM_FAKE_* ou, par
+    # endpoint, latency / tokens_per_second / error_rate... (chat.fake_llm)
+    "fake": {
+        "display_name": "Fake LLM (tests)",
+        "provider": "fake",
+        "model_name": "fake",
+        "max_tokens_limit": 4096,
+        "context_window": 128000,
         "supports_streaming": True,
     },
 }
 
 
+
+def _env_limit(model_key: str, kind: str) -> int:
+    """Quota `kind` ("rpm" ou "tpm") du modèle, lu dans l'environnement (0 sinon)."""
+    name = re.sub(r"[^A-Z0-9]+", "_", model_key.upper())
+    return int(os.getenv(f"LLM_{kind.upper()}_{name}", "0"))
+
+
+for _model_key, _model_config in LLM_MODELS.items():
+    for _kind in ("rpm", "tpm"):
+        _model_config.setdefault(_kind, _env_limit(_model_key, _kind))
+
+
 def get_llm_choices():
     """
     Retourne la liste des choix de modèles LLM pour Django.
@@ -0,0 +1,278 @@
+"""
+Métriques Prometheus du web (ASGI) et du worker Celery.
+
+Les métriques sont des compteurs en mémoire (prometheus_client) : une mesure
+coûte un incrément sous verrou, sans I/O. Quand plusieurs processus servent
+la même application (workers gunicorn, processus enfants Celery), définir
+PROMETHEUS_MULTIPROC_DIR : chaque processus écrit alors ses valeurs dans des
+fichiers mmap de ce répertoire, agrégés à la lecture de /metrics.
+
+Les labels restent à cardinalité bornée : nom de route (une par action DRF),
+clé de modèle LLM, nom de tâche Celery.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_shutdown,
+)
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Requêtes HTTP : latence jusqu'à la réponse (hors corps streamé)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP par route",
+    ["view", "method", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requêtes HTTP en cours de traitement",
+    multiprocess_mode="livesum",
+)
+
+# Appels LLM (hors cache des réponses)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Durée des appels LLM par modèle",
+    ["model", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300),
+)
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "llm_calls_in_flight",
+    "Appels LLM en cours par modèle",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens consommés par modèle (prompt / completion)",
+    ["model", "kind"],
+)
+LLM_RATE_LIMITED = Counter(
+    "llm_rate_limited_total",
+    "Appels LLM refusés par le limiteur de débit (budget épuisé)",
+    ["model"],
+)
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Appels servis par un modèle de repli",
+    ["model", "fallback"],
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_circuit_open",
+    "1 si le disjoncteur du modèle est ouvert",
+    ["model"],
+    multiprocess_mode="max",
+)
+LLM_ENDPOINT_LATENCY = Gauge(
+    "llm_endpoint_latency_seconds",
+    "Latence moyenne (EWMA) vue par le routeur, par endpoint",
+    ["endpoint"],
+    multiprocess_mode="mostrecent",
+)
+LLM_ENDPOINT_ERROR_RATE = Gauge(
+    "llm_endpoint_error_rate",
+    "Taux d'erreur (EWMA) vu par le routeur, par endpoint",
+    ["endpoint"],
+    multiprocess_mode="mostrecent",
+)
+LLM_CACHE_HITS = Counter(
+    "llm_cache_hits_total",
+    "Réponses servies par le cache des réponses LLM",
+    ["model"],
+)
+
+# Tâches Celery
+CELERY_TASKS = Counter(
+    "celery_tasks_total",
+    "Tâches Celery terminées par nom et issue",
+    ["task", "outcome"],
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Durée d'exécution des tâches Celery",
+    ["task"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+CELERY_TASKS_IN_FLIGHT = Gauge(
+    "celery_tasks_in_flight",
+    "Tâches Celery en cours d'exécution",
+    ["task"],
+    multiprocess_mode="livesum",
+)
+
+# Requêtes SQL
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Requêtes SQL exécutées par base",
+    ["alias"],
+)
+
+
+def get_registry():
+    """Registre à exposer : agrégé sur les processus en mode multiprocess."""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Exposition Prometheus des métriques.
+    Endpoint: GET /metrics
+
+    Si METRICS_TOKEN est défini, l'en-tête `Authorization: Bearer <token>`
+    est requis.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=403)
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+def _view_label(request) -> str:
+    """Nom de la route résolue (ex: conversation-send-message)."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """
+    Mesure la durée et le nombre de requêtes en cours, par route.
+    Compatible sync et async pour ne pas forcer de changement de contexte
+    sous ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            self._observe(request, status, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            self._observe(request, status, started)
+
+    @staticmethod
+    def _observe(request, status, started):
+        HTTP_REQUEST_DURATION.labels(
+            view=_view_label(request), method=request.method, status=status
+        ).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_llm_call(model: str):
+    """Mesure un appel LLM (durée, issue, appels en cours)."""
+    in_flight = LLM_CALLS_IN_FLIGHT.labels(model=model)
+    in_flight.inc()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        in_flight.dec()
+        LLM_CALL_DURATION.labels(model=model, outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+def record_llm_usage(metadata: dict):
+    """Comptabilise les tokens (ou le cache hit) d'un appel LLM terminé."""
+    model = metadata["model"]
+    if metadata["cache_hit"]:
+        LLM_CACHE_HITS.labels(model=model).inc()
+        return
+    LLM_TOKENS.labels(model=model, kind="prompt").inc(metadata["prompt_tokens"])
+    LLM_TOKENS.labels(model=model, kind="completion").inc(
+        metadata["completion_tokens"]
+    )
+
+
+# Début des tâches en cours, par task_id (processus worker courant)
+_task_started = {}
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    CELERY_TASKS_IN_FLIGHT.labels(task=task.name).inc()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    CELERY_TASKS_IN_FLIGHT.labels(task=task.name).dec()
+    CELERY_TASKS.labels(task=task.name, outcome=(state or "unknown").lower()).inc()
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task=task.name).observe(
+            time.perf_counter() - started
+        )
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(pid=None, **kwargs):
+    """Libère les gauges `livesum` d'un processus enfant arrêté."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def _count_query(execute, sql, params, many, context):
+    DB_QUERIES.labels(alias=context["connection"].alias).inc()
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    # Le wrapper reste attaché au DatabaseWrapper entre deux reconnexions
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
@@ -0,0 +1,78 @@
+"""
+Pagination par curseur des listes de l'API.
+
+Chaque page est lue par une condition sur la clé de tri (`updated_at < x`...)
+servie par un index, sans COUNT(*) ni OFFSET : une page profonde coûte autant
+que la première. Le total exact est remplacé par une estimation optionnelle
+(?count=true) tirée des statistiques de Postgres.
+"""
+
+import json
+from django.conf import settings
+from django.db import connection
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+
+
+def estimate_count(queryset) -> int:
+    """
+    Nombre de lignes estimé par le planificateur de Postgres (EXPLAIN, sans
+    exécuter la requête). Comptage exact sur les autres bases.
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountCursorPagination(CursorPagination):
+    """
+    Pagination par curseur, triée par l'attribut `ordering` de la vue (dernier
+    champ unique, pour un ordre stable) : réponse {next, previous, results},
+    plus `count` estimé si ?count=true.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    count_query_param = "count"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "ordering", None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = estimate_count(queryset)
+        page = super().paginate_queryset(queryset, request, view)
+        if page is not None:
+            # L'estimation n'est refaite que si le client la redemande
+            self.base_url = remove_query_param(self.base_url, self.count_query_param)
+        return page
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response["count"] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {
+            "type": "integer",
+            "description": "Estimation (?count=true)",
+        }
+        return response_schema
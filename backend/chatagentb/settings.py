@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party
     "rest_framework",
     "corsheaders",
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "chatagentb.metrics.MetricsMiddleware",  # En premier : mesure toute la pile
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Add WhiteNoise for static files
     "corsheaders.middleware.CorsMiddleware",
@@ -137,6 +139,10 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 50,
 }
 
+# Taille maximale d'une page (?page_size=) des listes paginées par curseur
+# (conversations, messages, agents : chatagentb.pagination)
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:3000").split(
     ","
@@ -183,6 +189,81 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
+# Celery Beat : planification stockée en base (django_celery_beat) ;
+# les entrées de CELERY_BEAT_SCHEDULE y sont synchronisées au démarrage
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+
+# Génération des titres par lots : modèle économique dédié, taille des lots
+# et intervalle (secondes) entre deux passages de la tâche périodique
+CHAT_TITLE_MODEL = os.getenv("CHAT_TITLE_MODEL", "gpt-4o-mini")
+CHAT_TITLE_BATCH_SIZE = int(os.getenv("CHAT_TITLE_BATCH_SIZE", "20"))
+CHAT_TITLE_BATCH_INTERVAL = int(os.getenv("CHAT_TITLE_BATCH_INTERVAL", "30"))
+
+CELERY_BEAT_SCHEDULE = {
+    "generate-pending-titles": {
+        "task": "chat.tasks.generate_pending_titles",
+        "schedule": CHAT_TITLE_BATCH_INTERVAL,
+    },
+}
+
+# Auto-Chat : reprises après erreur LLM (délai doublé à chaque tentative) et
+# limite souple après laquelle la tâche se relance depuis son dernier tour
+AUTO_CHAT_MAX_RETRIES = int(os.getenv("AUTO_CHAT_MAX_RETRIES", "3"))
+AUTO_CHAT_RETRY_DELAY = int(os.getenv("AUTO_CHAT_RETRY_DELAY", "10"))
+AUTO_CHAT_SOFT_TIME_LIMIT = CELERY_TASK_TIME_LIMIT - 60
+# Relances consécutives sans tour terminé (limite de temps, débit LLM épuisé)
+# avant l'échec de l'exécution
+AUTO_CHAT_MAX_STALLED_RETRIES = int(os.getenv("AUTO_CHAT_MAX_STALLED_RETRIES", "10"))
+
+# Matrice Auto-Chat : nombre d'Auto-Chats d'une même matrice exécutés en parallèle
+AUTO_CHAT_MATRIX_CONCURRENCY = int(os.getenv("AUTO_CHAT_MATRIX_CONCURRENCY", "4"))
+
+# Redis (caches applicatifs) - par défaut la même instance que le broker Celery
+REDIS_URL = os.getenv("REDIS_URL", CELERY_BROKER_URL)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+
+# Cache Django (arbre des dossiers...) ; les appelants retombent sur la base
+# si Redis est indisponible
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "chatagentb",
+        "OPTIONS": {
+            "socket_timeout": REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        },
+    }
+}
+
+# Métriques Prometheus (GET /metrics) : si défini, exige
+# `Authorization: Bearer <METRICS_TOKEN>`. Avec plusieurs processus (workers
+# gunicorn, enfants Celery), définir aussi PROMETHEUS_MULTIPROC_DIR.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Durée de vie de l'arbre des dossiers en cache (secondes)
+FOLDER_TREE_CACHE_TTL = int(os.getenv("FOLDER_TREE_CACHE_TTL", str(60 * 60)))
+
+# Nombre de messages renvoyés par page (détail d'une conversation et
+# endpoint /conversations/<id>/messages/)
+CONVERSATION_MESSAGES_PAGE_SIZE = int(
+    os.getenv("CONVERSATION_MESSAGES_PAGE_SIZE", "50")
+)
+
+# Recherche plein texte (GET /api/chat/messages/search/) : messages par page et
+# conversations dont le titre correspond (première page uniquement)
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_CONVERSATIONS_LIMIT = int(os.getenv("SEARCH_CONVERSATIONS_LIMIT", "5"))
+
+# Cache de l'historique des conversations (secondes)
+CHAT_HISTORY_CACHE_TTL = int(os.getenv("CHAT_HISTORY_CACHE_TTL", str(24 * 60 * 60)))
+
+# Cache des réponses LLM (agents avec enable_response_cache)
+LLM_RESPONSE_CACHE_TTL = int(os.getenv("LLM_RESPONSE_CACHE_TTL", str(60 * 60)))
+LLM_RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "10000")
+)
+
 # LLM Configuration
 # OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -192,3 +273,45 @@ OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "")  # URL de base pour l'API (op
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY", "")
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "")
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+
+# Limiteur de débit LLM (quotas rpm/tpm de LLM_MODELS) : attente maximale
+# d'un budget disponible pour les requêtes HTTP et pour les tâches Celery
+LLM_RATE_LIMIT_WAIT = float(os.getenv("LLM_RATE_LIMIT_WAIT", "10"))
+LLM_RATE_LIMIT_TASK_WAIT = float(os.getenv("LLM_RATE_LIMIT_TASK_WAIT", "60"))
+
+# Résilience des appels LLM (surchargeable par modèle dans LLM_MODELS) :
+# timeout d'une tentative, retries avec backoff exponentiel (jitter) et
+# disjoncteur par modèle
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF_BASE = float(os.getenv("LLM_RETRY_BACKOFF_BASE", "0.5"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_TIMEOUT = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Routage entre les endpoints d'un modèle (chat.llm_router) : poids des
+# nouvelles mesures dans les moyennes mobiles, pénalité du taux d'erreur et
+# part d'appels envoyés au hasard pour rafraîchir les statistiques
+LLM_ROUTER_EWMA_ALPHA = float(os.getenv("LLM_ROUTER_EWMA_ALPHA", "0.2"))
+LLM_ROUTER_ERROR_PENALTY = float(os.getenv("LLM_ROUTER_ERROR_PENALTY", "10"))
+LLM_ROUTER_EXPLORATION = float(os.getenv("LLM_ROUTER_EXPLORATION", "0.05"))
+
+# Modèle factice `fake` (chat.fake_llm), pour les tests de charge et la CI :
+# désactivé hors DEBUG sauf LLM_FAKE_ENABLED=True. Latence avant la réponse
+# ("lognormal:<médiane>:<sigma>", "constant:<s>"...), débit en tokens/s,
+# tokens par morceau streamé, longueur maximale des réponses, part d'erreurs
+LLM_FAKE_ENABLED = os.getenv("LLM_FAKE_ENABLED", str(DEBUG)) == "True"
+LLM_FAKE_LATENCY = os.getenv("LLM_FAKE_LATENCY", "lognormal:0.4:0.5")
+LLM_FAKE_TOKENS_PER_SECOND = float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "80"))
+LLM_FAKE_CHUNK_TOKENS = int(os.getenv("LLM_FAKE_CHUNK_TOKENS", "4"))
+LLM_FAKE_COMPLETION_TOKENS = int(os.getenv("LLM_FAKE_COMPLETION_TOKENS", "120"))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED")) if os.getenv("LLM_FAKE_SEED") else None
+
+# Cache des clients LLM et pool de connexions HTTP keep-alive
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "32"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
@@ -8,6 +8,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from agents.auth_views import login_view, logout_view, me_view, register_view
 from django.http import JsonResponse
+from chatagentb.metrics import metrics_view
 
 
 # WhiteNoise will automatically serve static files in production
@@ -20,6 +21,7 @@ def health_check(request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", health_check, name="health-check"),
+    path("metrics", metrics_view, name="metrics"),
     path("api/agents/", include("agents.urls")),
     path("api/chat/", include("chat.urls")),
     path("api/auth/login/", login_view, name="login"),
@@ -28,6 +28,10 @@ fi
 echo "📦 Collecting static files..."
 python manage.py collectstatic --noinput || true
 
+# Métriques Prometheus agrégées sur les workers Gunicorn (fichiers mmap)
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Démarrer l'application avec Gunicorn
 echo "🎉 Starting Gunicorn..."
 exec gunicorn chatagentb.asgi:application \
@@ -1,29 +1,208 @@
 #!/usr/bin/env python3
 """
 Worker wrapper with HTTP health check for Cloud Run.
-Runs both a Celery worker and a simple health check server.
+Runs both a Celery worker and a health check server.
+
+Endpoints:
+- /health: liveness, 503 once the Celery subprocess has exited.
+- /ready: readiness, 200 only when the subprocess is alive and its consumer
+  answers a control broadcast. The JSON body reports the queue depths,
+  concurrency utilization and the age of the oldest waiting task, so that
+  autoscaling can follow the backlog rather than the CPU.
+- /metrics: Prometheus exposition. Celery child processes write their metrics
+  to PROMETHEUS_MULTIPROC_DIR, aggregated on scrape.
 """
+import json
 import os
+import shutil
+import socket
 import sys
 import subprocess
 import threading
+import time
 from http.server import HTTPServer, BaseHTTPRequestHandler
 
+# Must be set before prometheus_client is imported (here and in Celery)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+import redis  # noqa: E402
+from celery import Celery  # noqa: E402
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402
+
+BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
+CELERY_QUEUES = os.environ.get("CELERY_QUEUES", "celery").split(",")
+CELERY_CONCURRENCY = int(os.environ.get("CELERY_CONCURRENCY", "2"))
+WORKER_NAME = f"celery@{socket.gethostname()}"
+
+# Probes are cheap: the broker is queried at most once per interval
+STATUS_CACHE_SECONDS = float(os.environ.get("WORKER_STATUS_CACHE_SECONDS", "5"))
+INSPECT_TIMEOUT = float(os.environ.get("WORKER_INSPECT_TIMEOUT", "2"))
+
+
+class WorkerMonitor:
+    """Celery subprocess and broker state, cached for STATUS_CACHE_SECONDS."""
+
+    def __init__(self, broker_url):
+        self.process = None
+        self.redis = redis.Redis.from_url(
+            broker_url, socket_timeout=2, socket_connect_timeout=2
+        )
+        self.control_app = Celery(broker=broker_url)
+        self._lock = threading.Lock()
+        self._status = None
+        self._status_at = 0.0
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def status(self):
+        with self._lock:
+            if self._status is None or time.monotonic() - self._status_at > STATUS_CACHE_SECONDS:
+                self._status = self._collect()
+                self._status_at = time.monotonic()
+            return self._status
+
+    def _collect(self):
+        alive = self.is_alive()
+        active_tasks = self._active_tasks() if alive else None
+        consuming = active_tasks is not None
+        queues = {queue: self._queue_status(queue) for queue in CELERY_QUEUES}
+        utilization = (
+            round(active_tasks / CELERY_CONCURRENCY, 2) if consuming else None
+        )
+
+        ages = [q["oldest_task_age"] for q in queues.values() if q["oldest_task_age"] is not None]
+        return {
+            "ready": alive and consuming,
+            "worker": WORKER_NAME,
+            "process_alive": alive,
+            "consuming": consuming,
+            "concurrency": CELERY_CONCURRENCY,
+            "active_tasks": active_tasks,
+            "utilization": utilization,
+            "queues": queues,
+            "backlog": sum(q["length"] or 0 for q in queues.values()),
+            "oldest_task_age": max(ages) if ages else None,
+        }
+
+    def _active_tasks(self):
+        """Number of running tasks, or None if the worker does not answer."""
+        try:
+            replies = self.control_app.control.inspect(
+                destination=[WORKER_NAME], timeout=INSPECT_TIMEOUT
+            ).active()
+        except Exception as e:
+            print(f"✗ Celery inspect failed: {e}")
+            return None
+        if not replies or WORKER_NAME not in replies:
+            return None
+        return len(replies[WORKER_NAME])
+
+    def _queue_status(self, queue):
+        """
+        Queue length and age of its oldest message. Kombu pushes on the left
+        and consumes from the right: the oldest message is at index -1. Its
+        `published_at` header is set by the before_task_publish signal.
+        """
+        try:
+            length = self.redis.llen(queue)
+            oldest = self.redis.lindex(queue, -1)
+        except redis.RedisError as e:
+            print(f"✗ Redis unavailable: {e}")
+            return {"length": None, "oldest_task_age": None}
+
+        age = None
+        if oldest is not None:
+            try:
+                published_at = json.loads(oldest)["headers"].get("published_at")
+            except (ValueError, KeyError, TypeError, AttributeError):
+                published_at = None
+            if published_at is not None:
+                age = round(max(time.time() - published_at, 0), 1)
+        return {"length": length, "oldest_task_age": age}
+
+
+MONITOR = WorkerMonitor(BROKER_URL)
+
+
+class WorkerStatusCollector:
+    """Exposes the WorkerMonitor state as Prometheus gauges."""
+
+    def collect(self):
+        status = MONITOR.status()
+
+        length = GaugeMetricFamily(
+            "celery_queue_length", "Messages waiting in the broker queue", labels=["queue"]
+        )
+        age = GaugeMetricFamily(
+            "celery_queue_oldest_task_age_seconds",
+            "Age of the oldest message waiting in the broker queue",
+            labels=["queue"],
+        )
+        for queue, queue_status in status["queues"].items():
+            if queue_status["length"] is not None:
+                length.add_metric([queue], queue_status["length"])
+            age.add_metric([queue], queue_status["oldest_task_age"] or 0)
+        yield length
+        yield age
+
+        yield GaugeMetricFamily(
+            "celery_worker_ready", "1 if the worker is alive and consuming", value=int(status["ready"])
+        )
+        if status["utilization"] is not None:
+            yield GaugeMetricFamily(
+                "celery_worker_utilization",
+                "Running tasks divided by the worker concurrency",
+                value=status["utilization"],
+            )
+
+
+def build_registry():
+    """Registry aggregating the Celery processes metrics and the worker status."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(WorkerStatusCollector())
+    return registry
+
+
+REGISTRY = None
+
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
-    """Simple HTTP handler for health checks."""
+    """HTTP handler for the liveness, readiness and metrics probes."""
 
     def do_GET(self):
-        """Handle GET requests - always return 200 OK."""
+        """Handle GET requests."""
         if self.path == "/" or self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"OK - Celery Worker Running")
+            if MONITOR.is_alive():
+                self._send(200, "text/plain", b"OK - Celery Worker Running")
+            else:
+                self._send(503, "text/plain", b"Celery Worker Not Running")
+        elif self.path == "/ready":
+            status = MONITOR.status()
+            self._send(
+                200 if status["ready"] else 503,
+                "application/json",
+                json.dumps(status).encode(),
+            )
+        elif self.path == "/metrics":
+            self._send(200, CONTENT_TYPE_LATEST, generate_latest(REGISTRY))
         else:
             self.send_response(404)
             self.end_headers()
 
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-type", content_type)
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass  # Comment this out to enable access logs
@@ -36,6 +215,13 @@ def run_health_server(port=8080):
     server.serve_forever()
 
 
+def reset_metrics_dir():
+    """Start from an empty multiprocess directory (stale pids skew gauges)."""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
 def run_celery_worker():
     """Run the Celery worker process."""
     cmd = [
@@ -44,18 +230,20 @@ def run_celery_worker():
         "chatagentb",
         "worker",
         "--loglevel=info",
-        "--concurrency=2",
+        f"--hostname={WORKER_NAME}",
+        f"--queues={','.join(CELERY_QUEUES)}",
+        f"--concurrency={CELERY_CONCURRENCY}",
         "--max-tasks-per-child=1000",
     ]
 
     print(f"✓ Starting Celery worker: {' '.join(cmd)}")
 
     # Run celery worker and wait for it
-    process = subprocess.Popen(cmd)
-    process.wait()
+    MONITOR.process = subprocess.Popen(cmd)
+    MONITOR.process.wait()
 
     # If worker exits, exit with same code
-    sys.exit(process.returncode)
+    sys.exit(MONITOR.process.returncode)
 
 
 if __name__ == "__main__":
@@ -65,6 +253,9 @@ if __name__ == "__main__":
     print("🚀 Starting ChatAgentB Celery Worker with Health Check")
     print("=" * 60)
 
+    reset_metrics_dir()
+    REGISTRY = build_registry()
+
     # Start health check server in background thread
     health_thread = threading.Thread(
         target=run_health_server, args=(port,), daemon=True
@@ -8,12 +8,17 @@ export default function ChatWindow({
   agents,
   selectedAgent,
   onSelectAgent,
+  hasMore = false,
+  onLoadMore,
 }) {
   const messagesEndRef = useRef(null);
+  const lastMessageId = messages[messages.length - 1]?.id;
 
+  // Ne défiler vers le bas que pour un nouveau message (pas au chargement
+  // des messages plus anciens)
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages, isLoading]);
+  }, [lastMessageId, isLoading]);
 
   return (
     <div className="flex-1 overflow-y-auto p-6 space-y-4">
@@ -59,6 +64,16 @@ export default function ChatWindow({
         </div>
       ) : (
         <>
+          {hasMore && (
+            <div className="flex justify-center">
+              <button
+                onClick={onLoadMore}
+                className="text-sm text-gray-400 hover:text-white px-4 py-2 rounded-lg border border-gray-700 transition-colors"
+              >
+                Charger les messages précédents
+              </button>
+            </div>
+          )}
           {messages.map((message) => (
             <div
               key={message.id}
@@ -31,6 +31,7 @@ export default function ChatPage() {
   } = useStore();
 
   const [isLoading, setIsLoading] = useState(false);
+  const [hasMoreMessages, setHasMoreMessages] = useState(false);
 
   useEffect(() => {
     loadAgents();
@@ -70,6 +71,7 @@ export default function ChatPage() {
       const response = await conversationsAPI.get(conversationId);
       setCurrentConversation(response.data);
       setMessages(response.data.messages || []);
+      setHasMoreMessages(Boolean(response.data.has_more));
       if (response.data.agents_details?.length > 0) {
         setSelectedAgent(response.data.agents_details[0]);
       }
@@ -78,6 +80,21 @@ export default function ChatPage() {
     }
   };
 
+  const handleLoadOlderMessages = async () => {
+    if (!currentConversation || messages.length === 0) return;
+
+    try {
+      const response = await conversationsAPI.messages(
+        currentConversation.id,
+        messages[0].id,
+      );
+      setMessages([...response.data.results, ...messages]);
+      setHasMoreMessages(response.data.has_more);
+    } catch (error) {
+      console.error("Erreur lors du chargement des messages:", error);
+    }
+  };
+
   const handleDeleteConversation = async (conversationId) => {
     if (!confirm("Êtes-vous sûr de vouloir supprimer cette conversation ?"))
       return;
@@ -88,6 +105,7 @@ export default function ChatPage() {
       if (currentConversation?.id === conversationId) {
         setCurrentConversation(null);
         setMessages([]);
+        setHasMoreMessages(false);
       }
     } catch (error) {
       console.error("Erreur lors de la suppression de la conversation:", error);
@@ -97,6 +115,7 @@ export default function ChatPage() {
   const handleNewConversation = () => {
     setCurrentConversation(null);
     setMessages([]);
+    setHasMoreMessages(false);
     setSelectedAgent(agents.length > 0 ? agents[0] : null);
   };
 
@@ -226,6 +245,8 @@ export default function ChatPage() {
           agents={agents}
           selectedAgent={selectedAgent}
           onSelectAgent={setSelectedAgent}
+          hasMore={hasMoreMessages}
+          onLoadMore={handleLoadOlderMessages}
         />
 
         <ChatInput
@@ -39,10 +39,19 @@ export const agentsAPI = {
 export const conversationsAPI = {
   list: () => api.get("/chat/conversations/"),
   get: (id) => api.get(`/chat/conversations/${id}/`),
+  messages: (id, before) =>
+    api.get(`/chat/conversations/${id}/messages/`, { params: { before } }),
   create: (data) => api.post("/chat/conversations/", data),
   delete: (id) => api.delete(`/chat/conversations/${id}/`),
   sendMessage: (data) => api.post("/chat/conversations/send_message/", data),
   autoChat: (data) => api.post("/chat/conversations/auto_chat/", data),
+  bulkMove: (ids, folderId) =>
+    api.post("/chat/conversations/bulk_move/", {
+      conversation_ids: ids,
+      folder_id: folderId,
+    }),
+  bulkDelete: (ids) =>
+    api.post("/chat/conversations/bulk_delete/", { conversation_ids: ids }),
   moveToFolder: (id, folderId) =>
     api.post(`/chat/conversations/${id}/move_to_folder/`, {
       folder_id: folderId,